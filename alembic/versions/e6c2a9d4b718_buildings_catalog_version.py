@@ -0,0 +1,28 @@
+"""buildings_catalog_version
+
+Revision ID: e6c2a9d4b718
+Revises: d3b8f6a1c592
+Create Date: 2026-10-18 16:41:09.382716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6c2a9d4b718'
+down_revision: Union[str, None] = 'd3b8f6a1c592'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+catalog_versions = sa.table('catalog_versions', sa.column('name', sa.String()), sa.column('version', sa.Integer()))
+
+
+def upgrade() -> None:
+    op.bulk_insert(catalog_versions, [{'name': 'buildings', 'version': 0}])
+
+
+def downgrade() -> None:
+    op.execute(catalog_versions.delete().where(catalog_versions.c.name == 'buildings'))
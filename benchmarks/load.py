@@ -0,0 +1,348 @@
+"""Drive every endpoint of the API at a fixed concurrency and report throughput and latency percentiles.
+
+Endpoints are measured one after another, each with its own number of requests, so the percentiles of
+one endpoint are not skewed by the load of the others. Request parameters are sampled from the catalog
+served by the API, e.g. one seeded with `python -m benchmarks.seed`. With `--baseline` the results are
+compared against a stored run and the process exits with status 1 on a regression.
+
+Usage:
+    python -m benchmarks.load --base-url http://localhost:8000 --output results.json --baseline baseline.json
+    python -m benchmarks.load --in-process --save-baseline baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from httpx import ASGITransport, AsyncClient
+
+from src.config import settings
+
+PAGE_SIZE = 100
+SAMPLE_PAGES = 10
+SUCCESS_STATUSES = {200, 201, 204, 304}
+
+
+@dataclass
+class Workload:
+    """Values the request parameters are sampled from."""
+
+    activity_ids: list[int] = field(default_factory=list)
+    activity_names: list[str] = field(default_factory=list)
+    buildings: list[dict[str, Any]] = field(default_factory=list)
+    organizations: list[dict[str, Any]] = field(default_factory=list)
+    created_organization_ids: list[int] = field(default_factory=list)
+
+    def take_created_organization_id(self) -> int:
+        """Get a created organization to delete, so that it is not deleted twice."""
+        return self.created_organization_ids.pop()
+
+
+# (method, path, query parameters, JSON body)
+Request = tuple[str, str, dict[str, Any] | None, Any]
+
+
+def organization_body(rng: random.Random, workload: Workload) -> dict[str, Any]:
+    return {
+        "name": f"Benchmark Organization {rng.randrange(10**9)}",
+        "phones": "+7-900-000-00-00",
+        "building_id": rng.choice(workload.buildings)["id"],
+    }
+
+
+def around(rng: random.Random, building: dict[str, Any]) -> dict[str, float]:
+    return {
+        "latitude": building["latitude"] + rng.uniform(-0.01, 0.01),
+        "longitude": building["longitude"] + rng.uniform(-0.01, 0.01),
+        "radius_km": rng.choice([0.5, 1.0, 5.0]),
+    }
+
+
+def nearest_to(rng: random.Random, building: dict[str, Any]) -> dict[str, Any]:
+    location = {key: value for key, value in around(rng, building).items() if key != "radius_km"}
+    return location | {"limit": rng.choice([1, 10, 50])}
+
+
+def pick(rng: random.Random, items: list[dict[str, Any]], key: str = "id") -> Any:
+    return rng.choice(items)[key]
+
+
+def name_word(rng: random.Random, workload: Workload) -> str:
+    return rng.choice(workload.organizations)["name"].split()[rng.randrange(2)]
+
+
+def name_prefix(rng: random.Random, workload: Workload) -> str:
+    return name_word(rng, workload)[: rng.randint(1, 4)]
+
+
+# Every scenario builds the next request of an endpoint; write scenarios run last, in this order, so that
+# updates and deletes find the organizations created before them.
+SCENARIOS: dict[str, Callable[[random.Random, Workload], Request]] = {
+    "activities": lambda rng, w: ("GET", "/activities", None, None),
+    "activity_by_id": lambda rng, w: ("GET", f"/activities/{rng.choice(w.activity_ids)}", None, None),
+    "buildings": lambda rng, w: (
+        "GET",
+        "/buildings",
+        {"after_id": pick(rng, w.buildings), "limit": PAGE_SIZE},
+        None,
+    ),
+    "building_by_id": lambda rng, w: ("GET", f"/buildings/{pick(rng, w.buildings)}", None, None),
+    "buildings_by_radius": lambda rng, w: (
+        "GET",
+        "/buildings/buildings_by_radius",
+        around(rng, rng.choice(w.buildings)) | {"limit": PAGE_SIZE},
+        None,
+    ),
+    "organizations": lambda rng, w: (
+        "GET",
+        "/organizations",
+        {"after_id": pick(rng, w.organizations), "limit": PAGE_SIZE},
+        None,
+    ),
+    "organization_by_id": lambda rng, w: ("GET", f"/organizations/{pick(rng, w.organizations)}", None, None),
+    "organizations_by_building": lambda rng, w: (
+        "GET",
+        f"/organizations/by_building/{pick(rng, w.organizations, 'building_id')}",
+        None,
+        None,
+    ),
+    "organizations_by_name": lambda rng, w: (
+        "GET",
+        "/organizations/by_name",
+        {"organization_name": pick(rng, w.organizations, "name"), "limit": PAGE_SIZE},
+        None,
+    ),
+    "organizations_by_name_ranked": lambda rng, w: (
+        "GET",
+        "/organizations/by_name",
+        {"organization_name": name_word(rng, w), "mode": "ranked"},
+        None,
+    ),
+    "organizations_by_name_prefix": lambda rng, w: (
+        "GET",
+        "/organizations/by_name",
+        {"organization_name": name_prefix(rng, w), "mode": "prefix"},
+        None,
+    ),
+    "organizations_by_activity": lambda rng, w: (
+        "GET",
+        "/organizations/by_activity",
+        {"activity_name": rng.choice(w.activity_names)},
+        None,
+    ),
+    "organizations_by_activity_tree": lambda rng, w: (
+        "GET",
+        "/organizations/by_activity_tree",
+        {"activity_name": rng.choice(w.activity_names)},
+        None,
+    ),
+    "organizations_by_radius": lambda rng, w: (
+        "GET",
+        "/organizations/by_radius",
+        around(rng, rng.choice(w.buildings)) | {"limit": PAGE_SIZE},
+        None,
+    ),
+    "organizations_nearest": lambda rng, w: (
+        "GET",
+        "/organizations/nearest",
+        nearest_to(rng, rng.choice(w.buildings)),
+        None,
+    ),
+    "organizations_search": lambda rng, w: (
+        "GET",
+        "/organizations/search",
+        around(rng, rng.choice(w.buildings))
+        | {"name": name_word(rng, w), "activity_name": rng.choice(w.activity_names), "facets": True},
+        None,
+    ),
+    "create_organization": lambda rng, w: (
+        "POST",
+        "/organizations",
+        None,
+        {"organization": organization_body(rng, w), "activities": [rng.choice(w.activity_names)]},
+    ),
+    "update_organization": lambda rng, w: (
+        "PUT",
+        f"/organizations/{rng.choice(w.created_organization_ids)}",
+        None,
+        organization_body(rng, w),
+    ),
+    "delete_organization": lambda rng, w: ("DELETE", f"/organizations/{w.take_created_organization_id()}", None, None),
+}
+WRITE_SCENARIOS = ["create_organization", "update_organization", "delete_organization"]
+
+
+async def get_json(client: AsyncClient, path: str, **params: Any) -> Any:
+    response = await client.get(path, params={name: value for name, value in params.items() if value})
+    response.raise_for_status()
+    return response.json()
+
+
+async def sample_pages(client: AsyncClient, path: str, key: str, rng: random.Random) -> list[dict[str, Any]]:
+    """Get a few pages of the list at random positions, found by doubling the ID until a page is empty."""
+    max_id = 1
+    while (await get_json(client, path, after_id=max_id, limit=1))[key]:
+        max_id *= 2
+    rows = []
+    for after_id in [0] + [rng.randrange(max_id) for _ in range(SAMPLE_PAGES - 1)]:
+        rows.extend((await get_json(client, path, after_id=after_id, limit=PAGE_SIZE))[key])
+    if not rows:
+        raise SystemExit(f"{path} returned no rows, seed the catalog with `python -m benchmarks.seed`")
+    return list({row["id"]: row for row in rows}.values())
+
+
+async def discover(client: AsyncClient, rng: random.Random) -> Workload:
+    activities = (await get_json(client, "/activities"))["activities"]
+    return Workload(
+        activity_ids=[activity["id"] for activity in activities],
+        activity_names=[activity["name"] for activity in activities],
+        buildings=await sample_pages(client, "/buildings", "buildings", rng),
+        organizations=await sample_pages(client, "/organizations", "organizations", rng),
+    )
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    index = min(int(len(sorted_values) * percent / 100), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+async def run_scenario(
+    client: AsyncClient, name: str, workload: Workload, rng: random.Random, requests: int, concurrency: int
+) -> dict[str, Any]:
+    scenario = SCENARIOS[name]
+    latencies: list[float] = []
+    errors = skipped = 0
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors, skipped
+        for _ in remaining:
+            if name in WRITE_SCENARIOS[1:] and not workload.created_organization_ids:
+                # Every organization created by the run was already deleted, there is nothing to change.
+                skipped += 1
+                continue
+            method, path, params, body = scenario(rng, workload)
+            started_at = time.perf_counter()
+            response = await client.request(method, path, params=params, json=body)
+            latencies.append(time.perf_counter() - started_at)
+            if response.status_code not in SUCCESS_STATUSES:
+                errors += 1
+            elif name == "create_organization":
+                workload.created_organization_ids.append(response.json()["id"])
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+    if not latencies:
+        return {"requests": 0, "errors": errors, "skipped": skipped}
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "skipped": skipped,
+        "throughput_rps": len(latencies) / elapsed,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        **{f"p{percent}_ms": percentile(latencies, percent) * 1000 for percent in (50, 90, 95, 99)},
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+def find_regressions(results: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Compare the p95 latency, throughput and errors of every endpoint with the baseline run."""
+    regressions = []
+    for name, expected in baseline["endpoints"].items():
+        actual = results["endpoints"].get(name)
+        if not actual or not actual["requests"] or not expected["requests"]:
+            continue
+        if actual["p95_ms"] > expected["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {actual['p95_ms']:.1f} ms, baseline {expected['p95_ms']:.1f} ms")
+        if actual["throughput_rps"] < expected["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {actual['throughput_rps']:.0f} rps, "
+                f"baseline {expected['throughput_rps']:.0f} rps"
+            )
+        if actual["errors"] > expected["errors"]:
+            regressions.append(f"{name}: {actual['errors']} errors, baseline {expected['errors']}")
+    return regressions
+
+
+def create_client(args: argparse.Namespace) -> AsyncClient:
+    headers = {"api-key": args.api_key}
+    if args.in_process:
+        from src.main import app
+
+        transport = ASGITransport(app=app)
+        return AsyncClient(transport=transport, base_url=f"http://benchmark{settings.API_V1_STR}", headers=headers)
+    return AsyncClient(base_url=f"{args.base_url}{settings.API_V1_STR}", headers=headers, timeout=args.timeout)
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    rng = random.Random(args.seed)
+    selected = args.endpoints or [name for name in SCENARIOS if args.writes or name not in WRITE_SCENARIOS]
+    names = [name for name in SCENARIOS if name in selected]
+    async with create_client(args) as client:
+        if args.in_process:
+            from src.main import app
+
+            lifespan = app.router.lifespan_context(app)
+            await lifespan.__aenter__()
+        try:
+            workload = await discover(client, rng)
+            endpoints = {}
+            for name in names:
+                await run_scenario(client, name, workload, rng, requests=args.warmup, concurrency=args.concurrency)
+                endpoints[name] = await run_scenario(
+                    client, name, workload, rng, requests=args.requests, concurrency=args.concurrency
+                )
+                sys.stderr.write(f"{name}: {json.dumps(endpoints[name])}\n")
+        finally:
+            if args.in_process:
+                await lifespan.__aexit__(None, None, None)
+    return {"concurrency": args.concurrency, "requests": args.requests, "endpoints": endpoints}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="Serve the API in this process, no server needed.")
+    parser.add_argument("--api-key", default=settings.API_KEY)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per endpoint.")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests per endpoint.")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the random generator.")
+    parser.add_argument("--endpoints", nargs="+", choices=list(SCENARIOS), help="Endpoints to measure, all by default.")
+    parser.add_argument("--writes", action="store_true", help="Also create, update and delete organizations.")
+    parser.add_argument("--output", type=Path, help="File to write the results to, stdout by default.")
+    parser.add_argument("--baseline", type=Path, help="Results of an earlier run to compare against.")
+    parser.add_argument("--save-baseline", type=Path, help="File to store the results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown, 0.2 is 20%%.")
+    args = parser.parse_args()
+    if args.endpoints and set(WRITE_SCENARIOS[1:]) & set(args.endpoints) and WRITE_SCENARIOS[0] not in args.endpoints:
+        parser.error("update_organization and delete_organization need create_organization to run first")
+
+    results = asyncio.run(run(args))
+    if args.baseline:
+        results["regressions"] = find_regressions(results, json.loads(args.baseline.read_text()), args.tolerance)
+    report = json.dumps(results, indent=2) + "\n"
+    if args.output:
+        args.output.write_text(report)
+    else:
+        sys.stdout.write(report)
+    if args.save_baseline:
+        args.save_baseline.write_text(report)
+    if results.get("regressions"):
+        sys.stderr.write("Regressions:\n" + "".join(f"  {regression}\n" for regression in results["regressions"]))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
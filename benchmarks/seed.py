@@ -0,0 +1,232 @@
+"""Seed a synthetic catalog for the load benchmarks.
+
+Activities form three-level trees under a dozen root activities, buildings are spread around a few cities
+with a normal distribution and every organization is linked to one to three activities. Rows are written
+with COPY in batches through the repositories used by the bulk import, so 10 million organizations fit
+in memory and are loaded in minutes.
+
+Usage:
+    python -m benchmarks.seed --scale 1m --reset
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Iterator
+
+from sqlalchemy import text
+
+from src.config import settings
+from src.core.cache import response_cache
+from src.core.models import Activity, ActivityClosure, Building, Organization, OrganizationActivity
+from src.core.uow import UnitOfWork
+from src.utils import get_logger
+from src.utils.geo import KM_PER_DEGREE
+
+logger = get_logger(__file__, log_level=logging.INFO)
+
+SCALES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+ROOT_ACTIVITIES = [
+    "Food",
+    "Retail",
+    "Logistics",
+    "IT",
+    "Consulting",
+    "Education",
+    "Healthcare",
+    "Construction",
+    "Finance",
+    "Tourism",
+    "Manufacturing",
+    "Entertainment",
+]
+# (name, latitude, longitude, share of the buildings)
+CITIES = [
+    ("Moscow", 55.7558, 37.6173, 0.35),
+    ("Saint Petersburg", 59.9343, 30.3351, 0.2),
+    ("Novosibirsk", 55.0084, 82.9357, 0.1),
+    ("Yekaterinburg", 56.8389, 60.6057, 0.1),
+    ("Kazan", 55.7961, 49.1064, 0.1),
+    ("Vladivostok", 43.1155, 131.8855, 0.05),
+    ("Kaliningrad", 54.7104, 20.4522, 0.05),
+    ("Murmansk", 68.9585, 33.0827, 0.05),
+]
+CITY_SPREAD_KM = 15.0
+NAME_ADJECTIVES = ["Golden", "Northern", "Green", "Rapid", "Bright", "Central", "United", "First", "Smart", "Royal"]
+NAME_NOUNS = ["Market", "Bakery", "Systems", "Logistics", "Studio", "Clinic", "Academy", "Partners", "Works", "Lab"]
+
+
+def build_activities(children: int, grandchildren: int) -> list[tuple[int, str, int | None]]:
+    """Get (ID, name, parent ID) of the activity trees, parents before their children."""
+    activities = []
+    for root_name in ROOT_ACTIVITIES:
+        root_id = len(activities) + 1
+        activities.append((root_id, root_name, None))
+        for child in range(1, children + 1):
+            child_id = len(activities) + 1
+            activities.append((child_id, f"{root_name} {child}", root_id))
+            for grandchild in range(1, grandchildren + 1):
+                activities.append((len(activities) + 1, f"{root_name} {child}.{grandchild}", child_id))
+    return activities
+
+
+def build_closure(activities: list[tuple[int, str, int | None]]) -> list[tuple[int, int, int]]:
+    """Get the (ancestor ID, descendant ID, depth) records of the activity trees."""
+    parents = {activity_id: parent_id for activity_id, _, parent_id in activities}
+    records = []
+    for activity_id in parents:
+        ancestor_id, depth = activity_id, 0
+        while ancestor_id:
+            records.append((ancestor_id, activity_id, depth))
+            ancestor_id, depth = parents[ancestor_id], depth + 1
+    return records
+
+
+def generate_buildings(rng: random.Random, count: int) -> Iterator[tuple[str, float, float]]:
+    weights = [share for *_, share in CITIES]
+    for number in range(1, count + 1):
+        city, latitude, longitude, _ = rng.choices(CITIES, weights=weights)[0]
+        spread = CITY_SPREAD_KM / KM_PER_DEGREE
+        yield (
+            f"{city}, {rng.randint(1, 500)} Street {number % 997}, {number}",
+            min(max(rng.gauss(latitude, spread), -90.0), 90.0),
+            min(max(rng.gauss(longitude, spread * 2), -180.0), 180.0),
+        )
+
+
+def generate_organizations(
+    rng: random.Random, count: int, building_ids: range, activity_ids: list[int]
+) -> Iterator[tuple[str, str, int, list[int]]]:
+    for number in range(1, count + 1):
+        yield (
+            f"{rng.choice(NAME_ADJECTIVES)} {rng.choice(NAME_NOUNS)} {number}",
+            f"+7-9{rng.randint(0, 99):02}-{rng.randint(0, 999):03}-{rng.randint(0, 99):02}-{rng.randint(0, 99):02}",
+            rng.randint(building_ids.start, building_ids.stop - 1),
+            rng.sample(activity_ids, k=rng.randint(1, 3)),
+        )
+
+
+def batched(rows: Iterator, size: int) -> Iterator[list]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def is_empty() -> bool:
+    uow = UnitOfWork()
+    async with uow.transaction():
+        return not await uow.organizations.get_by_query_all(projection=["id"], limit=1)
+
+
+async def reset() -> None:
+    tables = [OrganizationActivity, Organization, ActivityClosure, Activity, Building]
+    uow = UnitOfWork()
+    async with uow.transaction():
+        names = ", ".join(table.__tablename__ for table in tables)
+        await uow.session.execute(text(f"TRUNCATE {names} RESTART IDENTITY CASCADE"))
+
+
+async def seed_activities(children: int, grandchildren: int) -> list[int]:
+    activities = build_activities(children=children, grandchildren=grandchildren)
+    uow = UnitOfWork()
+    async with uow.transaction():
+        ids = await uow.activities.reserve_ids(count=len(activities))
+        ids_by_number = dict(zip(range(1, len(activities) + 1), ids))
+        records = [(ids_by_number[number], name, ids_by_number.get(parent)) for number, name, parent in activities]
+        closure = [
+            (ids_by_number[ancestor], ids_by_number[descendant], depth)
+            for ancestor, descendant, depth in build_closure(activities)
+        ]
+        await uow.activities.copy_records(columns=("id", "name", "parent_id"), records=records)
+        await uow.activities.copy_hierarchy_records(records=closure)
+        await uow.versions.bump_version(name="activities")
+    logger.info(f"Seeded {len(records)} activities")
+    return ids
+
+
+async def seed_buildings(rng: random.Random, count: int, batch_size: int) -> range:
+    first_id = last_id = None
+    for batch in batched(generate_buildings(rng, count), batch_size):
+        uow = UnitOfWork()
+        async with uow.transaction():
+            ids = await uow.buildings.reserve_ids(count=len(batch))
+            records = [(building_id, *building) for building_id, building in zip(ids, batch)]
+            await uow.buildings.copy_records(columns=("id", "address", "latitude", "longitude"), records=records)
+            if settings.BUILDING_INDEX_ENABLED:
+                await uow.versions.bump_version(name="buildings")
+        first_id = ids[0] if first_id is None else first_id
+        last_id = ids[-1]
+        logger.info(f"Seeded {last_id - first_id + 1} of {count} buildings")
+    return range(first_id, last_id + 1)
+
+
+async def seed_organizations(
+    rng: random.Random, count: int, building_ids: range, activity_ids: list[int], batch_size: int
+) -> None:
+    seeded = 0
+    for batch in batched(generate_organizations(rng, count, building_ids, activity_ids), batch_size):
+        uow = UnitOfWork()
+        async with uow.transaction():
+            ids = await uow.organizations.reserve_ids(count=len(batch))
+            records, links = [], []
+            for organization_id, (name, phones, building_id, organization_activity_ids) in zip(ids, batch):
+                records.append((organization_id, name, phones, building_id))
+                links.extend((organization_id, activity_id) for activity_id in organization_activity_ids)
+            await uow.organizations.copy_records(columns=("id", "name", "phones", "building_id"), records=records)
+            await uow.organizations.copy_activity_links(records=links)
+        seeded += len(batch)
+        logger.info(f"Seeded {seeded} of {count} organizations")
+
+
+async def analyze() -> None:
+    uow = UnitOfWork()
+    async with uow.transaction():
+        for table in (Activity, ActivityClosure, Building, Organization, OrganizationActivity):
+            await uow.session.execute(text(f"ANALYZE {table.__tablename__}"))
+
+
+async def run(args: argparse.Namespace) -> None:
+    organizations = args.organizations or SCALES[args.scale]
+    buildings = args.buildings or max(organizations // 4, 1)
+    rng = random.Random(args.seed)
+    started_at = time.perf_counter()
+
+    if args.reset:
+        await reset()
+    elif not await is_empty():
+        raise SystemExit("The catalog is not empty, pass --reset to replace it")
+
+    activity_ids = await seed_activities(children=args.children, grandchildren=args.grandchildren)
+    building_ids = await seed_buildings(rng, count=buildings, batch_size=args.batch_size)
+    await seed_organizations(
+        rng, count=organizations, building_ids=building_ids, activity_ids=activity_ids, batch_size=args.batch_size
+    )
+    await analyze()
+    await response_cache.invalidate("activities", "buildings", "organizations")
+    await response_cache.close()
+    logger.info(f"Catalog seeded in {time.perf_counter() - started_at:.1f} s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=list(SCALES), default="10k", help="Number of organizations.")
+    parser.add_argument("--organizations", type=int, help="Number of organizations, overrides --scale.")
+    parser.add_argument("--buildings", type=int, help="Number of buildings, a quarter of the organizations by default.")
+    parser.add_argument("--children", type=int, default=6, help="Sub-activities of every root activity.")
+    parser.add_argument("--grandchildren", type=int, default=4, help="Sub-activities of every second level activity.")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the random generator.")
+    parser.add_argument("--reset", action="store_true", help="Truncate the catalog tables before seeding.")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
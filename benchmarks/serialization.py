@@ -0,0 +1,82 @@
+"""Compare the ORM -> Pydantic -> response_model path of the list endpoints with the plain rows + orjson path.
+
+The database is not involved: both endpoints return the same buildings prepared in memory, so the difference
+is the per-object work done by the application.
+
+Usage:
+    python -m benchmarks.serialization --rows 10000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from httpx import ASGITransport, AsyncClient
+
+from src.core.models import Building
+from src.core.schemas import Building as BuildingSchema
+from src.core.schemas import BuildingList
+
+
+def build_app(rows: int) -> FastAPI:
+    buildings = [
+        Building(
+            id=building_id,
+            address=f"Street {building_id}",
+            latitude=random.uniform(-90, 90),
+            longitude=random.uniform(-180, 180),
+        )
+        for building_id in range(1, rows + 1)
+    ]
+    columns = list(BuildingSchema.model_fields)
+    records = [tuple(getattr(building, column) for column in columns) for building in buildings]
+    app = FastAPI()
+
+    @app.get("/pydantic", response_model=BuildingList)
+    async def pydantic_path() -> BuildingList:
+        return BuildingList(buildings=[building.to_pydantic_schema() for building in buildings])
+
+    @app.get("/rows", response_model=BuildingList)
+    async def rows_path() -> ORJSONResponse:
+        return ORJSONResponse({"buildings": [dict(zip(columns, record)) for record in records]})
+
+    return app
+
+
+async def measure(client: AsyncClient, path: str, repeat: int) -> dict[str, float]:
+    durations = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        response = await client.get(path)
+        durations.append(time.perf_counter() - started_at)
+        response.raise_for_status()
+    return {"median_ms": statistics.median(durations) * 1000, "min_ms": min(durations) * 1000}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = build_app(rows=args.rows)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://benchmark") as client:
+        pydantic_response, rows_response = await client.get("/pydantic"), await client.get("/rows")
+        assert pydantic_response.json() == rows_response.json(), "Both paths must return the same document"
+        result = {
+            "rows": args.rows,
+            "pydantic": await measure(client, "/pydantic", args.repeat),
+            "rows_orjson": await measure(client, "/rows", args.repeat),
+        }
+    result["speedup"] = result["pydantic"]["median_ms"] / result["rows_orjson"]["median_ms"]
+    sys.stdout.write(json.dumps(result, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+"""Compare the radius search of buildings served by the in-process grid index and by PostgreSQL.
+
+By default the buildings are generated like `python -m benchmarks.seed` does and only the grid index is
+measured, no database needed; `load_seconds` is then the time to build the grid. With `--database` the
+index is loaded from the database, e.g. one seeded with
+`python -m benchmarks.seed --scale 10m --buildings 1000000 --reset`, the same searches are run by both
+and the returned buildings are checked to be the same.
+
+Usage:
+    python -m benchmarks.spatial --buildings 1000000 --repeat 2000
+    python -m benchmarks.spatial --database --repeat 500
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from benchmarks.load import percentile
+from benchmarks.seed import generate_buildings
+from src.config import settings
+from src.core.cache.buildings import BuildingGrid
+from src.core.schemas import Building
+from src.core.uow import UnitOfWork
+
+RADII_KM = [0.5, 1.0, 5.0]
+LIMIT = 100
+
+
+def summarize(durations: list[float]) -> dict[str, float]:
+    durations = sorted(durations)
+    return {
+        "mean_us": round(statistics.fmean(durations) * 1e6, 1),
+        "p50_us": round(percentile(durations, 50) * 1e6, 1),
+        "p95_us": round(percentile(durations, 95) * 1e6, 1),
+        "p99_us": round(percentile(durations, 99) * 1e6, 1),
+    }
+
+
+def sample_searches(rng: random.Random, grid: BuildingGrid, count: int) -> list[tuple[float, float, float]]:
+    """Get (latitude, longitude, radius) searches centered around random buildings."""
+    positions = [rng.randrange(len(grid.ids)) for _ in range(count)]
+    return [
+        (
+            float(grid.latitudes[position]) + rng.uniform(-0.01, 0.01),
+            float(grid.longitudes[position]) + rng.uniform(-0.01, 0.01),
+            rng.choice(RADII_KM),
+        )
+        for position in positions
+    ]
+
+
+async def measure(
+    searches: list[tuple[float, float, float]], search: Callable[..., Awaitable[list[Any]]]
+) -> tuple[dict[str, float], list[list[int]]]:
+    durations, found = [], []
+    for latitude, longitude, radius_km in searches:
+        started_at = time.perf_counter()
+        buildings = await search(latitude=latitude, longitude=longitude, radius_km=radius_km, limit=LIMIT)
+        durations.append(time.perf_counter() - started_at)
+        found.append([building["id"] for building in buildings])
+    return summarize(durations) | {"mean_found": round(statistics.fmean(map(len, found)), 1)}, found
+
+
+async def load_grid_from_database() -> BuildingGrid:
+    uow = UnitOfWork()
+    async with uow.transaction(read_only=True):
+        version = await uow.versions.get_version(name="buildings")
+        locations = await uow.buildings.get_locations()
+    return BuildingGrid.build(version=version, cell_degrees=settings.BUILDING_INDEX_CELL_DEGREES, locations=locations)
+
+
+async def search_database(latitude: float, longitude: float, radius_km: float, limit: int) -> list[Any]:
+    uow = UnitOfWork()
+    async with uow.transaction(read_only=True):
+        return await uow.buildings.get_buildings_by_radius(
+            latitude=latitude, longitude=longitude, radius_km=radius_km, limit=limit, projection=Building
+        )
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    rng = random.Random(args.seed)
+    if args.database:
+        started_at = time.perf_counter()
+        grid = await load_grid_from_database()
+    else:
+        locations = [(number, *building) for number, building in enumerate(generate_buildings(rng, args.buildings), 1)]
+        started_at = time.perf_counter()
+        grid = BuildingGrid.build(version=0, cell_degrees=settings.BUILDING_INDEX_CELL_DEGREES, locations=locations)
+    load_seconds = time.perf_counter() - started_at
+    if not len(grid.ids):
+        raise SystemExit("There are no buildings to search")
+
+    array_bytes = sum(array.nbytes for array in (grid.keys, grid.ids, grid.latitudes, grid.longitudes))
+    results: dict[str, Any] = {
+        "buildings": len(grid.ids),
+        "cell_degrees": grid.cell_degrees,
+        "searches": args.repeat,
+        "index": {"load_seconds": round(load_seconds, 3), "array_megabytes": round(array_bytes / 2**20, 1)},
+    }
+
+    async def search_index(**kwargs: Any) -> list[dict[str, Any]]:
+        return grid.get_by_radius(**kwargs)
+
+    await measure(sample_searches(rng, grid, args.warmup), search_index)
+    searches = sample_searches(rng, grid, args.repeat)
+    index_timings, index_found = await measure(searches, search_index)
+    results["index"] |= index_timings
+    if args.database:
+        await measure(searches[: args.warmup], search_database)
+        database_timings, database_found = await measure(searches, search_database)
+        results["database"] = database_timings
+        results["mismatches"] = sum(found != expected for found, expected in zip(index_found, database_found))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--buildings", type=int, default=1_000_000, help="Number of generated buildings.")
+    parser.add_argument("--database", action="store_true", help="Load the buildings from the database and compare.")
+    parser.add_argument("--repeat", type=int, default=2000, help="Number of measured searches.")
+    parser.add_argument("--warmup", type=int, default=100, help="Number of unmeasured searches.")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the random generator.")
+    args = parser.parse_args()
+    results = asyncio.run(run(args))
+    sys.stdout.write(json.dumps(results, indent=2) + "\n")
+    if results.get("mismatches"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Measure the time from launching the production server until it serves requests.
+
+The server is started with `python -m src.server` on a free port, `/health` is polled until it answers,
+then the startup phases reported by the worker in `catalog_startup_phase_seconds` are read from `/metrics`
+and the server is stopped. The process exits with status 1 when the median time to ready exceeds the budget.
+
+Several workers need a shared cache or none, see `src.server`.
+
+Usage:
+    CACHE_BACKEND=redis python -m benchmarks.startup --workers 4 --repeat 5 --budget 3
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+POLL_INTERVAL = 0.01
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_startup_phases(client: httpx.Client) -> dict[str, float]:
+    for family in text_string_to_metric_families(client.get("/metrics/").text):
+        if family.name == "catalog_startup_phase_seconds":
+            return {sample.labels["phase"]: round(sample.value, 4) for sample in family.samples}
+    return {}
+
+
+def measure_startup(args: argparse.Namespace) -> dict[str, Any]:
+    port = get_free_port()
+    env = {
+        **os.environ,
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_PORT": str(port),
+        "SERVER_WORKERS": str(args.workers),
+        "SERVER_ACCESS_LOG": "false",
+    }
+    started_at = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "src.server"], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as client:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"The server exited with status {server.returncode}:\n{server.stderr.read()}")
+                if time.perf_counter() - started_at > args.timeout:
+                    raise TimeoutError(f"The server was not ready within {args.timeout} s")
+                try:
+                    if client.get("/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                time.sleep(POLL_INTERVAL)
+            ready = time.perf_counter() - started_at
+            return {"ready_seconds": round(ready, 4), "phases": get_startup_phases(client)}
+    finally:
+        server.send_signal(signal.SIGINT)
+        try:
+            server.wait(timeout=args.timeout)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=1, help="SERVER_WORKERS of the launched server.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of launches to measure.")
+    parser.add_argument("--budget", type=float, default=5.0, help="Allowed median seconds to ready.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for a launch to get ready.")
+    parser.add_argument("--output", type=Path, help="File to write the results to, stdout by default.")
+    args = parser.parse_args()
+
+    runs = [measure_startup(args) for _ in range(args.repeat)]
+    ready = sorted(run["ready_seconds"] for run in runs)
+    results = {
+        "workers": args.workers,
+        "budget_seconds": args.budget,
+        "median_ready_seconds": round(statistics.median(ready), 4),
+        "max_ready_seconds": ready[-1],
+        "runs": runs,
+    }
+    report = json.dumps(results, indent=2) + "\n"
+    if args.output:
+        args.output.write_text(report)
+    else:
+        sys.stdout.write(report)
+    if results["median_ready_seconds"] > args.budget:
+        sys.stderr.write(f"Startup took {results['median_ready_seconds']} s, the budget is {args.budget} s\n")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
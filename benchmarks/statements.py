@@ -0,0 +1,141 @@
+"""Measure the per-call Python overhead of the hot repository queries.
+
+The statements rebuilt on every call are compared against the statements built once with bound parameters.
+
+Every execution generates the cache key of the statement to look up its compiled form, so each call is
+measured as getting the statement plus generating its cache key. The database is not involved.
+
+Usage:
+    python -m benchmarks.statements --repeat 2000
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections.abc import Callable
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import joinedload
+
+from src.core.models import Activity, ActivityClosure, Building, Organization, OrganizationActivity
+from src.core.repository.buildings import buildings_by_radius_statement, haversine_distance, radius_parameters
+from src.core.repository.organizations import (
+    ORGANIZATION_WITH_ACTIVITIES_AND_ADDRESS,
+    contains_pattern,
+    organizations_by_activity_tree_statement,
+    organizations_by_name_statement,
+    organizations_by_radius_statement,
+)
+from src.core.repository.repository import projection_columns
+from src.core.schemas import Building as BuildingSchema
+from src.core.schemas import Organization as OrganizationSchema
+
+LATITUDE, LONGITUDE, RADIUS_KM, LIMIT = 55.75, 37.62, 5.0, 100
+
+
+def rebuilt_radius_filters() -> list:
+    parameters = radius_parameters(latitude=LATITUDE, longitude=LONGITUDE, radius_km=RADIUS_KM)
+    return [
+        Building.latitude.between(parameters["min_latitude"], parameters["max_latitude"]),
+        Building.longitude.between(parameters["min_longitude"], parameters["max_longitude"]),
+        haversine_distance(latitude=LATITUDE, longitude=LONGITUDE) <= RADIUS_KM,
+    ]
+
+
+def rebuilt_buildings_by_radius() -> Select:
+    columns = (Building.__table__.c[name] for name in BuildingSchema.model_fields)
+    return (
+        select(*columns)
+        .where(*rebuilt_radius_filters())
+        .order_by(haversine_distance(latitude=LATITUDE, longitude=LONGITUDE), Building.id)
+        .limit(LIMIT)
+    )
+
+
+def rebuilt_organizations_by_radius() -> Select:
+    columns = (Organization.__table__.c[name] for name in OrganizationSchema.model_fields)
+    return (
+        select(*columns)
+        .join(Building, Organization.building_id == Building.id)
+        .where(*rebuilt_radius_filters())
+        .order_by(Organization.id)
+        .limit(LIMIT)
+    )
+
+
+def rebuilt_organizations_by_activity_tree() -> Select:
+    activity_tree = (
+        select(ActivityClosure.descendant_id)
+        .join(Activity, Activity.id == ActivityClosure.ancestor_id)
+        .where(Activity.name == "Food")
+    )
+    organization_ids = select(OrganizationActivity.organization_id).where(
+        OrganizationActivity.activity_id.in_(activity_tree)
+    )
+    columns = (Organization.__table__.c[name] for name in OrganizationSchema.model_fields)
+    return select(*columns).where(Organization.id.in_(organization_ids))
+
+
+def rebuilt_organizations_by_name() -> Select:
+    columns = (Organization.__table__.c[name] for name in OrganizationSchema.model_fields)
+    return select(*columns).where(Organization.name.ilike(contains_pattern("market"), escape="\\")).limit(LIMIT)
+
+
+def rebuilt_organization_detail() -> Select:
+    return (
+        select(Organization)
+        .options(joinedload(Organization.activities), joinedload(Organization.building))
+        .where(Organization.id == 1)
+    )
+
+
+QUERIES: dict[str, tuple[Callable[[], Select], Callable[[], Select]]] = {
+    "buildings_by_radius": (
+        rebuilt_buildings_by_radius,
+        lambda: buildings_by_radius_statement(projection_columns(BuildingSchema)),
+    ),
+    "organizations_by_radius": (
+        rebuilt_organizations_by_radius,
+        lambda: organizations_by_radius_statement(projection_columns(OrganizationSchema), False, False),
+    ),
+    "organizations_by_activity_tree": (
+        rebuilt_organizations_by_activity_tree,
+        lambda: organizations_by_activity_tree_statement(projection_columns(OrganizationSchema)),
+    ),
+    "organizations_by_name": (
+        rebuilt_organizations_by_name,
+        lambda: organizations_by_name_statement(projection_columns(OrganizationSchema)),
+    ),
+    "organization_detail": (rebuilt_organization_detail, lambda: ORGANIZATION_WITH_ACTIVITIES_AND_ADDRESS),
+}
+
+
+def measure(get_statement: Callable[[], Select], repeat: int) -> dict[str, float]:
+    durations = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        get_statement()._generate_cache_key()
+        durations.append(time.perf_counter() - started_at)
+    return {"median_us": statistics.median(durations) * 1e6, "min_us": min(durations) * 1e6}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    result = {}
+    for name, (rebuilt, prebuilt) in QUERIES.items():
+        rebuilt_timings, prebuilt_timings = measure(rebuilt, args.repeat), measure(prebuilt, args.repeat)
+        result[name] = {
+            "rebuilt": rebuilt_timings,
+            "prebuilt": prebuilt_timings,
+            "speedup": rebuilt_timings["median_us"] / prebuilt_timings["median_us"],
+        }
+    sys.stdout.write(json.dumps(result, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends
 
-from src.api.api_v1.endpoints import activities_router, buildings_router, organizations_router
+from src.api.api_v1.endpoints import activities_router, buildings_router, imports_router, organizations_router
+from src.api.instrumentation import apply_query_budget
 from src.config.security import get_api_key
 
-api_router = APIRouter(dependencies=[Depends(get_api_key)])
+api_router = APIRouter(dependencies=[Depends(get_api_key), Depends(apply_query_budget)])
 
 api_router.include_router(activities_router, prefix="/activities", tags=["activities"])
 api_router.include_router(buildings_router, prefix="/buildings", tags=["buildings"])
+api_router.include_router(imports_router, prefix="/imports", tags=["imports"])
 api_router.include_router(organizations_router, prefix="/organizations", tags=["organizations"])
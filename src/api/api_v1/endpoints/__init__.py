@@ -1,3 +1,4 @@
 from .activities import router as activities_router
 from .buildings import router as buildings_router
+from .imports import router as imports_router
 from .organizations import router as organizations_router
@@ -1,20 +1,91 @@
-from fastapi import APIRouter, Depends
+from typing import List
+
+from fastapi import APIRouter, Body, Depends, Query, Request, Response
 from pydantic import PositiveInt
 
-from src.core.schemas import Activity, ActivityCreate, ActivityList, ActivityUpdate
+from src.api.responses import conditional_json_response, get_etag, not_modified_response
+from src.config import settings
+from src.core.schemas import (
+    Activity,
+    ActivityBatchUpdate,
+    ActivityCreate,
+    ActivityList,
+    ActivityUpdate,
+    BatchResult,
+)
 from src.core.service.activities import ActivitiesService
 
 router = APIRouter()
 
 
 @router.get("", status_code=200, response_model=ActivityList)
-async def get_all_activities(activities_service: ActivitiesService = Depends(ActivitiesService)) -> ActivityList:
+async def get_all_activities(
+    request: Request,
+    after_id: PositiveInt | None = Query(None),
+    limit: PositiveInt | None = Query(None),
+    activities_service: ActivitiesService = Depends(ActivitiesService),
+) -> Response:
+    """
+    Retrieve a list of all activities ordered by ID.
+
+    Responds with 304 Not Modified when the If-None-Match header matches the current ETag.
+
+    :param request: The request with the conditional headers.
+    :param after_id: Return only activities with ID greater than this one (keyset pagination).
+    :param limit: Maximum number of activities to return.
+    :param activities_service: Service for handling activity-related operations.
+    """
+    version = await activities_service.get_all_activities_version(after_id=after_id, limit=limit)
+    etag = get_etag(request, version)
+    if response := not_modified_response(request, etag):
+        return response
+    activities = await activities_service.get_all_activities(after_id=after_id, limit=limit, version=version)
+    return conditional_json_response({"activities": activities}, etag)
+
+
+@router.post("/batch", status_code=200, response_model=BatchResult)
+async def create_activities(
+    activities: List[ActivityCreate] = Body(..., min_length=1, max_length=settings.BATCH_MAX_SIZE),
+    activities_service: ActivitiesService = Depends(ActivitiesService),
+) -> BatchResult:
+    """
+    Create activities in a single transaction.
+
+    Activities with a taken name, a missing parent or exceeding the maximum depth are reported in the result
+    and skipped.
+
+    :param activities: Data for the activities to be created.
+    :param activities_service: Service for handling activity-related operations.
+    """
+    return await activities_service.create_activities(activities=activities)
+
+
+@router.put("/batch", status_code=200, response_model=BatchResult)
+async def update_activities(
+    activities: List[ActivityBatchUpdate] = Body(..., min_length=1, max_length=settings.BATCH_MAX_SIZE),
+    activities_service: ActivitiesService = Depends(ActivitiesService),
+) -> BatchResult:
+    """
+    Update activities by their IDs in a single transaction, reporting the status of every item.
+
+    :param activities: Updated data of the activities, including their IDs.
+    :param activities_service: Service for handling activity-related operations.
+    """
+    return await activities_service.update_activities(activities=activities)
+
+
+@router.post("/batch/delete", status_code=200, response_model=BatchResult)
+async def delete_activities(
+    activity_ids: List[PositiveInt] = Body(..., min_length=1, max_length=settings.BATCH_MAX_SIZE),
+    activities_service: ActivitiesService = Depends(ActivitiesService),
+) -> BatchResult:
     """
-    Retrieve a list of all activities.
+    Delete activities by their IDs in a single transaction, reporting the status of every item.
 
+    :param activity_ids: IDs of the activities to delete.
     :param activities_service: Service for handling activity-related operations.
     """
-    return await activities_service.get_all_activities()
+    return await activities_service.delete_activities(activity_ids=activity_ids)
 
 
 @router.get("/{activity_id}", status_code=200, response_model=Activity)
@@ -1,33 +1,104 @@
-from fastapi import APIRouter, Depends, Query
+from typing import List
+
+from fastapi import APIRouter, Body, Depends, Query, Request, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import PositiveInt
 
-from src.core.schemas import Building, BuildingCreate, BuildingList, BuildingUpdate
+from src.api.responses import (
+    NDJSONResponse,
+    conditional_json_response,
+    get_etag,
+    not_modified_response,
+)
+from src.config import settings
+from src.core.schemas import (
+    BatchResult,
+    Building,
+    BuildingBatchUpdate,
+    BuildingCreate,
+    BuildingList,
+    BuildingUpdate,
+)
 from src.core.service.buildings import BuildingsService
 
 router = APIRouter()
 
 
 @router.get("", status_code=200, response_model=BuildingList)
-async def get_all_buildings(buildings_service: BuildingsService = Depends(BuildingsService)) -> BuildingList:
+async def get_all_buildings(
+    request: Request,
+    after_id: PositiveInt | None = Query(None),
+    limit: PositiveInt | None = Query(None),
+    buildings_service: BuildingsService = Depends(BuildingsService),
+) -> Response:
     """
-    Retrieve a list of all buildings.
+    Retrieve a list of all buildings ordered by ID.
+
+    Responds with 304 Not Modified when the If-None-Match header matches the current ETag.
 
+    :param request: The request with the conditional headers.
+    :param after_id: Return only buildings with ID greater than this one (keyset pagination).
+    :param limit: Maximum number of buildings to return.
     :param buildings_service: Service for handling building-related operations.
     """
-    return await buildings_service.get_all_buildings()
+    version = await buildings_service.get_all_buildings_version(after_id=after_id, limit=limit)
+    etag = get_etag(request, version)
+    if response := not_modified_response(request, etag):
+        return response
+    buildings = await buildings_service.get_all_buildings(after_id=after_id, limit=limit, version=version)
+    return conditional_json_response({"buildings": buildings}, etag)
 
 
-@router.get("/{building_id}", status_code=200, response_model=Building)
-async def get_building_by_id(
-    building_id: PositiveInt, building_service: BuildingsService = Depends(BuildingsService)
-) -> Building:
+@router.get("/stream", status_code=200, response_class=NDJSONResponse)
+async def stream_all_buildings(buildings_service: BuildingsService = Depends(BuildingsService)) -> NDJSONResponse:
     """
-    Retrieve a specific building by its ID.
+    Stream all buildings ordered by ID as newline-delimited JSON.
 
-    :param building_id: ID of the building to retrieve.
-    :param building_service: Service for handling building-related operations.
+    :param buildings_service: Service for handling building-related operations.
     """
-    return await building_service.get_building_by_id(building_id=building_id)
+    return NDJSONResponse(buildings_service.stream_all_buildings())
+
+
+@router.post("/batch", status_code=200, response_model=BatchResult)
+async def create_buildings(
+    buildings: List[BuildingCreate] = Body(..., min_length=1, max_length=settings.BATCH_MAX_SIZE),
+    buildings_service: BuildingsService = Depends(BuildingsService),
+) -> BatchResult:
+    """
+    Create buildings in a single transaction.
+
+    :param buildings: Data for the buildings to be created.
+    :param buildings_service: Service for handling building-related operations.
+    """
+    return await buildings_service.create_buildings(buildings=buildings)
+
+
+@router.put("/batch", status_code=200, response_model=BatchResult)
+async def update_buildings(
+    buildings: List[BuildingBatchUpdate] = Body(..., min_length=1, max_length=settings.BATCH_MAX_SIZE),
+    buildings_service: BuildingsService = Depends(BuildingsService),
+) -> BatchResult:
+    """
+    Update buildings by their IDs in a single transaction, reporting the status of every item.
+
+    :param buildings: Updated data of the buildings, including their IDs.
+    :param buildings_service: Service for handling building-related operations.
+    """
+    return await buildings_service.update_buildings(buildings=buildings)
+
+
+@router.post("/batch/delete", status_code=200, response_model=BatchResult)
+async def delete_buildings(
+    building_ids: List[PositiveInt] = Body(..., min_length=1, max_length=settings.BATCH_MAX_SIZE),
+    buildings_service: BuildingsService = Depends(BuildingsService),
+) -> BatchResult:
+    """
+    Delete buildings by their IDs in a single transaction, reporting the status of every item.
+
+    :param building_ids: IDs of the buildings to delete.
+    :param buildings_service: Service for handling building-related operations.
+    """
+    return await buildings_service.delete_buildings(building_ids=building_ids)
 
 
 @router.get("/buildings_by_radius", response_model=BuildingList)
@@ -35,17 +106,35 @@ async def get_buildings_by_radius(
     latitude: float = Query(...),
     longitude: float = Query(...),
     radius_km: float = Query(...),
+    limit: PositiveInt | None = Query(None),
     building_service: BuildingsService = Depends(BuildingsService),
-) -> BuildingList:
+) -> ORJSONResponse:
     """
-    Retrieve buildings located within a specified radius from given coordinates.
+    Retrieve buildings located within a specified radius from given coordinates, nearest first.
 
     :param latitude: Latitude of the center point.
     :param longitude: Longitude of the center point.
     :param radius_km: Radius in kilometers.
+    :param limit: Maximum number of the nearest buildings to return.
     :param building_service: Service for handling building-related operations.
     """
-    return await building_service.get_buildings_by_radius(latitude=latitude, longitude=longitude, radius_km=radius_km)
+    buildings = await building_service.get_buildings_by_radius(
+        latitude=latitude, longitude=longitude, radius_km=radius_km, limit=limit
+    )
+    return ORJSONResponse({"buildings": buildings})
+
+
+@router.get("/{building_id}", status_code=200, response_model=Building)
+async def get_building_by_id(
+    building_id: PositiveInt, building_service: BuildingsService = Depends(BuildingsService)
+) -> Building:
+    """
+    Retrieve a specific building by its ID.
+
+    :param building_id: ID of the building to retrieve.
+    :param building_service: Service for handling building-related operations.
+    """
+    return await building_service.get_building_by_id(building_id=building_id)
 
 
 @router.post("", status_code=201, response_model=Building)
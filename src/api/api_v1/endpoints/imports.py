@@ -0,0 +1,41 @@
+from tempfile import SpooledTemporaryFile
+
+from fastapi import APIRouter, Depends, Query, Request
+from pydantic import NonNegativeInt, PositiveInt
+
+from src.config import settings
+from src.core.schemas import ImportEntity, ImportFormat, ImportReport
+from src.core.service.imports import ImportService
+
+router = APIRouter()
+
+
+@router.post("/{entity}", status_code=200, response_model=ImportReport)
+async def import_data(
+    entity: ImportEntity,
+    request: Request,
+    file_format: ImportFormat = Query("csv", alias="format"),
+    skip_rows: NonNegativeInt = Query(0),
+    batch_size: PositiveInt | None = Query(None),
+    import_service: ImportService = Depends(ImportService),
+) -> ImportReport:
+    """
+    Import activities, buildings or organizations from a CSV, NDJSON or XLS file sent as the request body.
+
+    The body is spooled to a temporary file and processed in batches, each committed in its own transaction.
+    Rows that fail validation or reference unknown buildings or activities are listed in the report.
+
+    :param entity: Type of the imported records.
+    :param request: The request whose body contains the file.
+    :param file_format: Format of the file.
+    :param skip_rows: Number of data rows to skip, pass the checkpoint of an interrupted import to resume it.
+    :param batch_size: Number of rows written per transaction.
+    :param import_service: Service for handling bulk imports.
+    """
+    with SpooledTemporaryFile(max_size=settings.IMPORT_SPOOL_MAX_SIZE) as file:
+        async for chunk in request.stream():
+            file.write(chunk)
+        file.seek(0)
+        return await import_service.import_file(
+            entity=entity, file=file, file_format=file_format, skip_rows=skip_rows, batch_size=batch_size
+        )
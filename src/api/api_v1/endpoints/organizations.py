@@ -1,9 +1,28 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, Query
-from pydantic import PositiveInt
-
-from src.core.schemas import OrganizationCreate, OrganizationDetailed, OrganizationList, OrganizationUpdate
+from fastapi import APIRouter, Body, Depends, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import PositiveFloat, PositiveInt
+
+from src.api.responses import (
+    NDJSONResponse,
+    conditional_json_response,
+    get_etag,
+    not_modified_response,
+)
+from src.config import settings
+from src.core.schemas import (
+    BatchResult,
+    NameSearchMode,
+    OrganizationBatchCreate,
+    OrganizationBatchUpdate,
+    OrganizationCreate,
+    OrganizationDetailed,
+    OrganizationList,
+    OrganizationNearestList,
+    OrganizationSearchResult,
+    OrganizationUpdate,
+)
 from src.core.service.organizations import OrganizationsService
 
 router = APIRouter()
@@ -11,53 +30,127 @@ router = APIRouter()
 
 @router.get("", status_code=200, response_model=OrganizationList)
 async def get_all_organizations(
+    after_id: PositiveInt | None = Query(None),
+    limit: PositiveInt | None = Query(None),
+    organizations_service: OrganizationsService = Depends(OrganizationsService),
+) -> ORJSONResponse:
+    """
+    Retrieve a list of all organizations ordered by ID.
+
+    :param after_id: Return only organizations with ID greater than this one (keyset pagination).
+    :param limit: Maximum number of organizations to return.
+    :param organizations_service: Service for handling organization-related operations.
+    """
+    organizations = await organizations_service.get_all_organizations(after_id=after_id, limit=limit)
+    return ORJSONResponse({"organizations": organizations})
+
+
+@router.get("/stream", status_code=200, response_class=NDJSONResponse)
+async def stream_all_organizations(
+    organizations_service: OrganizationsService = Depends(OrganizationsService),
+) -> NDJSONResponse:
+    """
+    Stream all organizations ordered by ID as newline-delimited JSON.
+
+    :param organizations_service: Service for handling organization-related operations.
+    """
+    return NDJSONResponse(organizations_service.stream_all_organizations())
+
+
+@router.post("/batch", status_code=200, response_model=BatchResult)
+async def create_organizations(
+    organizations: List[OrganizationBatchCreate] = Body(..., min_length=1, max_length=settings.BATCH_MAX_SIZE),
+    organizations_service: OrganizationsService = Depends(OrganizationsService),
+) -> BatchResult:
+    """
+    Create organizations in a single transaction.
+
+    Organizations referencing a missing building or unknown activity names are reported in the result and
+    skipped.
+
+    :param organizations: Data for the organizations to be created.
+    :param organizations_service: Service for handling organization-related operations.
+    """
+    return await organizations_service.create_organizations(organizations=organizations)
+
+
+@router.put("/batch", status_code=200, response_model=BatchResult)
+async def update_organizations(
+    organizations: List[OrganizationBatchUpdate] = Body(..., min_length=1, max_length=settings.BATCH_MAX_SIZE),
     organizations_service: OrganizationsService = Depends(OrganizationsService),
-) -> OrganizationList:
+) -> BatchResult:
     """
-    Retrieve a list of all organizations.
+    Update organizations by their IDs in a single transaction, reporting the status of every item.
 
+    :param organizations: Updated data of the organizations, including their IDs.
     :param organizations_service: Service for handling organization-related operations.
     """
-    return await organizations_service.get_all_organizations()
+    return await organizations_service.update_organizations(organizations=organizations)
+
+
+@router.post("/batch/delete", status_code=200, response_model=BatchResult)
+async def delete_organizations(
+    organization_ids: List[PositiveInt] = Body(..., min_length=1, max_length=settings.BATCH_MAX_SIZE),
+    organizations_service: OrganizationsService = Depends(OrganizationsService),
+) -> BatchResult:
+    """
+    Delete organizations by their IDs in a single transaction, reporting the status of every item.
+
+    :param organization_ids: IDs of the organizations to delete.
+    :param organizations_service: Service for handling organization-related operations.
+    """
+    return await organizations_service.delete_organizations(organization_ids=organization_ids)
 
 
 @router.get("/by_name", status_code=200, response_model=OrganizationList)
 async def get_organizations_by_name(
-    organization_name: str, organization_service: OrganizationsService = Depends(OrganizationsService)
-) -> OrganizationList:
+    organization_name: str,
+    mode: NameSearchMode = Query("contains"),
+    limit: PositiveInt | None = Query(None),
+    organization_service: OrganizationsService = Depends(OrganizationsService),
+) -> ORJSONResponse:
     """
     Retrieve organizations by their name.
 
     :param organization_name: Name or partial name of the organization.
+    :param mode: "contains" for a substring match, "ranked" for similar names ordered by similarity,
+        "prefix" for names starting with the text (autocomplete). Ranked and prefix results are limited to 20
+        unless a limit is given.
+    :param limit: Maximum number of organizations to return.
     :param organization_service: Service for handling organization-related operations.
     """
-    return await organization_service.get_organizations_by_name(organization_name=organization_name)
+    organizations = await organization_service.get_organizations_by_name(
+        organization_name=organization_name, mode=mode, limit=limit
+    )
+    return ORJSONResponse({"organizations": organizations})
 
 
 @router.get("/by_activity", status_code=200, response_model=OrganizationList)
 async def get_organizations_by_activity_name(
     activity_name: str, organization_service: OrganizationsService = Depends(OrganizationsService)
-) -> OrganizationList:
+) -> ORJSONResponse:
     """
     Retrieve organizations that are associated with a specific activity name.
 
     :param activity_name: Name of the activity.
     :param organization_service: Service for handling organization-related operations.
     """
-    return await organization_service.get_organizations_by_activity_name(activity_name=activity_name)
+    organizations = await organization_service.get_organizations_by_activity_name(activity_name=activity_name)
+    return ORJSONResponse({"organizations": organizations})
 
 
 @router.get("/by_activity_tree", status_code=200, response_model=OrganizationList)
 async def get_organizations_by_activity_tree(
     activity_name: str, organization_service: OrganizationsService = Depends(OrganizationsService)
-) -> OrganizationList:
+) -> ORJSONResponse:
     """
     Retrieve organizations by activity name, including nested sub-activities (up to 3 levels deep).
 
     :param activity_name: Name of the parent activity.
     :param organization_service: Service for handling organization-related operations.
     """
-    return await organization_service.get_organizations_by_activity_tree(activity_name=activity_name)
+    organizations = await organization_service.get_organizations_by_activity_tree(activity_name=activity_name)
+    return ORJSONResponse({"organizations": organizations})
 
 
 @router.get("/by_radius", response_model=OrganizationList)
@@ -65,46 +158,143 @@ async def get_organizations_by_radius(
     latitude: float = Query(...),
     longitude: float = Query(...),
     radius_km: float = Query(...),
+    after_id: PositiveInt | None = Query(None),
+    limit: PositiveInt | None = Query(None),
     organizations_service: OrganizationsService = Depends(OrganizationsService),
-) -> OrganizationList:
+) -> ORJSONResponse:
     """
-    Retrieve organizations located within a specified radius from given coordinates.
+    Retrieve organizations located within a specified radius from given coordinates, ordered by ID.
 
     :param latitude: Latitude of the center point.
     :param longitude: Longitude of the center point.
     :param radius_km: Radius in kilometers.
+    :param after_id: Return only organizations with ID greater than this one (keyset pagination).
+    :param limit: Maximum number of organizations to return.
     :param organizations_service: Service for handling organization-related operations.
     """
-    return await organizations_service.get_organizations_by_radius(
-        latitude=latitude, longitude=longitude, radius_km=radius_km
+    organizations = await organizations_service.get_organizations_by_radius(
+        latitude=latitude, longitude=longitude, radius_km=radius_km, after_id=after_id, limit=limit
     )
+    return ORJSONResponse({"organizations": organizations})
+
+
+@router.get("/search", status_code=200, response_model=OrganizationSearchResult)
+async def search_organizations(
+    name: str | None = Query(None),
+    activity_name: str | None = Query(None),
+    building_id: PositiveInt | None = Query(None),
+    latitude: float | None = Query(None, ge=-90, le=90),
+    longitude: float | None = Query(None, ge=-180, le=180),
+    radius_km: PositiveFloat | None = Query(None),
+    min_latitude: float | None = Query(None, ge=-90, le=90),
+    max_latitude: float | None = Query(None, ge=-90, le=90),
+    min_longitude: float | None = Query(None, ge=-180, le=180),
+    max_longitude: float | None = Query(None, ge=-180, le=180),
+    after_id: PositiveInt | None = Query(None),
+    limit: PositiveInt | None = Query(None),
+    facets: bool = Query(False),
+    organizations_service: OrganizationsService = Depends(OrganizationsService),
+) -> ORJSONResponse:
+    """
+    Search organizations by any combination of the filters in a single query, ordered by ID.
+
+    :param name: Return only organizations with names containing this text.
+    :param activity_name: Return only organizations with this activity or its nested sub-activities.
+    :param building_id: Return only organizations located in this building.
+    :param latitude: Latitude of the center point of the radius search.
+    :param longitude: Longitude of the center point of the radius search.
+    :param radius_km: Radius in kilometers; latitude, longitude and radius_km are given together.
+    :param min_latitude: Southern bound of the bounding box search.
+    :param max_latitude: Northern bound of the bounding box search.
+    :param min_longitude: Western bound of the bounding box search.
+    :param max_longitude: Eastern bound of the bounding box search; the four bounds are given together.
+    :param after_id: Return only organizations with ID greater than this one (keyset pagination).
+    :param limit: Maximum number of organizations to return.
+    :param facets: Also return the number of matching organizations by top-level activity across all pages.
+    :param organizations_service: Service for handling organization-related operations.
+    """
+    result = await organizations_service.search_organizations(
+        name=name,
+        activity_name=activity_name,
+        building_id=building_id,
+        latitude=latitude,
+        longitude=longitude,
+        radius_km=radius_km,
+        min_latitude=min_latitude,
+        max_latitude=max_latitude,
+        min_longitude=min_longitude,
+        max_longitude=max_longitude,
+        after_id=after_id,
+        limit=limit,
+        facets=facets,
+    )
+    return ORJSONResponse(result)
+
+
+@router.get("/nearest", status_code=200, response_model=OrganizationNearestList)
+async def get_nearest_organizations(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    limit: PositiveInt = Query(10, le=settings.NEAREST_MAX_COUNT),
+    activity_name: str | None = Query(None),
+    max_distance_km: PositiveFloat | None = Query(None),
+    organizations_service: OrganizationsService = Depends(OrganizationsService),
+) -> ORJSONResponse:
+    """
+    Retrieve the organizations closest to given coordinates with their addresses and distances, the closest first.
+
+    :param latitude: Latitude of the point.
+    :param longitude: Longitude of the point.
+    :param limit: Number of organizations to return.
+    :param activity_name: Return only organizations with this activity or its nested sub-activities.
+    :param max_distance_km: Return only organizations within this distance in kilometers.
+    :param organizations_service: Service for handling organization-related operations.
+    """
+    organizations = await organizations_service.get_nearest_organizations(
+        latitude=latitude,
+        longitude=longitude,
+        limit=limit,
+        activity_name=activity_name,
+        max_distance_km=max_distance_km,
+    )
+    return ORJSONResponse({"organizations": organizations})
 
 
 @router.get("/{organization_id}", status_code=200, response_model=OrganizationDetailed)
 async def get_organization_by_id(
     organization_id: PositiveInt,
+    request: Request,
     organizations_service: OrganizationsService = Depends(OrganizationsService),
-) -> OrganizationDetailed:
+) -> Response:
     """
     Retrieve detailed information about an organization by its ID.
 
+    Responds with 304 Not Modified when the If-None-Match header matches the current ETag.
+
     :param organization_id: ID of the organization.
+    :param request: The request with the conditional headers.
     :param organizations_service: Service for handling organization-related operations.
     """
-    return await organizations_service.get_organization_by_id(organization_id=organization_id)
+    version = await organizations_service.get_organization_version(organization_id=organization_id)
+    etag = get_etag(request, version)
+    if response := not_modified_response(request, etag):
+        return response
+    organization = await organizations_service.get_organization_by_id(organization_id=organization_id, version=version)
+    return conditional_json_response(organization.model_dump(mode="json"), etag)
 
 
 @router.get("/by_building/{building_id}", status_code=200, response_model=OrganizationList)
 async def get_organizations_by_building_id(
     building_id: PositiveInt, organization_service: OrganizationsService = Depends(OrganizationsService)
-) -> OrganizationList:
+) -> ORJSONResponse:
     """
     Retrieve organizations located in a specific building.
 
     :param building_id: ID of the building.
     :param organization_service: Service for handling organization-related operations.
     """
-    return await organization_service.get_organizations_by_building_id(building_id=building_id)
+    organizations = await organization_service.get_organizations_by_building_id(building_id=building_id)
+    return ORJSONResponse({"organizations": organizations})
 
 
 @router.post("", status_code=201, response_model=OrganizationDetailed)
@@ -0,0 +1,107 @@
+"""The module reports the latency and database work of every request in Server-Timing headers and metrics."""
+
+import logging
+import time
+
+from fastapi import Request
+from prometheus_client import Gauge, Histogram
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import settings
+from src.core.db.instrumentation import QueryStats, count_queries
+from src.utils import get_logger
+
+logger = get_logger(__file__, log_level=logging.INFO)
+
+REQUEST_LATENCY = Histogram(
+    "catalog_request_duration_seconds",
+    "Duration of HTTP requests by route and status, including streaming the response body.",
+    ["method", "route", "status"],
+    buckets=(0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+REQUESTS_IN_FLIGHT = Gauge("catalog_requests_in_flight", "HTTP requests being served.", ["method"])
+REQUEST_QUERIES = Histogram(
+    "catalog_request_db_queries",
+    "Database queries per request by route.",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200),
+)
+REQUEST_DB_TIME = Histogram("catalog_request_db_seconds", "Database time per request by route.", ["method", "route"])
+REQUEST_SESSIONS = Histogram(
+    "catalog_request_db_sessions",
+    "Database sessions started per request by route.",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10),
+)
+
+
+def get_route(scope: Scope) -> str:
+    """Get the path template of the matched route, so that the metrics are not labeled by every ID."""
+    route = scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+
+def get_query_budget(route: str) -> int | None:
+    return settings.DB_QUERY_BUDGETS.get(route, settings.DB_QUERY_BUDGET)
+
+
+async def apply_query_budget(request: Request) -> None:
+    """Set the query budget of the matched route, so that DB_QUERY_BUDGET_RAISE fails the exceeding query."""
+    stats = getattr(request.state, "query_stats", None)
+    if stats is not None:
+        stats.budget = get_query_budget(get_route(request.scope))
+
+
+def format_server_timing(stats: QueryStats, elapsed: float) -> str:
+    return (
+        f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries, {stats.sessions} sessions", '
+        f"app;dur={elapsed * 1000:.2f}"
+    )
+
+
+class RequestMetricsMiddleware:
+    """Measure the latency and count the queries, sessions and database time of every HTTP request.
+
+    The counters up to the start of the response are sent in the Server-Timing header; the metrics and the
+    query budget check use the final counters, including queries of streamed responses.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started_at = time.perf_counter()
+        status = 500
+
+        async def send_with_server_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", format_server_timing(stats, time.perf_counter() - started_at))
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(method=scope["method"])
+        in_flight.inc()
+        with count_queries() as stats:
+            scope.setdefault("state", {})["query_stats"] = stats
+            try:
+                await self.app(scope, receive, send_with_server_timing)
+            finally:
+                in_flight.dec()
+                self.observe(scope, stats, status=status, elapsed=time.perf_counter() - started_at)
+
+    @staticmethod
+    def observe(scope: Scope, stats: QueryStats, status: int, elapsed: float) -> None:
+        route, method = get_route(scope), scope["method"]
+        REQUEST_LATENCY.labels(method=method, route=route, status=str(status)).observe(elapsed)
+        REQUEST_QUERIES.labels(method=method, route=route).observe(stats.queries)
+        REQUEST_DB_TIME.labels(method=method, route=route).observe(stats.db_time)
+        REQUEST_SESSIONS.labels(method=method, route=route).observe(stats.sessions)
+        budget = get_query_budget(route) if route != "unmatched" else None
+        if budget is not None and stats.queries > budget:
+            logger.warning(f"{method} {route} issued {stats.queries} queries, the budget is {budget}")
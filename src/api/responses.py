@@ -0,0 +1,69 @@
+"""The module contains response helpers shared by the endpoints."""
+
+import hashlib
+from collections.abc import AsyncIterator
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from starlette.responses import StreamingResponse
+
+from src.config import settings
+
+NDJSON_CHUNK_SIZE = 500
+
+
+class NDJSONResponse(StreamingResponse):
+    """Stream the items as newline-delimited JSON, so the whole result never has to be held in memory."""
+
+    media_type = "application/x-ndjson"
+
+    def __init__(self, items: AsyncIterator[BaseModel], **kwargs: Any) -> None:
+        super().__init__(self._encode(items), **kwargs)
+
+    @staticmethod
+    async def _encode(items: AsyncIterator[BaseModel]) -> AsyncIterator[bytes]:
+        chunk = []
+        async for item in items:
+            chunk.append(item.model_dump_json())
+            if len(chunk) >= NDJSON_CHUNK_SIZE:
+                yield ("\n".join(chunk) + "\n").encode()
+                chunk = []
+        if chunk:
+            yield ("\n".join(chunk) + "\n").encode()
+
+
+def get_etag(request: Request, version: str | None) -> str:
+    """Build a weak ETag from the version of the data and the requested URL, since pages of one version differ."""
+    tagged = f"{request.url.path}?{request.url.query}|{version}"
+    return f'W/"{hashlib.sha1(tagged.encode()).hexdigest()}"'
+
+
+def _get_cache_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": f"public, max-age={settings.HTTP_CACHE_MAX_AGE}", "Vary": "api-key"}
+
+
+def not_modified_response(request: Request, etag: str) -> Response | None:
+    """Get a 304 Not Modified response if the If-None-Match header of the request matches the ETag.
+
+    It is checked before the data is loaded, so a client with a current copy costs only the version query.
+    The ETag is built for an existing resource, so `If-None-Match: *` matches it as well.
+
+    Returns:
+        The 304 Not Modified response, None when the data has to be sent.
+    """
+    if_none_match = request.headers.get("if-none-match", "")
+    client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in client_etags or etag.removeprefix("W/") in client_etags:
+        return Response(status_code=304, headers=_get_cache_headers(etag))
+    return None
+
+
+def conditional_json_response(content: Any, etag: str) -> ORJSONResponse:
+    """Serialize the content as JSON with the ETag and a Cache-Control header.
+
+    The content has to be loaded for the version the ETag is built from or a newer one, e.g. by passing the version
+    to the cached service method, so that the ETag never describes newer data than the body.
+    """
+    return ORJSONResponse(content, headers=_get_cache_headers(etag))
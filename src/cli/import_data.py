@@ -0,0 +1,64 @@
+"""Command line bulk import.
+
+Usage:
+    python -m src.cli.import_data organizations dump.csv --checkpoint-file dump.checkpoint.json --resume
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import get_args
+
+from src.core.schemas import ImportEntity, ImportFormat, ImportReport
+from src.core.service.imports import ImportService
+
+FORMATS_BY_SUFFIX = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".xls": "xls"}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Import activities, buildings or organizations from a file.")
+    parser.add_argument("entity", choices=get_args(ImportEntity))
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", dest="file_format", choices=get_args(ImportFormat))
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--checkpoint-file", type=Path, help="File to store the number of committed rows in.")
+    parser.add_argument("--resume", action="store_true", help="Continue from the row stored in the checkpoint file.")
+    args = parser.parse_args()
+    if args.file_format is None:
+        args.file_format = FORMATS_BY_SUFFIX.get(args.path.suffix.lower())
+        if args.file_format is None:
+            parser.error(f"Cannot infer the format of {args.path}, pass --format")
+    if args.resume and args.checkpoint_file is None:
+        parser.error("--resume requires --checkpoint-file")
+    return args
+
+
+async def run(args: argparse.Namespace) -> ImportReport:
+    skip_rows = 0
+    if args.resume and args.checkpoint_file.exists():
+        skip_rows = json.loads(args.checkpoint_file.read_text())["checkpoint"]
+
+    async def save_checkpoint(report: ImportReport) -> None:
+        checkpoint = {"entity": report.entity, "path": str(args.path), "checkpoint": report.checkpoint}
+        args.checkpoint_file.write_text(json.dumps(checkpoint))
+
+    with args.path.open("rb") as file:
+        return await ImportService().import_file(
+            entity=args.entity,
+            file=file,
+            file_format=args.file_format,
+            skip_rows=skip_rows,
+            batch_size=args.batch_size,
+            on_progress=save_checkpoint if args.checkpoint_file else None,
+        )
+
+
+def main() -> None:
+    report = asyncio.run(run(parse_args()))
+    sys.stdout.write(report.model_dump_json(indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import AnyHttpUrl, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -15,6 +17,84 @@ class Settings(BaseSettings):
     def DB_URL(self):
         return f"postgresql+asyncpg://{self.USER}:{self.PASSWORD}@{self.HOST}:{self.PORT}/{self.NAME}"
 
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    # One worker process per available CPU by default.
+    SERVER_WORKERS: int | None = None
+    # "auto" uses uvloop and httptools when they are installed.
+    SERVER_LOOP: Literal["auto", "asyncio", "uvloop"] = "auto"
+    SERVER_HTTP: Literal["auto", "h11", "httptools"] = "auto"
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEP_ALIVE_SECONDS: int = 5
+    # Requests over this number of concurrent connections per worker are answered with 503.
+    SERVER_LIMIT_CONCURRENCY: int | None = None
+    # Workers are restarted after serving this many requests, bounding the growth of their memory.
+    SERVER_MAX_REQUESTS: int | None = None
+    SERVER_ACCESS_LOG: bool = True
+
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Open a new connection per checkout, e.g. when connections are pooled by PgBouncer;
+    # with PgBouncer in transaction mode also set DB_STATEMENT_CACHE_SIZE to 0.
+    DB_USE_NULL_POOL: bool = False
+    # Connections opened per engine before the worker reports ready; DB_POOL_SIZE by default, 0 disables.
+    DB_POOL_WARMUP_CONNECTIONS: int | None = None
+    # Read-only service methods are sent to these replicas in round-robin order.
+    DB_REPLICA_URLS: list[str] = []
+    # Maximum number of queries per request, by default and by route path (e.g. "/api_v1/organizations/by_radius").
+    # Requests over the budget are logged; with DB_QUERY_BUDGET_RAISE the exceeding query fails instead.
+    DB_QUERY_BUDGET: int | None = None
+    DB_QUERY_BUDGETS: dict[str, int] = {}
+    DB_QUERY_BUDGET_RAISE: bool = False
+
+    # Seed the demo data on startup; workers and replicas of the service seed under an advisory lock.
+    SEED_DATA: bool = False
+
+    # How often the event loop lag is sampled for /metrics.
+    EVENT_LOOP_LAG_INTERVAL_SECONDS: float = 0.5
+
+    ACTIVITY_CATALOG_ENABLED: bool = True
+    ACTIVITY_CATALOG_REFRESH_SECONDS: float = 5.0
+
+    # Serve the radius searches of buildings from an in-process grid index instead of PostgreSQL (requires numpy).
+    # Building writes only bump the buildings version when it is enabled, so all processes must share the setting.
+    BUILDING_INDEX_ENABLED: bool = False
+    BUILDING_INDEX_REFRESH_SECONDS: float = 5.0
+    # Size of the grid cells; 0.05 degrees is about 5.5 km of latitude.
+    BUILDING_INDEX_CELL_DEGREES: float = 0.05
+    # Changes applied on top of the loaded grid before it is rebuilt from the database.
+    BUILDING_INDEX_MAX_OVERRIDES: int = 10000
+
+    CACHE_ENABLED: bool = True
+    # "memory" keeps an LRU cache per worker process, "redis" shares it between workers.
+    CACHE_BACKEND: Literal["memory", "redis"] = "memory"
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_TTL_SECONDS: float = 60.0
+    CACHE_MAX_ENTRIES: int = 10000
+    # Coordinates of radius searches are rounded to this many decimal digits (4 digits is about 11 m).
+    CACHE_COORDINATE_DIGITS: int = 4
+
+    # Lifetime of the GET responses in browser and CDN caches; clients revalidate them with If-None-Match.
+    HTTP_CACHE_MAX_AGE: int = 30
+
+    # Maximum number of items in a single batch create, update or delete request.
+    BATCH_MAX_SIZE: int = 10000
+
+    # Maximum number of organizations returned by a nearest search.
+    NEAREST_MAX_COUNT: int = 100
+    # Radius of the first box of a nearest search; every next round multiplies it by NEAREST_RADIUS_GROWTH.
+    NEAREST_START_RADIUS_KM: float = 1.0
+    NEAREST_RADIUS_GROWTH: float = 4.0
+
+    IMPORT_BATCH_SIZE: int = 5000
+    IMPORT_MAX_REPORTED_ERRORS: int = 1000
+    IMPORT_SPOOL_MAX_SIZE: int = 64 * 1024 * 1024
+
     BACKEND_CORS_ORIGINS: list[AnyHttpUrl] = [
         "http://localhost",
         "http://127.0.0.1",
@@ -0,0 +1,3 @@
+from .activities import ActivityCatalog, activity_catalog
+from .buildings import BuildingIndex, building_index
+from .responses import ROUNDED_COORDINATES, ResponseCache, cached, invalidates, response_cache
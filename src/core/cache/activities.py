@@ -0,0 +1,89 @@
+"""The module contains the in-process catalog of activities."""
+
+import logging
+from collections import defaultdict
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from src.core.cache.catalog import VersionedCatalog
+from src.core.models import Activity
+from src.core.repository import ActivitiesRepository, CatalogVersionsRepository
+from src.core.schemas import Activity as ActivitySchema
+from src.utils import get_logger
+
+logger = get_logger(__file__, log_level=logging.INFO)
+
+CATALOG_NAME = "activities"
+
+
+@dataclass(frozen=True)
+class ActivityCatalogSnapshot:
+    """An immutable view of the activity hierarchy at some catalog version."""
+
+    version: int
+    activities: dict[int, ActivitySchema]
+    ids_by_name: dict[str, tuple[int, ...]]
+    descendants: dict[int, frozenset[int]]
+
+    @classmethod
+    def build(cls, version: int, activities: Sequence[Activity]) -> "ActivityCatalogSnapshot":
+        nodes = {activity.id: activity.to_pydantic_schema() for activity in sorted(activities, key=lambda a: a.id)}
+        ids_by_name = defaultdict(list)
+        children = defaultdict(list)
+        for node in nodes.values():
+            ids_by_name[node.name].append(node.id)
+            if node.parent_id:
+                children[node.parent_id].append(node.id)
+
+        descendants = {}
+        for activity_id in nodes:
+            subtree, stack = {activity_id}, list(children[activity_id])
+            while stack:
+                child_id = stack.pop()
+                subtree.add(child_id)
+                stack.extend(children[child_id])
+            descendants[activity_id] = frozenset(subtree)
+
+        return cls(
+            version=version,
+            activities=nodes,
+            ids_by_name={name: tuple(ids) for name, ids in ids_by_name.items()},
+            descendants=descendants,
+        )
+
+
+class ActivityCatalog(VersionedCatalog):
+    """Keeps the whole activity hierarchy in the memory of the application process.
+
+    The catalog is replaced as a whole on every reload, so readers always see a consistent snapshot. It may
+    lag behind the database by up to the polling interval, so it only serves reads; writes check the
+    hierarchy and resolve activity names in their own transaction.
+    """
+
+    catalog_name = CATALOG_NAME
+    _snapshot: ActivityCatalogSnapshot | None = None
+
+    @property
+    def version(self) -> int | None:
+        return self._snapshot.version if self._snapshot else None
+
+    async def reload(self) -> None:
+        async with self._lock:
+            async with self.session_factory() as session:
+                version = await CatalogVersionsRepository(session).get_version(name=CATALOG_NAME)
+                activities = await ActivitiesRepository(session).get_by_query_all()
+            self._snapshot = ActivityCatalogSnapshot.build(version=version, activities=activities)
+        logger.info(f"Activity catalog loaded: {len(activities)} activities, version {version}")
+
+    def get_all(self, after_id: int | None = None, limit: int | None = None) -> list[ActivitySchema]:
+        activities = [activity for activity in self._snapshot.activities.values() if activity.id > (after_id or 0)]
+        return activities[:limit]
+
+    def get_subtree_ids(self, activity_name: str) -> list[int]:
+        activity_ids = set()
+        for activity_id in self._snapshot.ids_by_name.get(activity_name, ()):
+            activity_ids |= self._snapshot.descendants[activity_id]
+        return sorted(activity_ids)
+
+
+activity_catalog = ActivityCatalog()
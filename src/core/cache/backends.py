@@ -0,0 +1,84 @@
+"""The module contains storage backends of the response cache."""
+
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Sequence
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+
+class CacheBackendError(Exception):
+    """The backend storage is unavailable."""
+
+
+class CacheBackend(ABC):
+    """A key-value storage of serialized values with expiration."""
+
+    @abstractmethod
+    async def get_many(self, keys: Sequence[str]) -> list[bytes | None]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        return None
+
+
+class MemoryCacheBackend(CacheBackend):
+    """An in-process LRU storage bounded by the number of entries.
+
+    Every worker process has its own storage, so invalidations are not seen by the other workers
+    until their entries expire; use Redis when running several workers.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float | None, bytes]] = OrderedDict()
+
+    async def get_many(self, keys: Sequence[str]) -> list[bytes | None]:
+        now = time.monotonic()
+        values = []
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is None:
+                values.append(None)
+            elif entry[0] is not None and entry[0] <= now:
+                del self._entries[key]
+                values.append(None)
+            else:
+                self._entries.move_to_end(key)
+                values.append(entry[1])
+        return values
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class RedisCacheBackend(CacheBackend):
+    """A storage shared by all workers, bounded by the `maxmemory` policy of the Redis server."""
+
+    def __init__(self, url: str) -> None:
+        self.redis = Redis.from_url(url)
+
+    async def get_many(self, keys: Sequence[str]) -> list[bytes | None]:
+        try:
+            return await self.redis.mget(keys)
+        except (RedisError, OSError) as exc:
+            raise CacheBackendError(str(exc)) from exc
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        try:
+            await self.redis.set(key, value, px=int(ttl * 1000) if ttl is not None else None)
+        except (RedisError, OSError) as exc:
+            raise CacheBackendError(str(exc)) from exc
+
+    async def close(self) -> None:
+        await self.redis.close()
@@ -0,0 +1,193 @@
+"""The module contains the in-process grid index of building locations."""
+
+import asyncio
+import dataclasses
+import logging
+import math
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from src.config import settings
+from src.core.cache.catalog import VersionedCatalog
+from src.core.repository import BuildingsRepository, CatalogVersionsRepository
+from src.utils import EARTH_RADIUS_KM, bounding_box, get_logger
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed with BUILDING_INDEX_ENABLED
+    np = None
+
+logger = get_logger(__file__, log_level=logging.INFO)
+
+CATALOG_NAME = "buildings"
+
+# (address, latitude, longitude) of a changed building, None for a deleted one.
+BuildingLocation = tuple[str, float, float]
+
+
+def concatenate_ranges(starts: "np.ndarray", ends: "np.ndarray") -> "np.ndarray":
+    """Get the positions of all [start, end) ranges in a single array, without a Python loop over the ranges."""
+    lengths = ends - starts
+    return np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+
+
+def get_cell_rows(latitudes: Any, cell_degrees: float) -> Any:
+    rows = math.ceil(180 / cell_degrees)
+    return np.clip(np.floor((np.asarray(latitudes) + 90) / cell_degrees), 0, rows - 1).astype(np.int64)
+
+
+def get_cell_columns(longitudes: Any, cell_degrees: float) -> Any:
+    columns = math.ceil(360 / cell_degrees)
+    return np.clip(np.floor((np.asarray(longitudes) + 180) / cell_degrees), 0, columns - 1).astype(np.int64)
+
+
+def haversine_distances(
+    latitude: float, longitude: float, latitudes: "np.ndarray", longitudes: "np.ndarray"
+) -> "np.ndarray":
+    """Get the great-circle distances in kilometers from the point, the same formula as the SQL radius search."""
+    latitude_radians, latitudes_radians = math.radians(latitude), np.radians(latitudes)
+    haversine = (
+        np.sin((latitudes_radians - latitude_radians) / 2) ** 2
+        + math.cos(latitude_radians) * np.cos(latitudes_radians) * np.sin(np.radians(longitudes - longitude) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(haversine, 0.0, 1.0)))
+
+
+@dataclass(frozen=True)
+class BuildingGrid:
+    """An immutable view of the building locations sorted by grid cell.
+
+    The key of a cell is its row (latitude band, south to north) times the number of columns plus its
+    column (longitude band), so the cells of one row overlapping a box are a contiguous range of the
+    sorted keys. Buildings changed after the grid was built are kept in `overrides` and replace their
+    entries in the arrays, until the next reload rebuilds the grid.
+    """
+
+    version: int
+    cell_degrees: float
+    keys: "np.ndarray"
+    ids: "np.ndarray"
+    addresses: "np.ndarray"
+    latitudes: "np.ndarray"
+    longitudes: "np.ndarray"
+    overrides: dict[int, BuildingLocation | None] = dataclasses.field(default_factory=dict)
+    overridden_ids: "np.ndarray | None" = None
+
+    @property
+    def columns(self) -> int:
+        return math.ceil(360 / self.cell_degrees)
+
+    @classmethod
+    def build(
+        cls, version: int, cell_degrees: float, locations: Sequence[tuple[int, str, float, float]]
+    ) -> "BuildingGrid":
+        ids, addresses, latitudes, longitudes = zip(*locations) if locations else ((), (), (), ())
+        ids, addresses = np.array(ids, dtype=np.int64), np.array(addresses, dtype=object)
+        latitudes, longitudes = np.array(latitudes, dtype=np.float64), np.array(longitudes, dtype=np.float64)
+        columns = math.ceil(360 / cell_degrees)
+        keys = get_cell_rows(latitudes, cell_degrees) * columns + get_cell_columns(longitudes, cell_degrees)
+        order = np.lexsort((ids, keys))
+        return cls(
+            version=version,
+            cell_degrees=cell_degrees,
+            keys=keys[order],
+            ids=ids[order],
+            addresses=addresses[order],
+            latitudes=latitudes[order],
+            longitudes=longitudes[order],
+        )
+
+    def with_changes(self, version: int, changes: dict[int, BuildingLocation | None]) -> "BuildingGrid":
+        overrides = self.overrides | changes
+        overridden_ids = np.fromiter(overrides, dtype=np.int64, count=len(overrides))
+        return dataclasses.replace(self, version=version, overrides=overrides, overridden_ids=overridden_ids)
+
+    def get_by_radius(
+        self, latitude: float, longitude: float, radius_km: float, limit: int | None = None
+    ) -> list[dict[str, Any]]:
+        """Get the buildings in the radius ordered by distance and ID, as the rows of the SQL radius search."""
+        min_latitude, max_latitude, min_longitude, max_longitude = bounding_box(latitude, longitude, radius_km)
+        rows = np.arange(
+            get_cell_rows(min_latitude, self.cell_degrees), get_cell_rows(max_latitude, self.cell_degrees) + 1
+        )
+        if min_longitude is None:
+            first_column, last_column = 0, self.columns - 1
+        else:
+            first_column = get_cell_columns(min_longitude, self.cell_degrees)
+            last_column = get_cell_columns(max_longitude, self.cell_degrees)
+        starts = np.searchsorted(self.keys, rows * self.columns + first_column, side="left")
+        ends = np.searchsorted(self.keys, rows * self.columns + last_column, side="right")
+        positions = concatenate_ranges(starts, ends)
+        if self.overrides:
+            positions = positions[~np.isin(self.ids[positions], self.overridden_ids)]
+
+        ids, addresses = self.ids[positions], self.addresses[positions]
+        latitudes, longitudes = self.latitudes[positions], self.longitudes[positions]
+        changed = [(building_id, *location) for building_id, location in self.overrides.items() if location]
+        if changed:
+            changed_ids, changed_addresses, changed_latitudes, changed_longitudes = zip(*changed)
+            ids = np.concatenate((ids, np.array(changed_ids, dtype=np.int64)))
+            addresses = np.concatenate((addresses, np.array(changed_addresses, dtype=object)))
+            latitudes = np.concatenate((latitudes, np.array(changed_latitudes, dtype=np.float64)))
+            longitudes = np.concatenate((longitudes, np.array(changed_longitudes, dtype=np.float64)))
+
+        distances = haversine_distances(latitude, longitude, latitudes, longitudes)
+        inside = np.flatnonzero(distances <= radius_km)
+        if limit is not None and len(inside) > limit:
+            # Only the buildings up to the distance of the last returned one are sorted, ties included.
+            inside = inside[distances[inside] <= np.partition(distances[inside], limit - 1)[limit - 1]]
+        found = inside[np.lexsort((ids[inside], distances[inside]))][:limit]
+        return [
+            {"address": address, "latitude": building_latitude, "longitude": building_longitude, "id": building_id}
+            for address, building_latitude, building_longitude, building_id in zip(
+                addresses[found].tolist(), latitudes[found].tolist(), longitudes[found].tolist(), ids[found].tolist()
+            )
+        ]
+
+
+class BuildingIndex(VersionedCatalog):
+    """Keeps the locations of all buildings in the memory of the application process to serve radius searches.
+
+    Writes of this process are applied to the grid once committed, without waiting for a reload.
+    """
+
+    catalog_name = CATALOG_NAME
+    _grid: BuildingGrid | None = None
+
+    @property
+    def version(self) -> int | None:
+        return self._grid.version if self._grid else None
+
+    async def reload(self) -> None:
+        if np is None:
+            raise RuntimeError("BUILDING_INDEX_ENABLED requires numpy to be installed")
+        async with self._lock:
+            async with self.session_factory() as session:
+                version = await CatalogVersionsRepository(session).get_version(name=CATALOG_NAME)
+                locations = await BuildingsRepository(session).get_locations()
+            # Sorting releases the GIL, so a reload does not stall the requests served meanwhile.
+            self._grid = await asyncio.to_thread(
+                BuildingGrid.build,
+                version=version,
+                cell_degrees=settings.BUILDING_INDEX_CELL_DEGREES,
+                locations=locations,
+            )
+        logger.info(f"Building index loaded: {len(locations)} buildings, version {version}")
+
+    async def apply(self, version: int, changes: dict[int, BuildingLocation | None]) -> None:
+        """Apply the changes committed as the version, or reload when other changes were committed in between."""
+        grid = self._grid
+        if grid is None or version <= grid.version:
+            return None
+        if version != grid.version + 1 or len(grid.overrides) + len(changes) > settings.BUILDING_INDEX_MAX_OVERRIDES:
+            return await self.reload()
+        self._grid = grid.with_changes(version=version, changes=changes)
+
+    def get_by_radius(
+        self, latitude: float, longitude: float, radius_km: float, limit: int | None = None
+    ) -> list[dict[str, Any]]:
+        return self._grid.get_by_radius(latitude=latitude, longitude=longitude, radius_km=radius_km, limit=limit)
+
+
+building_index = BuildingIndex()
@@ -0,0 +1,52 @@
+"""The module contains the base of the in-process caches kept in sync through the catalog versions."""
+
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.db import async_session
+from src.core.repository import CatalogVersionsRepository
+from src.utils import get_logger
+
+logger = get_logger(__file__, log_level=logging.INFO)
+
+
+class VersionedCatalog:
+    """Keeps a copy of some tables in the memory of the application process.
+
+    Every write to the tables bumps the `catalog_name` counter in the `catalog_versions` table. `watch`
+    polls the counter and reloads the copy when it differs from the loaded version, so changes made by
+    other processes are picked up within the polling interval.
+    """
+
+    catalog_name: str
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] = async_session) -> None:
+        self.session_factory = session_factory
+        self._lock = asyncio.Lock()
+
+    @property
+    def version(self) -> int | None:
+        raise NotImplementedError
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.version is not None
+
+    async def reload(self) -> None:
+        raise NotImplementedError
+
+    async def refresh(self) -> None:
+        async with self.session_factory() as session:
+            version = await CatalogVersionsRepository(session).get_version(name=self.catalog_name)
+        if version != self.version:
+            await self.reload()
+
+    async def watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception(f"Refresh of the {self.catalog_name} catalog failed")
@@ -0,0 +1,257 @@
+"""The module contains the cache of service read results with tag-based invalidation."""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import secrets
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar, get_type_hints
+
+from prometheus_client import Counter, Histogram
+from pydantic import TypeAdapter
+
+from src.config import settings
+from src.core.cache.activities import activity_catalog
+from src.core.cache.backends import CacheBackend, CacheBackendError, MemoryCacheBackend, RedisCacheBackend
+from src.core.cache.catalog import VersionedCatalog
+from src.core.uow import primary_reads
+from src.utils import get_logger
+
+logger = get_logger(__file__, log_level=logging.INFO)
+
+AsyncFunc = TypeVar("AsyncFunc", bound=Callable[..., Awaitable[Any]])
+
+CACHE_REQUESTS = Counter(
+    "catalog_cache_requests_total",
+    "Cached service calls by result (hit, miss, coalesced, bypass).",
+    ["method", "result"],
+)
+CACHE_LATENCY = Histogram(
+    "catalog_cache_latency_seconds", "Duration of cached service calls by result.", ["method", "result"]
+)
+CACHE_INVALIDATIONS = Counter("catalog_cache_invalidations_total", "Invalidated cache tags.", ["tag"])
+CACHE_ERRORS = Counter("catalog_cache_backend_errors_total", "Failed cache backend operations.")
+
+
+ROUNDED_COORDINATES = {"latitude": settings.CACHE_COORDINATE_DIGITS, "longitude": settings.CACHE_COORDINATE_DIGITS}
+
+
+def build_backend() -> CacheBackend:
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCacheBackend(url=settings.CACHE_REDIS_URL)
+    return MemoryCacheBackend(max_entries=settings.CACHE_MAX_ENTRIES)
+
+
+class ResponseCache:
+    """A cache of service results keyed by the method, its arguments and the versions of its tags.
+
+    A tag names an entity (e.g. "buildings"); invalidating it replaces its version, so every entry computed
+    from the entity stops matching at once and ages out of the backend. Concurrent misses of the same key
+    in a process wait for a single computation instead of all hitting the database. The stored results are
+    always computed on the primary, the replicas serve the reads when the backend is unavailable.
+
+    The results read from an in-process catalog are only as fresh as the catalog, which may lag behind the
+    database, so the loaded version of the catalog named like a tag is also part of the key. An entry is
+    then never served by a process with another version of the catalog, nor after the catalog is reloaded.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl: float,
+        prefix: str = "catalog",
+        catalogs: tuple[VersionedCatalog, ...] = (),
+    ) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+        self.catalogs = {catalog.catalog_name: catalog for catalog in catalogs}
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._invalidators: dict[tuple[str, ...], Callable[[], Awaitable[None]]] = {}
+
+    async def get_tag_versions(self, tags: tuple[str, ...]) -> list[str]:
+        tag_keys = [f"{self.prefix}:tag:{tag}" for tag in tags]
+        versions = await self.backend.get_many(tag_keys)
+        result = []
+        for tag_key, version in zip(tag_keys, versions):
+            if version is None:
+                # A lost version must not bring back the entries stored under an older one.
+                version = secrets.token_hex(8).encode()
+                await self.backend.set(tag_key, version)
+            result.append(version.decode())
+        return result
+
+    def get_catalog_versions(self, tags: tuple[str, ...]) -> list[str]:
+        return [f"{tag}-{self.catalogs[tag].version}" for tag in tags if tag in self.catalogs]
+
+    async def invalidate(self, *tags: str) -> None:
+        for tag in tags:
+            try:
+                await self.backend.set(f"{self.prefix}:tag:{tag}", secrets.token_hex(8).encode())
+            except CacheBackendError:
+                CACHE_ERRORS.inc()
+                logger.exception(f"Cache tag {tag} was not invalidated")
+                continue
+            CACHE_INVALIDATIONS.labels(tag=tag).inc()
+
+    def invalidator(self, *tags: str) -> Callable[[], Awaitable[None]]:
+        """Get a callback invalidating the tags, the same object for the same tags."""
+        if tags not in self._invalidators:
+            self._invalidators[tags] = functools.partial(self.invalidate, *tags)
+        return self._invalidators[tags]
+
+    async def get_or_compute(
+        self,
+        method: str,
+        arguments: dict[str, Any],
+        tags: tuple[str, ...],
+        compute: Callable[[], Awaitable[Any]],
+        adapter: TypeAdapter,
+        ttl: float | None = None,
+    ) -> tuple[Any, str]:
+        """Get the cached result or compute and store it.
+
+        Returns:
+            The result and how it was obtained: "hit", "miss", "coalesced" with a concurrent miss
+            or "bypass" when the backend is unavailable.
+        """
+        try:
+            versions = await self.get_tag_versions(tags) + self.get_catalog_versions(tags)
+            key = self.build_key(method=method, arguments=arguments, versions=versions)
+            (cached,) = await self.backend.get_many([key])
+        except CacheBackendError:
+            CACHE_ERRORS.inc()
+            logger.warning(f"Cache is unavailable, {method} is served from the database")
+            return await compute(), "bypass"
+        if cached is not None:
+            return adapter.validate_json(cached), "hit"
+
+        coalesced, result = await self._wait_for_inflight(key)
+        if coalesced:
+            return result, "coalesced"
+        result = await self._compute(key=key, compute=compute)
+        await self._store(method=method, key=key, value=adapter.dump_json(result), ttl=ttl or self.ttl)
+        return result, "miss"
+
+    async def _wait_for_inflight(self, key: str) -> tuple[bool, Any]:
+        """Wait for the result of a concurrent miss of the key, if there is one that is not cancelled."""
+        while (future := self._inflight.get(key)) is not None:
+            try:
+                return True, await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+        return False, None
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Compute the result of a miss, sharing it with the concurrent misses of the key."""
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            # A replica may not have applied the write that just invalidated the tags yet, and what is read
+            # here is stored under their new versions, so the result is read from the primary.
+            with primary_reads():
+                result = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+        future.set_result(result)
+        return result
+
+    async def _store(self, method: str, key: str, value: bytes, ttl: float) -> None:
+        try:
+            await self.backend.set(key, value, ttl=ttl)
+        except CacheBackendError:
+            CACHE_ERRORS.inc()
+            logger.warning(f"Result of {method} was not cached")
+
+    def build_key(self, method: str, arguments: dict[str, Any], versions: list[str]) -> str:
+        arguments_hash = hashlib.sha1(json.dumps(arguments, sort_keys=True, default=str).encode()).hexdigest()
+        return f"{self.prefix}:{method}:{':'.join(versions)}:{arguments_hash}"
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+response_cache = ResponseCache(backend=build_backend(), ttl=settings.CACHE_TTL_SECONDS, catalogs=(activity_catalog,))
+
+
+def cached(
+    *tags: str, ttl: float | None = None, rounded: dict[str, int] | None = None
+) -> Callable[[AsyncFunc], AsyncFunc]:
+    """Cache the result of a service read method until one of the tags is invalidated or the TTL expires.
+
+    The result is stored as JSON and restored with the return annotation of the method.
+
+    Args:
+        tags: Entities the result is computed from.
+        ttl: Lifetime of the entries, CACHE_TTL_SECONDS by default.
+        rounded: Number of decimal digits to round the float arguments to, so that nearby coordinates
+            share an entry; the method is called with the rounded values.
+    """
+
+    def decorator(func: AsyncFunc) -> AsyncFunc:
+        signature = inspect.signature(func)
+        method = func.__qualname__
+        adapters: list[TypeAdapter] = []
+
+        @functools.wraps(func)
+        async def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            started_at = time.perf_counter()
+            if not settings.CACHE_ENABLED:
+                return await func(self, *args, **kwargs)
+
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            del arguments["self"]
+            for name, digits in (rounded or {}).items():
+                if arguments.get(name) is not None:
+                    arguments[name] = round(arguments[name], digits)
+            if not adapters:
+                adapters.append(TypeAdapter(get_type_hints(func)["return"]))
+
+            result, outcome = await response_cache.get_or_compute(
+                method=method,
+                arguments=arguments,
+                tags=tags,
+                compute=functools.partial(func, self, **arguments),
+                adapter=adapters[0],
+                ttl=ttl,
+            )
+            CACHE_REQUESTS.labels(method=method, result=outcome).inc()
+            CACHE_LATENCY.labels(method=method, result=outcome).observe(time.perf_counter() - started_at)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def invalidates(*tags: str) -> Callable[[AsyncFunc], AsyncFunc]:
+    """Invalidate the tags once the transaction of a service write method is committed.
+
+    The method runs in one unit of work block, so its own transactions are joined and the cache is
+    invalidated after the outermost one commits, never before the changes are visible.
+    """
+
+    def decorator(func: AsyncFunc) -> AsyncFunc:
+        @functools.wraps(func)
+        async def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            async with self.uow:
+                self.uow.call_after_commit(response_cache.invalidator(*tags))
+                return await func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
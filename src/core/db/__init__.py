@@ -1 +1 @@
-from .session import async_session
+from .session import async_session, get_read_session_factory
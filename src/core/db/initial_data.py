@@ -1,13 +1,17 @@
 import random
 
-from sqlalchemy import insert, select
+from sqlalchemy import func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.models import Activity, Building, Organization, OrganizationActivity
+from src.core.models import Activity, ActivityClosure, Building, Organization, OrganizationActivity
+
+# Key of the transaction-level advisory lock serializing the seeding of concurrently starting workers.
+SEED_LOCK_KEY = 0x5EED
 
 
 async def seed_data(session: AsyncSession) -> None:
-    result = await session.execute(select(Building))
+    await session.execute(select(func.pg_advisory_xact_lock(SEED_LOCK_KEY)))
+    result = await session.execute(select(Building.id).limit(1))
     if result.scalars().first():
         return None
 
@@ -44,6 +48,15 @@ async def seed_data(session: AsyncSession) -> None:
     all_activities = list(activities.values()) + list(nested_activities.values()) + [deep_nested]
     activity_map = {a.name: a for a in all_activities}
 
+    activity_parents = {a.id: a.parent_id for a in all_activities}
+    activity_closure_links = []
+    for activity_id in activity_parents:
+        ancestor_id, depth = activity_id, 0
+        while ancestor_id:
+            activity_closure_links.append({"ancestor_id": ancestor_id, "descendant_id": activity_id, "depth": depth})
+            ancestor_id, depth = activity_parents[ancestor_id], depth + 1
+    await session.execute(insert(ActivityClosure), activity_closure_links)
+
     organizations = [
         Organization(name=f"Organization {i}", phones=f"+7-900-000-00{i:02}", building_id=random.choice(buildings).id)
         for i in range(1, 21)
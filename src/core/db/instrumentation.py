@@ -0,0 +1,136 @@
+"""The module counts the queries, sessions and database time of code blocks and exports the pool state."""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from prometheus_client import REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import Session, SessionTransaction
+from sqlalchemy.pool import QueuePool
+
+from src.config import settings
+from src.core.db.session import async_engine, replica_engines
+
+
+class QueryBudgetExceeded(Exception):
+    """The block issued more queries than its budget allows."""
+
+
+@dataclass
+class QueryStats:
+    queries: int = 0
+    sessions: int = 0
+    db_time: float = 0.0
+    budget: int | None = None
+    # The counters of the enclosing block, which include the ones of this block.
+    parent: "QueryStats | None" = None
+
+    def chain(self) -> Iterator["QueryStats"]:
+        stats: QueryStats | None = self
+        while stats is not None:
+            yield stats
+            stats = stats.parent
+
+
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+
+@contextmanager
+def count_queries(budget: int | None = None) -> Iterator[QueryStats]:
+    """Count the queries issued inside the block, e.g. to assert the number of queries of a service method.
+
+    Blocks nest: the queries of an inner block, e.g. of a request served inside a test, also count in the
+    outer one.
+
+    Args:
+        budget: Maximum number of queries; with DB_QUERY_BUDGET_RAISE the query exceeding it raises
+            QueryBudgetExceeded.
+
+    Returns:
+        The counters, updated as the queries run.
+    """
+    stats = QueryStats(budget=budget, parent=current_query_stats.get())
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    stats = current_query_stats.get()
+    if stats is None:
+        return None
+    for block_stats in stats.chain():
+        block_stats.queries += 1
+    if settings.DB_QUERY_BUDGET_RAISE and stats.budget is not None and stats.queries > stats.budget:
+        raise QueryBudgetExceeded(f"Query {stats.queries} exceeds the budget of {stats.budget}: {statement}")
+    # Queries run one at a time on a connection, so a single start time per connection is enough.
+    conn.info["query_started_at"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn: Any, *args: Any) -> None:
+    stats = current_query_stats.get()
+    started_at = conn.info.pop("query_started_at", None)
+    if stats is not None and started_at is not None:
+        elapsed = time.perf_counter() - started_at
+        for block_stats in stats.chain():
+            block_stats.db_time += elapsed
+
+
+def _after_begin(session: Session, transaction: SessionTransaction, connection: Any) -> None:
+    stats = current_query_stats.get()
+    if stats is not None:
+        for block_stats in stats.chain():
+            block_stats.sessions += 1
+
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+for _engine in (async_engine, *replica_engines):
+    instrument_engine(_engine.sync_engine)
+event.listen(Session, "after_begin", _after_begin)
+
+
+class PoolCollector(Collector):
+    """Report the connections of the engine pools at scrape time.
+
+    The pool is exhausted when `checked_out` reaches `limit`; further checkouts wait up to DB_POOL_TIMEOUT,
+    which shows in `catalog_db_pool_checkout_seconds`.
+    """
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        metrics = {
+            "size": GaugeMetricFamily("catalog_db_pool_size", "Connections kept open by the pool.", labels=["engine"]),
+            "limit": GaugeMetricFamily(
+                "catalog_db_pool_limit", "Maximum connections of the pool, including overflow.", labels=["engine"]
+            ),
+            "checked_out": GaugeMetricFamily("catalog_db_pool_checked_out", "Connections in use.", labels=["engine"]),
+            "checked_in": GaugeMetricFamily("catalog_db_pool_checked_in", "Idle connections.", labels=["engine"]),
+            "overflow": GaugeMetricFamily(
+                "catalog_db_pool_overflow", "Connections open beyond the pool size.", labels=["engine"]
+            ),
+        }
+        for engine in (async_engine, *replica_engines):
+            pool = engine.pool
+            if not isinstance(pool, QueuePool):
+                continue
+            labels = [pool.logging_name]
+            metrics["size"].add_metric(labels, pool.size())
+            metrics["limit"].add_metric(labels, pool.size() + settings.DB_MAX_OVERFLOW)
+            metrics["checked_out"].add_metric(labels, pool.checkedout())
+            metrics["checked_in"].add_metric(labels, pool.checkedin())
+            metrics["overflow"].add_metric(labels, max(pool.overflow(), 0))
+        yield from metrics.values()
+
+
+REGISTRY.register(PoolCollector())
@@ -0,0 +1,24 @@
+"""The module contains the connection pool observing the time spent waiting for connections."""
+
+import time
+
+from prometheus_client import Histogram
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+POOL_CHECKOUT_TIME = Histogram(
+    "catalog_db_pool_checkout_seconds",
+    "Time to check a connection out of the pool, including waiting for a free one and connecting.",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """A queue pool recording the checkout time labeled by the `pool_logging_name` of the engine."""
+
+    def connect(self) -> PoolProxiedConnection:
+        started_at = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            POOL_CHECKOUT_TIME.labels(engine=self.logging_name).observe(time.perf_counter() - started_at)
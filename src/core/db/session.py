@@ -1,14 +1,89 @@
 from __future__ import annotations
 
-from typing import AsyncGenerator
+import asyncio
+import itertools
+import os
+from typing import Any, AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import NullPool, QueuePool
 
 from src.config import settings
+from src.core.db.pool import TimedAsyncAdaptedQueuePool
 
-async_engine = create_async_engine(url=settings.DB_URL, echo=True)
+
+def get_engine_options(name: str) -> dict[str, Any]:
+    options = {
+        "echo": settings.DB_ECHO,
+        # Labels the pool metrics of the engine.
+        "pool_logging_name": name,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "connect_args": {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+    }
+    if settings.DB_USE_NULL_POOL:
+        options["poolclass"] = NullPool
+    else:
+        options["poolclass"] = TimedAsyncAdaptedQueuePool
+        options["pool_size"] = settings.DB_POOL_SIZE
+        options["max_overflow"] = settings.DB_MAX_OVERFLOW
+        options["pool_timeout"] = settings.DB_POOL_TIMEOUT
+    return options
+
+
+async_engine = create_async_engine(url=settings.DB_URL, **get_engine_options(name="primary"))
 async_session = async_sessionmaker(async_engine, expire_on_commit=False)
 
+replica_engines = [
+    create_async_engine(url=url, **get_engine_options(name=f"replica{number}"))
+    for number, url in enumerate(settings.DB_REPLICA_URLS, start=1)
+]
+replica_sessions = [async_sessionmaker(engine, expire_on_commit=False) for engine in replica_engines]
+_replica_sessions_cycle = itertools.cycle(replica_sessions)
+
+
+def _dispose_inherited_connections() -> None:
+    """Forget the pooled connections of the parent process in a forked child without closing them.
+
+    The parent still uses those sockets, so the child must open its own connections instead.
+    """
+    for engine in (async_engine, *replica_engines):
+        engine.sync_engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_dispose_inherited_connections)
+
+
+async def warm_up_engine(engine: AsyncEngine, connections: int) -> None:
+    """Open pooled connections up front, so that the first requests do not wait for connecting."""
+    if not isinstance(engine.pool, QueuePool) or connections <= 0:
+        return None
+    # All connections are held until every one is open, otherwise the pool would hand out the same one again.
+    results = await asyncio.gather(*(engine.connect().start() for _ in range(connections)), return_exceptions=True)
+    await asyncio.gather(*(result.close() for result in results if isinstance(result, AsyncConnection)))
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+async def warm_up_engines(connections: int) -> None:
+    await asyncio.gather(*(warm_up_engine(engine, connections) for engine in (async_engine, *replica_engines)))
+
+
+def get_read_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Get the next replica session factory in round-robin order, or the primary one without replicas."""
+    return next(_replica_sessions_cycle) if replica_sessions else async_session
+
 
 async def get_async_connection() -> AsyncGenerator[AsyncConnection, None]:
     async with async_engine.begin() as conn:
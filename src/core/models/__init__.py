@@ -1,4 +1,5 @@
-from .activities import Activity
+from .activities import Activity, ActivityClosure
 from .base import BaseModel
 from .buildings import Building
 from .organizations import Organization, OrganizationActivity
+from .versions import CatalogVersion
@@ -1,5 +1,7 @@
+from datetime import datetime
+
 import sqlalchemy.orm as so
-from sqlalchemy import ForeignKey
+from sqlalchemy import DateTime, ForeignKey, UniqueConstraint, func
 
 from src.core.models.base import BaseModel
 from src.core.schemas import Activity as ActivitySchema
@@ -7,10 +9,14 @@ from src.core.schemas import Activity as ActivitySchema
 
 class Activity(BaseModel):
     __tablename__ = "activities"
+    __table_args__ = (UniqueConstraint("name", name="uq_activities_name"),)
 
     id: so.Mapped[int] = so.mapped_column(primary_key=True, index=True)
     name: so.Mapped[str] = so.mapped_column(nullable=False)
-    parent_id: so.Mapped[int] = so.mapped_column(ForeignKey("activities.id"), nullable=True)
+    parent_id: so.Mapped[int] = so.mapped_column(ForeignKey("activities.id"), nullable=True, index=True)
+    updated_at: so.Mapped[datetime] = so.mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
     parent: so.Mapped["Activity"] = so.relationship(remote_side=[id], backref="subactivities")
 
     def to_pydantic_schema(self) -> ActivitySchema:
@@ -19,3 +25,13 @@ class Activity(BaseModel):
             name=self.name,
             parent_id=self.parent_id,
         )
+
+
+class ActivityClosure(BaseModel):
+    __tablename__ = "activity_closure"
+
+    ancestor_id: so.Mapped[int] = so.mapped_column(ForeignKey("activities.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id: so.Mapped[int] = so.mapped_column(
+        ForeignKey("activities.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    depth: so.Mapped[int] = so.mapped_column(nullable=False)
@@ -1,4 +1,7 @@
+from datetime import datetime
+
 import sqlalchemy.orm as so
+from sqlalchemy import DateTime, Index, func
 
 from src.core.models.base import BaseModel
 from src.core.schemas import Building as BuildingSchema
@@ -6,11 +9,15 @@ from src.core.schemas import Building as BuildingSchema
 
 class Building(BaseModel):
     __tablename__ = "buildings"
+    __table_args__ = (Index("ix_buildings_latitude_longitude", "latitude", "longitude"),)
 
     id: so.Mapped[int] = so.mapped_column(primary_key=True, index=True)
     address: so.Mapped[str] = so.mapped_column(nullable=False)
     latitude: so.Mapped[float] = so.mapped_column(nullable=False)
     longitude: so.Mapped[float] = so.mapped_column(nullable=False)
+    updated_at: so.Mapped[datetime] = so.mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
 
     def to_pydantic_schema(self) -> BuildingSchema:
         return BuildingSchema(
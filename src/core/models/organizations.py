@@ -1,7 +1,8 @@
+from datetime import datetime
 from typing import Optional
 
 import sqlalchemy.orm as so
-from sqlalchemy import ForeignKey
+from sqlalchemy import DateTime, ForeignKey, Index, func
 
 from src.core.models.base import BaseModel
 from src.core.schemas import Organization as OrganizationSchema
@@ -14,16 +15,24 @@ class OrganizationActivity(BaseModel):
     organization_id: so.Mapped[int] = so.mapped_column(
         ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True
     )
-    activity_id: so.Mapped[int] = so.mapped_column(ForeignKey("activities.id", ondelete="CASCADE"), primary_key=True)
+    activity_id: so.Mapped[int] = so.mapped_column(
+        ForeignKey("activities.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
 
 
 class Organization(BaseModel):
     __tablename__ = "organizations"
+    __table_args__ = (
+        Index("ix_organizations_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
 
     id: so.Mapped[int] = so.mapped_column(primary_key=True, index=True)
     name: so.Mapped[str] = so.mapped_column(nullable=False)
     phones: so.Mapped[str] = so.mapped_column(nullable=False)
-    building_id: so.Mapped[int] = so.mapped_column(ForeignKey("buildings.id"), nullable=True)
+    building_id: so.Mapped[int] = so.mapped_column(ForeignKey("buildings.id"), nullable=True, index=True)
+    updated_at: so.Mapped[datetime] = so.mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
     building: so.Mapped["Building"] = so.relationship()
     activities: so.Mapped[list["Activity"]] = so.relationship(
         secondary="organization_activity", backref="organizations"
@@ -41,3 +50,6 @@ class Organization(BaseModel):
             address=address,
             activities=activities,
         )
+
+
+Index("ix_organizations_name_prefix", func.lower(Organization.name).collate("C"))
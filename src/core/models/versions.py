@@ -0,0 +1,10 @@
+import sqlalchemy.orm as so
+
+from src.core.models.base import BaseModel
+
+
+class CatalogVersion(BaseModel):
+    __tablename__ = "catalog_versions"
+
+    name: so.Mapped[str] = so.mapped_column(primary_key=True)
+    version: so.Mapped[int] = so.mapped_column(nullable=False, default=0)
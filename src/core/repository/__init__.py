@@ -1,3 +1,4 @@
 from .activities import ActivitiesRepository
 from .buildings import BuildingsRepository
-from .organizations import OrganizationsRepository
+from .organizations import OrganizationSearch, OrganizationsRepository
+from .versions import CatalogVersionsRepository
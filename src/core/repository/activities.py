@@ -1,7 +1,8 @@
-from sqlalchemy import select
+from sqlalchemy import delete, exists, func, insert, literal, select, union_all
+from sqlalchemy.orm import aliased
 
-from src.core.models import Activity
-from src.core.repository.repository import SqlAlchemyRepository
+from src.core.models import Activity, ActivityClosure
+from src.core.repository.repository import SqlAlchemyRepository, copy_records_to_table
 
 
 class ActivitiesRepository(SqlAlchemyRepository):
@@ -12,15 +13,96 @@ class ActivitiesRepository(SqlAlchemyRepository):
         result = await self.session.execute(query)
         return [row[0] for row in result.all()]
 
+    async def get_name_to_id(self, names: list[str]) -> dict[str, int]:
+        query = select(self.model.name, self.model.id).where(self.model.name.in_(names))
+        result = await self.session.execute(query)
+        return dict(result.tuples().all())
+
+    async def get_ancestor_links(self, activity_ids: list[int]) -> dict[int, list[tuple[int, int]]]:
+        """Get (ancestor ID, depth) pairs of the activities, including the activity itself at depth 0."""
+        query = select(ActivityClosure.descendant_id, ActivityClosure.ancestor_id, ActivityClosure.depth).where(
+            ActivityClosure.descendant_id.in_(activity_ids)
+        )
+        result = await self.session.execute(query)
+        ancestor_links = {activity_id: [] for activity_id in activity_ids}
+        for descendant_id, ancestor_id, depth in result.tuples():
+            ancestor_links[descendant_id].append((ancestor_id, depth))
+        return ancestor_links
+
+    async def get_subtree_ids(self, activity_name: str) -> list[int]:
+        """Get the IDs of the activities with the name and all of their sub-activities."""
+        query = (
+            select(ActivityClosure.descendant_id)
+            .join(self.model, self.model.id == ActivityClosure.ancestor_id)
+            .where(self.model.name == activity_name)
+            .distinct()
+        )
+        result = await self.session.execute(query)
+        return sorted(result.scalars().all())
+
+    async def get_ids_with_subactivities(self, activity_ids: list[int]) -> set[int]:
+        """Get the activities having sub-activities outside the given ones."""
+        query = (
+            select(self.model.parent_id)
+            .where(self.model.parent_id.in_(activity_ids), self.model.id.not_in(activity_ids))
+            .distinct()
+        )
+        result = await self.session.execute(query)
+        return set(result.scalars().all())
+
     async def get_activity_level(self, activity_id: int) -> int:
-        level = 1
-        current_id = activity_id
+        """Get the depth of the activity counting from 1 for root activities, 0 if it does not exist."""
+        query = select(func.count()).select_from(ActivityClosure).where(ActivityClosure.descendant_id == activity_id)
+        result = await self.session.execute(query)
+        return result.scalar_one()
+
+    async def get_subtree_height(self, activity_id: int) -> int:
+        """Get the number of levels below the activity, 0 for activities without sub-activities."""
+        query = select(func.coalesce(func.max(ActivityClosure.depth), 0)).where(
+            ActivityClosure.ancestor_id == activity_id
+        )
+        result = await self.session.execute(query)
+        return result.scalar_one()
+
+    async def is_in_subtree(self, ancestor_id: int, activity_id: int) -> bool:
+        query = select(
+            exists().where(ActivityClosure.ancestor_id == ancestor_id, ActivityClosure.descendant_id == activity_id)
+        )
+        result = await self.session.execute(query)
+        return result.scalar_one()
+
+    async def add_to_hierarchy(self, activity_id: int, parent_id: int | None) -> None:
+        self_link = select(literal(activity_id), literal(activity_id), literal(0))
+        ancestor_links = select(ActivityClosure.ancestor_id, literal(activity_id), ActivityClosure.depth + 1).where(
+            ActivityClosure.descendant_id == parent_id
+        )
+        query = insert(ActivityClosure).from_select(
+            ["ancestor_id", "descendant_id", "depth"], union_all(self_link, ancestor_links)
+        )
+        await self.session.execute(query)
+
+    async def copy_hierarchy_records(self, records: list[tuple[int, int, int]]) -> None:
+        """Insert (ancestor ID, descendant ID, depth) closure records with COPY."""
+        await copy_records_to_table(
+            self.session,
+            ActivityClosure.__tablename__,
+            columns=("ancestor_id", "descendant_id", "depth"),
+            records=records,
+        )
 
-        while current_id:
-            result = await self.session.execute(select(Activity.parent_id).where(Activity.id == current_id))
-            parent_id = result.scalar_one_or_none()
-            current_id = parent_id
-            if current_id:
-                level += 1
+    async def move_in_hierarchy(self, activity_id: int, parent_id: int | None) -> None:
+        subtree = select(ActivityClosure.descendant_id).where(ActivityClosure.ancestor_id == activity_id)
+        detach_query = delete(ActivityClosure).where(
+            ActivityClosure.descendant_id.in_(subtree), ActivityClosure.ancestor_id.not_in(subtree)
+        )
+        await self.session.execute(detach_query)
+        if not parent_id:
+            return None
 
-        return level
+        parent_links = aliased(ActivityClosure)
+        subtree_links = aliased(ActivityClosure)
+        attach_links = select(
+            parent_links.ancestor_id, subtree_links.descendant_id, parent_links.depth + subtree_links.depth + 1
+        ).where(parent_links.descendant_id == parent_id, subtree_links.ancestor_id == activity_id)
+        attach_query = insert(ActivityClosure).from_select(["ancestor_id", "descendant_id", "depth"], attach_links)
+        await self.session.execute(attach_query)
@@ -1,31 +1,94 @@
+import functools
 from typing import Sequence
 
-from sqlalchemy import func, select
+from sqlalchemy import ColumnElement, Float, Integer, Row, RowMapping, Select, bindparam, func, select
 
 from src.core.models import Building
-from src.core.repository.repository import SqlAlchemyRepository
+from src.core.repository.repository import (
+    Projection,
+    SqlAlchemyRepository,
+    projection_columns,
+    select_columns,
+)
+from src.utils import EARTH_RADIUS_KM, bounding_box
+
+
+def haversine_distance(
+    latitude: float | ColumnElement[float], longitude: float | ColumnElement[float]
+) -> ColumnElement[float]:
+    """Build the great-circle distance in kilometers from the given point to a building."""
+    latitude_term = func.pow(func.sin(func.radians((Building.latitude - latitude) / 2)), 2)
+    longitude_term = func.pow(func.sin(func.radians((Building.longitude - longitude) / 2)), 2)
+    latitudes_cos = func.cos(func.radians(latitude)) * func.cos(func.radians(Building.latitude))
+    return EARTH_RADIUS_KM * 2 * func.asin(func.sqrt(latitude_term + latitudes_cos * longitude_term))
+
+
+DISTANCE_KM = haversine_distance(
+    latitude=bindparam("latitude", type_=Float), longitude=bindparam("longitude", type_=Float)
+)
+# The bounding box conditions are served by the (latitude, longitude) index, so the exact
+# haversine distance is only evaluated for the candidates inside the box.
+WITHIN_RADIUS = (
+    Building.latitude.between(bindparam("min_latitude", type_=Float), bindparam("max_latitude", type_=Float)),
+    Building.longitude.between(bindparam("min_longitude", type_=Float), bindparam("max_longitude", type_=Float)),
+    DISTANCE_KM <= bindparam("radius_km", type_=Float),
+)
+
+
+def radius_parameters(latitude: float, longitude: float, radius_km: float) -> dict[str, float]:
+    """Get the values of the parameters of DISTANCE_KM and WITHIN_RADIUS.
+
+    A circle touching a pole or crossing the antimeridian does not bound the longitude, so the
+    box then spans all longitudes.
+    """
+    min_latitude, max_latitude, min_longitude, max_longitude = bounding_box(latitude, longitude, radius_km)
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "radius_km": radius_km,
+        "min_latitude": min_latitude,
+        "max_latitude": max_latitude,
+        "min_longitude": -180.0 if min_longitude is None else min_longitude,
+        "max_longitude": 180.0 if max_longitude is None else max_longitude,
+    }
+
+
+@functools.cache
+def buildings_by_radius_statement(columns: tuple[str, ...] | None) -> Select:
+    return (
+        select_columns(Building, columns)
+        .where(*WITHIN_RADIUS)
+        .order_by(DISTANCE_KM, Building.id)
+        .limit(bindparam("limit", type_=Integer))
+    )
 
 
 class BuildingsRepository(SqlAlchemyRepository):
     model = Building
 
-    async def get_buildings_by_radius(self, latitude: float, longitude: float, radius_km: float) -> Sequence[Building]:
-        earth_radius_km = 6371
-
-        haversine_distance = (
-            earth_radius_km
-            * 2
-            * func.asin(
-                func.sqrt(
-                    func.pow(func.sin(func.radians((self.model.latitude - latitude) / 2)), 2)
-                    + func.cos(func.radians(latitude))
-                    * func.cos(func.radians(self.model.latitude))
-                    * func.pow(func.sin(func.radians((self.model.longitude - longitude) / 2)), 2)
-                )
-            )
-        )
+    async def get_buildings_by_radius(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        limit: int | None = None,
+        projection: Projection | None = None,
+    ) -> Sequence[Building | RowMapping]:
+        query = buildings_by_radius_statement(projection_columns(projection))
+        params = radius_parameters(latitude=latitude, longitude=longitude, radius_km=radius_km) | {"limit": limit}
+        return await self.fetch_all(query, projection, params)
 
-        query = select(self.model).where(haversine_distance <= radius_km)
+    async def get_locations(self) -> Sequence[Row]:
+        """Get (ID, address, latitude, longitude) of all buildings."""
+        query = select(self.model.id, self.model.address, self.model.latitude, self.model.longitude)
+        result = await self.session.execute(query)
+        return result.all()
+
+    async def get_ids_by_addresses(self, addresses: list[str]) -> dict[str, int]:
+        query = (
+            select(self.model.address, func.min(self.model.id))
+            .where(self.model.address.in_(addresses))
+            .group_by(self.model.address)
+        )
         result = await self.session.execute(query)
-        buildings = result.scalars().all()
-        return buildings
+        return dict(result.tuples().all())
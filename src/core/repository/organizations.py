@@ -1,10 +1,209 @@
-from typing import Sequence
+import functools
+import math
+from dataclasses import dataclass
+from typing import Any, Sequence
 
-from sqlalchemy import insert, select
-from sqlalchemy.orm import aliased, joinedload, selectinload
+from sqlalchemy import Integer, Row, RowMapping, Select, String, any_, bindparam, func, insert, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlalchemy.orm import joinedload
 
-from src.core.models import Activity, Organization, OrganizationActivity
-from src.core.repository.repository import SqlAlchemyRepository
+from src.config import settings
+from src.core.models import Activity, ActivityClosure, Building, Organization, OrganizationActivity
+from src.core.repository.buildings import DISTANCE_KM, WITHIN_RADIUS, radius_parameters
+from src.core.repository.repository import (
+    Projection,
+    SqlAlchemyRepository,
+    copy_records_to_table,
+    projection_columns,
+    select_columns,
+)
+from src.utils import EARTH_RADIUS_KM
+
+LIMIT = bindparam("limit", type_=Integer)
+# A case-insensitive substring filter on the organization name, served by the trigram index.
+NAME_CONTAINS = Organization.name.ilike(bindparam("name_pattern", type_=String), escape="\\")
+NAME_KEY = func.lower(Organization.name).collate("C")
+# Organizations linked to any of the activities, e.g. those of an activity subtree.
+WITH_ACTIVITIES = Organization.id.in_(
+    select(OrganizationActivity.organization_id).where(
+        OrganizationActivity.activity_id == any_(bindparam("activity_ids", type_=ARRAY(Integer)))
+    )
+)
+# Half the circumference of the Earth, no point is farther away.
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+
+@dataclass
+class OrganizationSearch:
+    """Filters of an organization search combined with AND; the filters left as None are not applied.
+
+    `box` is (min_latitude, max_latitude, min_longitude, max_longitude) and is an alternative to the
+    radius given by `latitude`, `longitude` and `radius_km`.
+    """
+
+    name: str | None = None
+    activity_ids: list[int] | None = None
+    building_id: int | None = None
+    latitude: float | None = None
+    longitude: float | None = None
+    radius_km: float | None = None
+    box: tuple[float, float, float, float] | None = None
+
+    @property
+    def applied(self) -> tuple[bool, bool, bool, bool, bool]:
+        """Get the flags of the applied filters, the key of the cached statements."""
+        return (
+            self.name is not None,
+            self.activity_ids is not None,
+            self.building_id is not None,
+            self.radius_km is not None,
+            self.box is not None,
+        )
+
+    def parameters(self) -> dict[str, Any]:
+        params: dict[str, Any] = {"activity_ids": self.activity_ids, "building_id": self.building_id}
+        if self.name is not None:
+            params["name_pattern"] = contains_pattern(self.name)
+        if self.radius_km is not None:
+            params |= radius_parameters(latitude=self.latitude, longitude=self.longitude, radius_km=self.radius_km)
+        elif self.box is not None:
+            params |= dict(zip(("min_latitude", "max_latitude", "min_longitude", "max_longitude"), self.box))
+        return params
+
+
+ORGANIZATION_WITH_ACTIVITIES_AND_ADDRESS = (
+    select(Organization)
+    .options(joinedload(Organization.activities), joinedload(Organization.building))
+    .where(Organization.id == bindparam("organization_id", type_=Integer))
+)
+
+
+def contains_pattern(name: str) -> str:
+    """Get the value of the NAME_CONTAINS parameter matching names that contain the text."""
+    escaped_name = name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped_name}%"
+
+
+@functools.cache
+def organizations_by_activity_name_statement(columns: tuple[str, ...] | None) -> Select:
+    return (
+        select_columns(Organization, columns)
+        .join(Organization.activities)
+        .where(Activity.name == bindparam("activity_name", type_=String))
+    )
+
+
+@functools.cache
+def organizations_by_name_statement(columns: tuple[str, ...] | None) -> Select:
+    return select_columns(Organization, columns).where(NAME_CONTAINS).limit(LIMIT)
+
+
+@functools.cache
+def organizations_by_similar_name_statement(columns: tuple[str, ...] | None) -> Select:
+    name = bindparam("name", type_=String)
+    return (
+        select_columns(Organization, columns)
+        .where(or_(Organization.name.op("%")(name), NAME_CONTAINS))
+        .order_by(func.similarity(Organization.name, name).desc(), Organization.id)
+        .limit(LIMIT)
+    )
+
+
+@functools.cache
+def organizations_by_name_prefix_statement(columns: tuple[str, ...] | None, bounded: bool) -> Select:
+    query = (
+        select_columns(Organization, columns)
+        .where(NAME_KEY >= bindparam("lower_bound", type_=String))
+        .order_by(NAME_KEY, Organization.id)
+        .limit(LIMIT)
+    )
+    if bounded:
+        query = query.where(NAME_KEY < bindparam("upper_bound", type_=String))
+    return query
+
+
+@functools.cache
+def organizations_by_activity_tree_statement(columns: tuple[str, ...] | None) -> Select:
+    activity_tree = (
+        select(ActivityClosure.descendant_id)
+        .join(Activity, Activity.id == ActivityClosure.ancestor_id)
+        .where(Activity.name == bindparam("activity_name", type_=String))
+    )
+    organization_ids = select(OrganizationActivity.organization_id).where(
+        OrganizationActivity.activity_id.in_(activity_tree)
+    )
+    return select_columns(Organization, columns).where(Organization.id.in_(organization_ids))
+
+
+@functools.cache
+def organizations_by_activity_ids_statement(columns: tuple[str, ...] | None) -> Select:
+    # `= ANY(array)` keeps a single SQL text for any number of IDs, unlike an expanding IN list.
+    return select_columns(Organization, columns).where(WITH_ACTIVITIES)
+
+
+@functools.cache
+def organizations_by_radius_statement(columns: tuple[str, ...] | None, with_location: bool, paged: bool) -> Select:
+    query = select_columns(Organization, columns)
+    if with_location:
+        query = query.add_columns(Building.address, DISTANCE_KM.label("distance_km"))
+    query = (
+        query.join(Building, Organization.building_id == Building.id)
+        .where(*WITHIN_RADIUS)
+        .order_by(Organization.id)
+        .limit(LIMIT)
+    )
+    if paged:
+        query = query.where(Organization.id > bindparam("after_id", type_=Integer))
+    return query
+
+
+def filter_organizations(
+    query: Select, by_name: bool, by_activities: bool, by_building: bool, by_radius: bool, by_box: bool
+) -> Select:
+    """Add the conditions of the applied OrganizationSearch filters to a query selecting organizations."""
+    if by_name:
+        query = query.where(NAME_CONTAINS)
+    if by_activities:
+        query = query.where(WITH_ACTIVITIES)
+    if by_building:
+        query = query.where(Organization.building_id == bindparam("building_id", type_=Integer))
+    if by_radius or by_box:
+        # The box alone is the first two conditions of the radius search, with the same parameters.
+        location = WITHIN_RADIUS if by_radius else WITHIN_RADIUS[:2]
+        query = query.join(Building, Organization.building_id == Building.id).where(*location)
+    return query
+
+
+@functools.cache
+def organizations_search_statement(columns: tuple[str, ...] | None, applied: tuple[bool, ...], paged: bool) -> Select:
+    query = filter_organizations(select_columns(Organization, columns), *applied).order_by(Organization.id).limit(LIMIT)
+    if paged:
+        query = query.where(Organization.id > bindparam("after_id", type_=Integer))
+    return query
+
+
+@functools.cache
+def activity_facets_statement(applied: tuple[bool, ...]) -> Select:
+    organization_ids = filter_organizations(select(Organization.id), *applied)
+    # The closure links every activity to its top-level ancestor, including a top-level activity to itself.
+    count = func.count(OrganizationActivity.organization_id.distinct()).label("count")
+    to_closure = ActivityClosure.descendant_id == OrganizationActivity.activity_id
+    to_ancestor = Activity.id == ActivityClosure.ancestor_id
+    activity_counts = select(Activity.id.label("activity_id"), Activity.name, count).select_from(OrganizationActivity)
+    top_level_activities = activity_counts.join(ActivityClosure, to_closure).join(Activity, to_ancestor)
+    matching = (Activity.parent_id.is_(None), OrganizationActivity.organization_id.in_(organization_ids))
+    return top_level_activities.where(*matching).group_by(Activity.id).order_by(count.desc(), Activity.id)
+
+
+@functools.cache
+def nearest_organizations_statement(columns: tuple[str, ...] | None, by_activities: bool) -> Select:
+    distance_km = DISTANCE_KM.label("distance_km")
+    with_building = select_columns(Organization, columns).add_columns(Building.address, distance_km)
+    in_circle = with_building.join(Building, Organization.building_id == Building.id).where(*WITHIN_RADIUS)
+    query = in_circle.order_by(distance_km, Organization.id).limit(LIMIT)
+    if by_activities:
+        query = query.where(WITH_ACTIVITIES)
+    return query
 
 
 class OrganizationsRepository(SqlAlchemyRepository):
@@ -16,51 +215,168 @@ class OrganizationsRepository(SqlAlchemyRepository):
         )
         await self.session.execute(query)
 
-    async def get_organization_with_activities_and_address(self, organization_id: int) -> Organization | None:
+    async def copy_activity_links(self, records: list[tuple[int, int]]) -> None:
+        """Insert (organization ID, activity ID) links with COPY."""
+        await copy_records_to_table(
+            self.session,
+            OrganizationActivity.__tablename__,
+            columns=("organization_id", "activity_id"),
+            records=records,
+        )
+
+    async def get_used_building_ids(self, building_ids: list[int]) -> set[int]:
+        query = select(self.model.building_id).where(self.model.building_id.in_(building_ids)).distinct()
+        result = await self.session.execute(query)
+        return set(result.scalars().all())
+
+    async def get_organization_version(self, organization_id: int) -> str | None:
+        """Get a fingerprint of the detailed organization from the update times of it, its building and activities."""
+        activities_fingerprint = func.string_agg(
+            func.concat(Activity.id, ":", Activity.updated_at), aggregate_order_by(",", Activity.id)
+        )
         query = (
-            select(self.model)
-            .options(joinedload(self.model.activities), joinedload(Organization.building))
+            select(func.concat_ws("|", self.model.updated_at, Building.updated_at, activities_fingerprint))
+            .join(Building, self.model.building_id == Building.id)
+            .outerjoin(OrganizationActivity, OrganizationActivity.organization_id == self.model.id)
+            .outerjoin(Activity, Activity.id == OrganizationActivity.activity_id)
             .where(self.model.id == organization_id)
+            .group_by(self.model.id, Building.id)
         )
         result = await self.session.execute(query)
-        result = result.unique()
         return result.scalar_one_or_none()
 
-    async def get_organizations_by_activity_name(self, activity_name: str) -> Sequence[Organization]:
-        query = (
-            select(self.model)
-            .join(self.model.activities)
-            .filter(Activity.name == activity_name)
-            .options(selectinload(Organization.activities))
+    async def get_organization_with_activities_and_address(self, organization_id: int) -> Organization | None:
+        result = await self.session.execute(
+            ORGANIZATION_WITH_ACTIVITIES_AND_ADDRESS, {"organization_id": organization_id}
         )
-        result = await self.session.execute(query)
-        return result.scalars().all()
+        result = result.unique()
+        return result.scalar_one_or_none()
 
-    async def get_organizations_by_name(self, name: str) -> Sequence[Organization]:
-        query = select(Organization).where(Organization.name.ilike(f"%{name}%"))
-        result = await self.session.execute(query)
-        return result.scalars().all()
+    async def get_organizations_by_activity_name(
+        self, activity_name: str, projection: Projection | None = None
+    ) -> Sequence[Organization | RowMapping]:
+        query = organizations_by_activity_name_statement(projection_columns(projection))
+        return await self.fetch_all(query, projection, {"activity_name": activity_name})
 
-    async def get_organizations_by_activity_tree(self, activity_name: str) -> Sequence[Organization]:
-        a = aliased(Activity)
+    async def get_organizations_by_name(
+        self, name: str, limit: int | None = None, projection: Projection | None = None
+    ) -> Sequence[Organization | RowMapping]:
+        query = organizations_by_name_statement(projection_columns(projection))
+        return await self.fetch_all(query, projection, {"name_pattern": contains_pattern(name), "limit": limit})
 
-        activity_tree = (
-            select(Activity.id, Activity.parent_id, Activity.name)
-            .where(Activity.name == activity_name)
-            .cte(name="activity_tree", recursive=True)
-        )
+    async def search_organizations_by_name(
+        self, name: str, limit: int, projection: Projection | None = None
+    ) -> Sequence[Organization | RowMapping]:
+        """Get organizations with names similar to or containing the text, the most similar first."""
+        query = organizations_by_similar_name_statement(projection_columns(projection))
+        params = {"name": name, "name_pattern": contains_pattern(name), "limit": limit}
+        return await self.fetch_all(query, projection, params)
 
-        activity_alias = aliased(activity_tree)
+    async def get_organizations_by_name_prefix(
+        self, prefix: str, limit: int, projection: Projection | None = None
+    ) -> Sequence[Organization | RowMapping]:
+        """Get organizations with names starting with the prefix in alphabetical order.
 
-        activity_tree = activity_tree.union_all(
-            select(a.id, a.parent_id, a.name).where(a.parent_id == activity_alias.c.id)
-        )
+        The range conditions and the ordering match the `lower(name) COLLATE "C"` index, so the
+        query stops reading the index after `limit` entries.
+        """
+        lower_bound = prefix.lower()
+        params = {"lower_bound": lower_bound, "limit": limit}
+        if lower_bound:
+            params["upper_bound"] = lower_bound[:-1] + chr(ord(lower_bound[-1]) + 1)
+        query = organizations_by_name_prefix_statement(projection_columns(projection), bounded=bool(lower_bound))
+        return await self.fetch_all(query, projection, params)
 
-        query = (
-            select(Organization)
-            .join(Organization.activities)
-            .where(Organization.activities.any(Activity.id.in_(select(activity_tree.c.id))))
+    async def get_organizations_by_activity_tree(
+        self, activity_name: str, projection: Projection | None = None
+    ) -> Sequence[Organization | RowMapping]:
+        query = organizations_by_activity_tree_statement(projection_columns(projection))
+        return await self.fetch_all(query, projection, {"activity_name": activity_name})
+
+    async def get_organizations_by_activity_ids(
+        self, activity_ids: list[int], projection: Projection | None = None
+    ) -> Sequence[Organization | RowMapping]:
+        query = organizations_by_activity_ids_statement(projection_columns(projection))
+        return await self.fetch_all(query, projection, {"activity_ids": activity_ids})
+
+    async def get_organizations_by_radius(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        with_location: bool = False,
+        after_id: int | None = None,
+        limit: int | None = None,
+        projection: Projection | None = None,
+    ) -> Sequence[Organization] | Sequence[Row] | Sequence[RowMapping]:
+        """Get organizations located in the radius with a single join against the buildings.
+
+        Organizations are ordered by ID, so the last returned ID can be passed as `after_id`
+        to fetch the next page. With `with_location` every row also holds the building
+        address and the distance in kilometers.
+        """
+        query = organizations_by_radius_statement(
+            projection_columns(projection), with_location=with_location, paged=bool(after_id)
         )
+        params = radius_parameters(latitude=latitude, longitude=longitude, radius_km=radius_km)
+        params |= {"after_id": after_id, "limit": limit}
+        if projection is None and with_location:
+            result = await self.session.execute(query, params)
+            return result.all()
+        return await self.fetch_all(query, projection, params)
 
-        result = await self.session.execute(query)
-        return result.scalars().all()
+    async def search_organizations(
+        self,
+        search: OrganizationSearch,
+        after_id: int | None = None,
+        limit: int | None = None,
+        projection: Projection | None = None,
+    ) -> Sequence[Organization | RowMapping]:
+        """Get the organizations matching all filters of the search in a single query, ordered by ID.
+
+        The last returned ID can be passed as `after_id` to fetch the next page.
+        """
+        query = organizations_search_statement(projection_columns(projection), search.applied, paged=bool(after_id))
+        params = search.parameters() | {"after_id": after_id, "limit": limit}
+        return await self.fetch_all(query, projection, params)
+
+    async def get_activity_facets(self, search: OrganizationSearch) -> Sequence[RowMapping]:
+        """Count the organizations matching the search by top-level activity, the most frequent first.
+
+        An organization is counted once under every top-level activity it has an activity in.
+        """
+        result = await self.session.execute(activity_facets_statement(search.applied), search.parameters())
+        return result.mappings().all()
+
+    async def get_nearest_organizations(
+        self,
+        latitude: float,
+        longitude: float,
+        limit: int,
+        activity_ids: list[int] | None = None,
+        max_distance_km: float | None = None,
+        projection: Projection | None = None,
+    ) -> Sequence[Row] | Sequence[RowMapping]:
+        """Get the organizations closest to the point, the closest first.
+
+        Each row also holds the building address and the distance in kilometers.
+
+        The circle around the point is searched through the (latitude, longitude) index and grows until it
+        holds `limit` organizations or reaches `max_distance_km`. Every organization outside the circle is
+        farther than all found inside, so the result is exact, and in dense areas the first small box
+        answers the query whatever the size of the catalog.
+        """
+        max_distance_km = min(max_distance_km or MAX_DISTANCE_KM, MAX_DISTANCE_KM)
+        query = nearest_organizations_statement(projection_columns(projection), by_activities=activity_ids is not None)
+        radius_km = min(settings.NEAREST_START_RADIUS_KM, max_distance_km)
+        while True:
+            params = radius_parameters(latitude=latitude, longitude=longitude, radius_km=radius_km)
+            params |= {"activity_ids": activity_ids, "limit": limit}
+            if projection is None:
+                result = await self.session.execute(query, params)
+                rows = result.all()
+            else:
+                rows = await self.fetch_all(query, projection, params)
+            if len(rows) >= limit or radius_km >= max_distance_km:
+                return rows
+            radius_km = min(radius_km * settings.NEAREST_RADIUS_GROWTH, max_distance_km)
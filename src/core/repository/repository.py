@@ -1,11 +1,14 @@
 """The module contains base classes for working with databases."""
 
+import functools
 from abc import ABC, abstractmethod
-from collections.abc import Sequence
+from collections.abc import AsyncIterator, Sequence
 from typing import TYPE_CHECKING, Any, Never, TypeVar
 from uuid import UUID
 
-from sqlalchemy import delete, insert, select, update
+from pydantic import BaseModel as SchemaModel
+from sqlalchemy import ColumnElement, RowMapping, Select, bindparam, delete, func, insert, select, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.models import BaseModel
@@ -29,6 +32,10 @@ class AbstractRepository(ABC):
     async def add_one_and_get_obj(self, *args: Any, **kwargs: Any) -> Never:
         raise NotImplementedError
 
+    @abstractmethod
+    async def add_many_and_get_objs(self, *args: Any, **kwargs: Any) -> Never:
+        raise NotImplementedError
+
     @abstractmethod
     async def get_by_query_one_or_none(self, *args: Any, **kwargs: Any) -> Never:
         raise NotImplementedError
@@ -37,20 +44,73 @@ class AbstractRepository(ABC):
     async def get_by_query_all(self, *args: Any, **kwargs: Any) -> Never:
         raise NotImplementedError
 
+    @abstractmethod
+    def stream_by_query_all(self, *args: Any, **kwargs: Any) -> Never:
+        raise NotImplementedError
+
     @abstractmethod
     async def update_one_by_id(self, *args: Any, **kwargs: Any) -> Never:
         raise NotImplementedError
 
+    @abstractmethod
+    async def update_many_by_id(self, *args: Any, **kwargs: Any) -> Never:
+        raise NotImplementedError
+
     @abstractmethod
     async def delete_by_query(self, *args: Any, **kwargs: Any) -> Never:
         raise NotImplementedError
 
+    @abstractmethod
+    async def delete_many_by_ids(self, *args: Any, **kwargs: Any) -> Never:
+        raise NotImplementedError
+
     @abstractmethod
     async def delete_all(self, *args: Any, **kwargs: Any) -> Never:
         raise NotImplementedError
 
 
 Model = TypeVar("Model", bound=BaseModel)
+# Column names or a schema whose fields are all columns of the table.
+Projection = Sequence[str] | type[SchemaModel]
+
+
+async def copy_records_to_table(
+    session: AsyncSession, table_name: str, columns: Sequence[str], records: Sequence[tuple[Any, ...]]
+) -> None:
+    """Insert the records with the PostgreSQL COPY protocol in the transaction of the session."""
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(table_name, columns=list(columns), records=records)
+
+
+def paginate(query: Select, id_column: ColumnElement, after_id: Any | None, limit: int | None) -> Select:
+    """Order the query by ID and take a page of it when after_id or limit is given."""
+    if after_id is not None or limit is not None:
+        query = query.order_by(id_column).limit(limit)
+    if after_id is not None:
+        query = query.where(id_column > after_id)
+    return query
+
+
+def projection_columns(projection: Projection | None) -> tuple[str, ...] | None:
+    """Get the column names of a projection as a hashable key, None when whole ORM objects are selected."""
+    if projection is None:
+        return None
+    return tuple(projection.model_fields if isinstance(projection, type) else projection)
+
+
+@functools.cache
+def select_columns(model: type[BaseModel], columns: tuple[str, ...] | None) -> Select:
+    """Select whole ORM objects of the model or only the columns.
+
+    The statement is built once per model and columns; statements are immutable, so it is shared by all
+    callers deriving queries from it. The hot queries of the repositories are built the same way, with
+    their values as bound parameters, so every request reuses the compiled SQL and the statement
+    prepared by asyncpg.
+    """
+    if columns is None:
+        return select(model)
+    return select(*(model.__table__.c[name] for name in columns))
 
 
 class SqlAlchemyRepository(AbstractRepository):
@@ -79,25 +139,116 @@ class SqlAlchemyRepository(AbstractRepository):
         obj: Result = await self.session.execute(query)
         return obj.scalar_one()
 
-    async def get_by_query_one_or_none(self, **kwargs: Any) -> Model | None:
-        query = select(self.model).filter_by(**kwargs)
+    async def add_many_and_get_objs(self, values: Sequence[dict[str, Any]]) -> Sequence[Model]:
+        """Insert the rows with a batched INSERT ... RETURNING, the objects are returned in the order of the values."""
+        query = insert(self.model).returning(self.model, sort_by_parameter_order=True)
+        res = await self.session.scalars(query, values)
+        return res.all()
+
+    def build_select(self, projection: Projection | None = None) -> Select:
+        """Select whole ORM objects or, with a projection, only its columns."""
+        return select_columns(self.model, projection_columns(projection))
+
+    async def fetch_all(
+        self, query: Select, projection: Projection | None = None, params: dict[str, Any] | None = None
+    ) -> Sequence[Model | RowMapping]:
+        """Run a query built by build_select: projected rows are returned as mappings, not tracked by the session."""
+        res: Result = await self.session.execute(query, params)
+        return res.scalars().all() if projection is None else res.mappings().all()
+
+    async def get_by_query_one_or_none(
+        self, projection: Projection | None = None, **kwargs: Any
+    ) -> Model | RowMapping | None:
+        query = self.build_select(projection).filter_by(**kwargs)
         res: Result = await self.session.execute(query)
-        return res.unique().scalar_one_or_none()
+        res = res.unique()
+        return res.scalar_one_or_none() if projection is None else res.mappings().one_or_none()
+
+    async def get_by_query_all(
+        self,
+        projection: Projection | None = None,
+        after_id: int | str | UUID | None = None,
+        limit: int | None = None,
+        **kwargs: Any,
+    ) -> Sequence[Model | RowMapping]:
+        """Get all objects matching the filters, a page of them ordered by ID when after_id or limit is given."""
+        query = self.build_select(projection).filter_by(**kwargs)
+        query = paginate(query, id_column=self.model.id, after_id=after_id, limit=limit)
+        return await self.fetch_all(query, projection)
+
+    async def get_version(
+        self, after_id: int | str | UUID | None = None, limit: int | None = None, **kwargs: Any
+    ) -> str | None:
+        """Get a fingerprint of the objects get_by_query_all returns for the same arguments.
+
+        It is built from the IDs and update times only, so it is much cheaper than loading the objects and
+        changes whenever one of them is created, updated or deleted; None if there are no objects.
+        """
+        query = select(self.model.id, self.model.updated_at).filter_by(**kwargs)
+        query = paginate(query, id_column=self.model.id, after_id=after_id, limit=limit)
+        page = query.subquery()
+        fingerprint = func.string_agg(
+            func.concat(page.c.id, ":", page.c.updated_at), aggregate_order_by(",", page.c.id)
+        )
+        res: Result = await self.session.execute(select(func.md5(fingerprint)))
+        return res.scalar_one()
+
+    async def stream_by_query_all(self, batch_size: int = 1000, **kwargs: Any) -> AsyncIterator[Model]:
+        """Iterate over the objects matching the filters through a server-side cursor, batch_size rows at a time."""
+        query = select(self.model).filter_by(**kwargs).order_by(self.model.id).execution_options(yield_per=batch_size)
+        result = await self.session.stream_scalars(query)
+        async for obj in result:
+            yield obj
+
+    async def get_existing_ids(self, ids: Sequence[int | str | UUID]) -> set[int | str | UUID]:
+        query = select(self.model.id).where(self.model.id.in_(ids))
+        res: Result = await self.session.execute(query)
+        return set(res.scalars().all())
 
-    async def get_by_query_all(self, **kwargs: Any) -> Sequence[Model]:
-        query = select(self.model).filter_by(**kwargs)
+    async def reserve_ids(self, count: int) -> list[int]:
+        """Take the next `count` values of the primary key sequence, e.g. to insert rows with COPY."""
+        sequence = func.pg_get_serial_sequence(self.model.__tablename__, "id")
+        query = select(func.nextval(sequence)).select_from(func.generate_series(1, count))
         res: Result = await self.session.execute(query)
-        return res.scalars().all()
+        return list(res.scalars().all())
+
+    async def copy_records(self, columns: Sequence[str], records: Sequence[tuple[Any, ...]]) -> None:
+        await copy_records_to_table(self.session, self.model.__tablename__, columns=columns, records=records)
 
     async def update_one_by_id(self, obj_id: int | str | UUID, **kwargs: Any) -> Model | None:
         query = update(self.model).filter(self.model.id == obj_id).values(**kwargs).returning(self.model)
         obj: Result | None = await self.session.execute(query)
         return obj.scalar_one_or_none()
 
+    async def update_many_by_id(self, values: Sequence[dict[str, Any]]) -> set[int | str | UUID]:
+        """Update the rows by the "id" key of the values with one executemany UPDATE, return the updated IDs.
+
+        The existing rows are locked before the update, so the IDs missing from the result were not found.
+        """
+        query = select(self.model.id).where(self.model.id.in_([value["id"] for value in values])).with_for_update()
+        res: Result = await self.session.execute(query)
+        updated_ids = set(res.scalars().all())
+        rows = [{f"b_{key}": item for key, item in value.items()} for value in values if value["id"] in updated_ids]
+        if rows:
+            table = self.model.__table__
+            columns = [key for key in values[0] if key != "id"]
+            query = (
+                update(table)
+                .where(table.c.id == bindparam("b_id"))
+                .values({column: bindparam(f"b_{column}") for column in columns})
+            )
+            await self.session.execute(query, rows)
+        return updated_ids
+
     async def delete_by_query(self, **kwargs: Any) -> None:
         query = delete(self.model).filter_by(**kwargs)
         await self.session.execute(query)
 
+    async def delete_many_by_ids(self, ids: Sequence[int | str | UUID]) -> set[int | str | UUID]:
+        query = delete(self.model).where(self.model.id.in_(ids)).returning(self.model.id)
+        res: Result = await self.session.execute(query)
+        return set(res.scalars().all())
+
     async def delete_all(self) -> None:
         query = delete(self.model)
         await self.session.execute(query)
@@ -0,0 +1,29 @@
+from sqlalchemy import select, update
+
+from src.core.models import CatalogVersion
+from src.core.repository.repository import SqlAlchemyRepository
+
+
+class CatalogVersionsRepository(SqlAlchemyRepository):
+    """Repository of the per-catalog change counters.
+
+    Writers bump the counter inside their own transaction, so other processes see the new version
+    only together with the committed data.
+    """
+
+    model = CatalogVersion
+
+    async def get_version(self, name: str) -> int:
+        query = select(self.model.version).where(self.model.name == name)
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none() or 0
+
+    async def bump_version(self, name: str) -> int:
+        query = (
+            update(self.model)
+            .where(self.model.name == name)
+            .values(version=self.model.version + 1)
+            .returning(self.model.version)
+        )
+        result = await self.session.execute(query)
+        return result.scalar_one()
@@ -1,9 +1,24 @@
-from .activities import Activity, ActivityCreate, ActivityList, ActivityUpdate
-from .buildings import Building, BuildingCreate, BuildingList, BuildingUpdate
+from .activities import Activity, ActivityBatchUpdate, ActivityCreate, ActivityList, ActivityUpdate
+from .batch import BatchItemResult, BatchResult
+from .buildings import Building, BuildingBatchUpdate, BuildingCreate, BuildingList, BuildingUpdate
+from .imports import (
+    ActivityImportRow,
+    ImportEntity,
+    ImportFormat,
+    ImportReport,
+    ImportRowError,
+    OrganizationImportRow,
+)
 from .organizations import (
+    ActivityFacet,
+    NameSearchMode,
     Organization,
+    OrganizationBatchCreate,
+    OrganizationBatchUpdate,
     OrganizationCreate,
     OrganizationDetailed,
     OrganizationList,
+    OrganizationNearestList,
+    OrganizationSearchResult,
     OrganizationUpdate,
 )
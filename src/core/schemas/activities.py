@@ -16,6 +16,10 @@ class ActivityUpdate(ActivityBase):
     pass
 
 
+class ActivityBatchUpdate(ActivityUpdate):
+    id: PositiveInt
+
+
 class ActivityInDB(ActivityBase):
     id: PositiveInt
 
@@ -0,0 +1,14 @@
+from typing import List
+
+from pydantic import BaseModel, NonNegativeInt, PositiveInt
+
+
+class BatchItemResult(BaseModel):
+    index: NonNegativeInt
+    status: PositiveInt
+    id: PositiveInt | None = None
+    detail: str | None = None
+
+
+class BatchResult(BaseModel):
+    results: List[BatchItemResult]
@@ -17,6 +17,10 @@ class BuildingUpdate(BuildingBase):
     pass
 
 
+class BuildingBatchUpdate(BuildingUpdate):
+    id: PositiveInt
+
+
 class BuildingInDB(BuildingBase):
     id: PositiveInt
 
@@ -0,0 +1,52 @@
+from typing import List, Literal
+
+from pydantic import BaseModel, PositiveInt, field_validator
+
+ImportEntity = Literal["activities", "buildings", "organizations"]
+ImportFormat = Literal["csv", "ndjson", "xls"]
+
+
+class ActivityImportRow(BaseModel):
+    name: str
+    parent: str | None = None
+
+    @field_validator("parent", mode="before")
+    @classmethod
+    def empty_parent_to_none(cls, value: str | None) -> str | None:
+        return value or None
+
+
+class OrganizationImportRow(BaseModel):
+    name: str
+    phones: str
+    building_id: PositiveInt | None = None
+    building_address: str | None = None
+    activities: List[str] = []
+
+    @field_validator("building_id", "building_address", mode="before")
+    @classmethod
+    def empty_to_none(cls, value: str | int | None) -> str | int | None:
+        return None if value == "" else value
+
+    @field_validator("activities", mode="before")
+    @classmethod
+    def split_activities(cls, value: str | list[str] | None) -> list[str]:
+        if not value:
+            return []
+        if isinstance(value, str):
+            return [name.strip() for name in value.split(";") if name.strip()]
+        return value
+
+
+class ImportRowError(BaseModel):
+    row: PositiveInt
+    error: str
+
+
+class ImportReport(BaseModel):
+    entity: ImportEntity
+    processed: int = 0
+    imported: int = 0
+    failed: int = 0
+    checkpoint: int = 0
+    errors: List[ImportRowError] = []
@@ -1,7 +1,9 @@
-from typing import List
+from typing import List, Literal
 
 from pydantic import BaseModel, PositiveInt
 
+NameSearchMode = Literal["contains", "ranked", "prefix"]
+
 
 class OrganizationBase(BaseModel):
     name: str
@@ -17,6 +19,14 @@ class OrganizationUpdate(OrganizationBase):
     pass
 
 
+class OrganizationBatchCreate(OrganizationCreate):
+    activities: List[str] = []
+
+
+class OrganizationBatchUpdate(OrganizationUpdate):
+    id: PositiveInt
+
+
 class OrganizationInDB(OrganizationBase):
     id: PositiveInt
 
@@ -35,3 +45,22 @@ class OrganizationDetailed(OrganizationInDB):
 
 class OrganizationList(BaseModel):
     organizations: List[Organization]
+
+
+class OrganizationNearest(Organization):
+    address: str
+    distance_km: float
+
+
+class OrganizationNearestList(BaseModel):
+    organizations: List[OrganizationNearest]
+
+
+class ActivityFacet(BaseModel):
+    activity_id: PositiveInt
+    name: str
+    count: int
+
+
+class OrganizationSearchResult(OrganizationList):
+    facets: List[ActivityFacet] | None = None
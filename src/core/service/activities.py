@@ -1,10 +1,19 @@
 import logging
+from typing import Any
 
 from fastapi import HTTPException
 from pydantic import PositiveInt
 
-from src.core.schemas import Activity, ActivityCreate, ActivityList, ActivityUpdate
-from src.core.service.service import BaseService
+from src.core.cache import activity_catalog, cached, response_cache
+from src.core.schemas import (
+    Activity,
+    ActivityBatchUpdate,
+    ActivityCreate,
+    ActivityUpdate,
+    BatchItemResult,
+    BatchResult,
+)
+from src.core.service.service import BaseService, find_duplicate_indexes
 from src.core.uow import transaction_mode
 from src.utils import get_logger
 
@@ -14,44 +23,214 @@ logger = get_logger(__file__, log_level=logging.INFO)
 class ActivitiesService(BaseService):
     base_repository: str = "activities"
 
+    async def __check_name_is_free(self, name: str, activity_id: PositiveInt | None = None) -> None:
+        existing_activity = await self.uow.activities.get_by_query_one_or_none(projection=["id"], name=name)
+        if existing_activity and existing_activity["id"] != activity_id:
+            raise HTTPException(status_code=400, detail=f"Activity with name: {name} already exists!")
+
+    @transaction_mode
+    async def __create_activity(self, activity: ActivityCreate) -> Activity:
+        await self.__check_name_is_free(name=activity.name)
+        if activity.parent_id:
+            parent_level = await self.uow.activities.get_activity_level(activity_id=activity.parent_id)
+            if not parent_level:
+                raise HTTPException(status_code=404, detail=f"Activity with ID: {activity.parent_id} not found!")
+            if parent_level >= 3:
+                raise HTTPException(status_code=400, detail="Maximum activity depth is 3 levels")
+
+        result = await self.uow.activities.add_one_and_get_obj(**activity.model_dump())
+        await self.uow.activities.add_to_hierarchy(activity_id=result.id, parent_id=result.parent_id)
+        await self.__bump_activities_version()
+        return result.to_pydantic_schema()
+
+    @transaction_mode
+    async def __create_activities(self, activities: list[ActivityCreate]) -> BatchResult:
+        taken_ids = await self.uow.activities.get_name_to_id(names=[activity.name for activity in activities])
+        parent_ids = list({activity.parent_id for activity in activities if activity.parent_id})
+        ancestor_links = await self.uow.activities.get_ancestor_links(activity_ids=parent_ids)
+
+        results: dict[int, BatchItemResult] = {}
+        batch_names = set()
+        for index, activity in enumerate(activities):
+            if activity.name in taken_ids or activity.name in batch_names:
+                detail = f"Activity with name: {activity.name} already exists!"
+                results[index] = BatchItemResult(index=index, status=400, detail=detail)
+            elif activity.parent_id and not ancestor_links[activity.parent_id]:
+                detail = f"Activity with ID: {activity.parent_id} not found!"
+                results[index] = BatchItemResult(index=index, status=404, detail=detail)
+            elif activity.parent_id and len(ancestor_links[activity.parent_id]) >= 3:
+                results[index] = BatchItemResult(index=index, status=400, detail="Maximum activity depth is 3 levels")
+            else:
+                batch_names.add(activity.name)
+
+        valid_indexes = [index for index in range(len(activities)) if index not in results]
+        if valid_indexes:
+            created = await self.uow.activities.add_many_and_get_objs(
+                values=[activities[index].model_dump() for index in valid_indexes]
+            )
+            closure_records = []
+            for index, activity_obj in zip(valid_indexes, created):
+                results[index] = BatchItemResult(index=index, status=201, id=activity_obj.id)
+                closure_records.append((activity_obj.id, activity_obj.id, 0))
+                closure_records.extend(
+                    (ancestor_id, activity_obj.id, depth + 1)
+                    for ancestor_id, depth in ancestor_links.get(activity_obj.parent_id, [])
+                )
+            await self.uow.activities.copy_hierarchy_records(records=closure_records)
+            await self.__bump_activities_version()
+        return BatchResult(results=[results[index] for index in range(len(activities))])
+
+    async def __apply_activity_update(self, activity_id: PositiveInt, activity: ActivityUpdate) -> Activity | None:
+        current_activity = await self.uow.activities.get_by_query_one_or_none(id=activity_id)
+        if not current_activity:
+            return None
+        await self.__check_name_is_free(name=activity.name, activity_id=activity_id)
+
+        if activity.parent_id != current_activity.parent_id:
+            if activity.parent_id:
+                await self.__check_new_parent(activity_id=activity_id, parent_id=activity.parent_id)
+            await self.uow.activities.move_in_hierarchy(activity_id=activity_id, parent_id=activity.parent_id)
+
+        result = await self.uow.activities.update_one_by_id(obj_id=activity_id, **activity.model_dump())
+        return result.to_pydantic_schema()
+
     @transaction_mode
-    async def __get_activity_level(self, activity_id: PositiveInt) -> PositiveInt:
-        level = await self.uow.activities.get_activity_level(activity_id=activity_id)
-        return level
+    async def __update_activity(self, activity_id: PositiveInt, activity: ActivityUpdate) -> Activity | None:
+        result = await self.__apply_activity_update(activity_id=activity_id, activity=activity)
+        if result:
+            await self.__bump_activities_version()
+        return result
 
-    async def get_all_activities(self) -> ActivityList:
-        result = await self.get_by_query_all()
-        activities = [activity.to_pydantic_schema() for activity in result]
-        activities_list = ActivityList(activities=activities)
-        return activities_list
+    @transaction_mode
+    async def __update_activities(self, activities: list[ActivityBatchUpdate]) -> BatchResult:
+        """Apply the updates one by one, since every move depends on the hierarchy left by the previous ones."""
+        duplicates = find_duplicate_indexes([activity.id for activity in activities])
+        results = []
+        for index, activity in enumerate(activities):
+            if index in duplicates:
+                detail = f"Activity with ID: {activity.id} is repeated later in the batch"
+                results.append(BatchItemResult(index=index, status=400, id=activity.id, detail=detail))
+                continue
+            try:
+                updated_activity = await self.__apply_activity_update(
+                    activity_id=activity.id, activity=ActivityUpdate(**activity.model_dump(exclude={"id"}))
+                )
+            except HTTPException as exc:
+                results.append(BatchItemResult(index=index, status=exc.status_code, id=activity.id, detail=exc.detail))
+                continue
+            if updated_activity:
+                results.append(BatchItemResult(index=index, status=200, id=activity.id))
+            else:
+                detail = f"Activity with ID: {activity.id} not found!"
+                results.append(BatchItemResult(index=index, status=404, id=activity.id, detail=detail))
+        if any(result.status == 200 for result in results):
+            await self.__bump_activities_version()
+        return BatchResult(results=results)
+
+    async def __check_new_parent(self, activity_id: PositiveInt, parent_id: PositiveInt) -> None:
+        parent_level = await self.uow.activities.get_activity_level(activity_id=parent_id)
+        if not parent_level:
+            raise HTTPException(status_code=404, detail=f"Activity with ID: {parent_id} not found!")
+        if await self.uow.activities.is_in_subtree(ancestor_id=activity_id, activity_id=parent_id):
+            raise HTTPException(status_code=400, detail="Activity can not be moved under its own sub-activity")
+        subtree_height = await self.uow.activities.get_subtree_height(activity_id=activity_id)
+        if parent_level + subtree_height >= 3:
+            raise HTTPException(status_code=400, detail="Maximum activity depth is 3 levels")
+
+    @transaction_mode
+    async def __has_subactivities(self, activity_id: PositiveInt) -> bool:
+        subtree_height = await self.uow.activities.get_subtree_height(activity_id=activity_id)
+        return subtree_height > 0
 
+    @transaction_mode
+    async def __delete_activity(self, activity_id: PositiveInt) -> None:
+        await self.uow.activities.delete_by_query(id=activity_id)
+        await self.__bump_activities_version()
+
+    @transaction_mode
+    async def __delete_activities(self, activity_ids: list[PositiveInt]) -> BatchResult:
+        deletable_ids, parent_ids = set(activity_ids), set()
+        while blocked_ids := await self.uow.activities.get_ids_with_subactivities(activity_ids=list(deletable_ids)):
+            deletable_ids -= blocked_ids
+            parent_ids |= blocked_ids
+        deleted_ids = await self.uow.activities.delete_many_by_ids(ids=list(deletable_ids))
+        if deleted_ids:
+            await self.__bump_activities_version()
+
+        results = []
+        for index, activity_id in enumerate(activity_ids):
+            if activity_id in deleted_ids:
+                results.append(BatchItemResult(index=index, status=204, id=activity_id))
+            elif activity_id in parent_ids:
+                detail = f"Activity with ID: {activity_id} has sub-activities!"
+                results.append(BatchItemResult(index=index, status=400, id=activity_id, detail=detail))
+            else:
+                detail = f"Activity with ID: {activity_id} not found!"
+                results.append(BatchItemResult(index=index, status=404, id=activity_id, detail=detail))
+        return BatchResult(results=results)
+
+    async def __bump_activities_version(self) -> None:
+        await self.uow.versions.bump_version(name="activities")
+        # The catalog is reloaded first, so the results computed once the tag is invalidated use the new one.
+        if activity_catalog.is_loaded:
+            self.uow.call_after_commit(activity_catalog.reload)
+        self.uow.call_after_commit(response_cache.invalidator("activities"))
+
+    @cached("activities")
+    async def get_all_activities(
+        self, after_id: PositiveInt | None = None, limit: PositiveInt | None = None, version: str | None = None
+    ) -> list[dict[str, Any]]:
+        """Get the activities as plain rows with the fields of the Activity schema.
+
+        The version is only a part of the cache key: the rows cached under it were loaded after it was read, so they
+        are never older than the ETag built from it.
+        """
+        if activity_catalog.is_loaded:
+            return [activity.model_dump() for activity in activity_catalog.get_all(after_id=after_id, limit=limit)]
+        rows = await self.get_by_query_all(projection=Activity, after_id=after_id, limit=limit)
+        return [dict(row) for row in rows]
+
+    async def get_all_activities_version(
+        self, after_id: PositiveInt | None = None, limit: PositiveInt | None = None
+    ) -> str | None:
+        """Get the version of the activities page, the catalog one when it is loaded and serves the page."""
+        if activity_catalog.is_loaded:
+            return f"catalog:{activity_catalog.version}"
+        return await self.get_version(after_id=after_id, limit=limit)
+
+    @cached("activities")
     async def get_activity_by_id(self, activity_id: PositiveInt) -> Activity:
-        result = await self.get_by_query_one_or_none(id=activity_id)
+        result = await self.get_by_query_one_or_none(projection=Activity, id=activity_id)
         if not result:
             raise HTTPException(status_code=404, detail=f"Activity with ID: {activity_id} not found!")
-        activity = result.to_pydantic_schema()
-        return activity
+        return Activity(**result)
 
     async def create_activity(self, activity: ActivityCreate) -> Activity:
-        if activity.parent_id:
-            parent_level = await self.__get_activity_level(activity_id=activity.parent_id)
-            if parent_level >= 3:
-                raise HTTPException(status_code=400, detail="Maximum activity depth is 3 levels")
-
-        result = await self.add_one_and_get_obj(**activity.model_dump())
-        created_activity = result.to_pydantic_schema()
+        created_activity = await self.__create_activity(activity=activity)
         return created_activity
 
     async def update_activity(self, activity_id: PositiveInt, activity: ActivityUpdate) -> Activity:
-        result = await self.update_one_by_id(obj_id=activity_id, **activity.model_dump())
-        if not result:
+        updated_activity = await self.__update_activity(activity_id=activity_id, activity=activity)
+        if not updated_activity:
             raise HTTPException(status_code=404, detail=f"Activity with ID: {activity_id} not found!")
-        updated_activity = result.to_pydantic_schema()
         return updated_activity
 
     async def delete_activity(self, activity_id: PositiveInt) -> None:
-        result = await self.get_by_query_one_or_none(id=activity_id)
+        result = await self.get_by_query_one_or_none(projection=["id"], id=activity_id)
         if not result:
             raise HTTPException(status_code=404, detail=f"Activity with ID: {activity_id} not found!")
-        await self.delete_by_query(id=activity_id)
+        if await self.__has_subactivities(activity_id=activity_id):
+            raise HTTPException(status_code=400, detail=f"Activity with ID: {activity_id} has sub-activities!")
+        await self.__delete_activity(activity_id=activity_id)
         logger.info(f"Activity with ID: {activity_id} deleted!")
+
+    async def create_activities(self, activities: list[ActivityCreate]) -> BatchResult:
+        return await self.__create_activities(activities=activities)
+
+    async def update_activities(self, activities: list[ActivityBatchUpdate]) -> BatchResult:
+        return await self.__update_activities(activities=activities)
+
+    async def delete_activities(self, activity_ids: list[PositiveInt]) -> BatchResult:
+        result = await self.__delete_activities(activity_ids=activity_ids)
+        logger.info(f"{sum(item.status == 204 for item in result.results)} activities deleted!")
+        return result
@@ -1,58 +1,176 @@
+import functools
 import logging
+from collections.abc import AsyncIterator
+from typing import Any
 
 from fastapi import HTTPException
 from pydantic import PositiveInt
 
-from src.core.schemas import Building, BuildingCreate, BuildingList, BuildingUpdate
-from src.core.service.service import BaseService
+from src.config import settings
+from src.core.cache import ROUNDED_COORDINATES, building_index, cached, invalidates
+from src.core.cache.buildings import BuildingLocation
+from src.core.schemas import (
+    BatchItemResult,
+    BatchResult,
+    Building,
+    BuildingBatchUpdate,
+    BuildingCreate,
+    BuildingUpdate,
+)
+from src.core.service.service import BaseService, find_duplicate_indexes
 from src.core.uow import transaction_mode
 from src.utils import get_logger
 
 logger = get_logger(__file__, log_level=logging.INFO)
 
 
+def location(building: Any) -> BuildingLocation:
+    return building.address, building.latitude, building.longitude
+
+
 class BuildingsService(BaseService):
     base_repository: str = "buildings"
 
     @transaction_mode
-    async def __get_buildings_by_radius(self, latitude: float, longitude: float, radius_km: float) -> BuildingList:
+    async def __get_buildings_by_radius(
+        self, latitude: float, longitude: float, radius_km: float, limit: PositiveInt | None = None
+    ) -> list[dict[str, Any]]:
         result = await self.uow.buildings.get_buildings_by_radius(
-            latitude=latitude, longitude=longitude, radius_km=radius_km
+            latitude=latitude, longitude=longitude, radius_km=radius_km, limit=limit, projection=Building
         )
-        buildings = [building.to_pydantic_schema() for building in result]
-        return BuildingList(buildings=buildings)
+        return [dict(row) for row in result]
+
+    @transaction_mode
+    async def __record_building_changes(self, changes: dict[int, BuildingLocation | None]) -> None:
+        """Bump the buildings version and, once committed, apply the changes to the building index."""
+        if not changes or not settings.BUILDING_INDEX_ENABLED:
+            return None
+        version = await self.uow.versions.bump_version(name="buildings")
+        if building_index.is_loaded:
+            self.uow.call_after_commit(functools.partial(building_index.apply, version=version, changes=changes))
+
+    @transaction_mode
+    async def __delete_buildings(self, building_ids: list[PositiveInt]) -> BatchResult:
+        used_ids = await self.uow.organizations.get_used_building_ids(building_ids=building_ids)
+        deleted_ids = await self.uow.buildings.delete_many_by_ids(ids=list(set(building_ids) - used_ids))
+        await self.__record_building_changes(changes=dict.fromkeys(deleted_ids))
+        results = []
+        for index, building_id in enumerate(building_ids):
+            if building_id in deleted_ids:
+                results.append(BatchItemResult(index=index, status=204, id=building_id))
+            elif building_id in used_ids:
+                detail = f"Building with ID: {building_id} has organizations!"
+                results.append(BatchItemResult(index=index, status=400, id=building_id, detail=detail))
+            else:
+                detail = f"Building with ID: {building_id} not found!"
+                results.append(BatchItemResult(index=index, status=404, id=building_id, detail=detail))
+        return BatchResult(results=results)
+
+    @cached("buildings")
+    async def get_all_buildings(
+        self, after_id: PositiveInt | None = None, limit: PositiveInt | None = None, version: str | None = None
+    ) -> list[dict[str, Any]]:
+        """Get the buildings as plain rows with the fields of the Building schema, ready to be sent as they are.
+
+        Passing the version of the ETag keeps a cached page per version, so a page is never sent under a newer ETag.
+        """
+        rows = await self.get_by_query_all(projection=Building, after_id=after_id, limit=limit)
+        return [dict(row) for row in rows]
 
-    async def get_all_buildings(self) -> BuildingList:
-        result = await self.get_by_query_all()
-        buildings = [building.to_pydantic_schema() for building in result]
-        buildings_list = BuildingList(buildings=buildings)
-        return buildings_list
+    async def get_all_buildings_version(
+        self, after_id: PositiveInt | None = None, limit: PositiveInt | None = None
+    ) -> str | None:
+        return await self.get_version(after_id=after_id, limit=limit)
 
+    async def stream_all_buildings(self) -> AsyncIterator[Building]:
+        async for building in self.stream_by_query_all():
+            yield building.to_pydantic_schema()
+
+    @cached("buildings")
     async def get_building_by_id(self, building_id: PositiveInt) -> Building:
-        result = await self.get_by_query_one_or_none(id=building_id)
+        result = await self.get_by_query_one_or_none(projection=Building, id=building_id)
         if not result:
             raise HTTPException(status_code=404, detail=f"Building with ID: {building_id} not found!")
-        building = result.to_pydantic_schema()
-        return building
+        return Building(**result)
+
+    @cached("buildings", rounded=ROUNDED_COORDINATES)
+    async def __get_cached_buildings_by_radius(
+        self, latitude: float, longitude: float, radius_km: float, limit: PositiveInt | None = None
+    ) -> list[dict[str, Any]]:
+        return await self.__get_buildings_by_radius(
+            latitude=latitude, longitude=longitude, radius_km=radius_km, limit=limit
+        )
 
-    async def get_buildings_by_radius(self, latitude: float, longitude: float, radius_km: float) -> BuildingList:
-        return await self.__get_buildings_by_radius(latitude=latitude, longitude=longitude, radius_km=radius_km)
+    async def get_buildings_by_radius(
+        self, latitude: float, longitude: float, radius_km: float, limit: PositiveInt | None = None
+    ) -> list[dict[str, Any]]:
+        """Get the buildings in the radius from the building index, or from the cached database search."""
+        if building_index.is_loaded:
+            return building_index.get_by_radius(
+                latitude=latitude, longitude=longitude, radius_km=radius_km, limit=limit
+            )
+        return await self.__get_cached_buildings_by_radius(
+            latitude=latitude, longitude=longitude, radius_km=radius_km, limit=limit
+        )
 
+    @invalidates("buildings")
     async def create_building(self, building: BuildingCreate) -> Building:
         result = await self.add_one_and_get_obj(**building.model_dump())
         created_building = result.to_pydantic_schema()
+        await self.__record_building_changes(changes={created_building.id: location(created_building)})
         return created_building
 
+    @invalidates("buildings")
     async def update_building(self, building_id: PositiveInt, building: BuildingUpdate) -> Building:
         result = await self.update_one_by_id(obj_id=building_id, **building.model_dump())
         if not result:
             raise HTTPException(status_code=404, detail=f"Building with ID: {building_id} not found!")
         updated_building = result.to_pydantic_schema()
+        await self.__record_building_changes(changes={updated_building.id: location(updated_building)})
         return updated_building
 
+    @invalidates("buildings")
     async def delete_building(self, building_id: PositiveInt) -> None:
-        result = await self.get_by_query_one_or_none(id=building_id)
+        result = await self.get_by_query_one_or_none(projection=["id"], id=building_id)
         if not result:
             raise HTTPException(status_code=404, detail=f"Building with ID: {building_id} not found!")
         await self.delete_by_query(id=building_id)
+        await self.__record_building_changes(changes={building_id: None})
         logger.info(f"Building with ID: {building_id} deleted!")
+
+    @invalidates("buildings")
+    async def create_buildings(self, buildings: list[BuildingCreate]) -> BatchResult:
+        result = await self.add_many_and_get_objs(values=[building.model_dump() for building in buildings])
+        await self.__record_building_changes(changes={building.id: location(building) for building in result})
+        results = [BatchItemResult(index=index, status=201, id=building.id) for index, building in enumerate(result)]
+        return BatchResult(results=results)
+
+    @invalidates("buildings")
+    async def update_buildings(self, buildings: list[BuildingBatchUpdate]) -> BatchResult:
+        duplicates = find_duplicate_indexes([building.id for building in buildings])
+        values = [building.model_dump() for index, building in enumerate(buildings) if index not in duplicates]
+        updated_ids = await self.update_many_by_id(values=values)
+        await self.__record_building_changes(
+            changes={
+                building.id: location(building)
+                for index, building in enumerate(buildings)
+                if index not in duplicates and building.id in updated_ids
+            }
+        )
+        results = []
+        for index, building in enumerate(buildings):
+            if index in duplicates:
+                detail = f"Building with ID: {building.id} is repeated later in the batch"
+                results.append(BatchItemResult(index=index, status=400, id=building.id, detail=detail))
+            elif building.id in updated_ids:
+                results.append(BatchItemResult(index=index, status=200, id=building.id))
+            else:
+                detail = f"Building with ID: {building.id} not found!"
+                results.append(BatchItemResult(index=index, status=404, id=building.id, detail=detail))
+        return BatchResult(results=results)
+
+    @invalidates("buildings")
+    async def delete_buildings(self, building_ids: list[PositiveInt]) -> BatchResult:
+        result = await self.__delete_buildings(building_ids=building_ids)
+        logger.info(f"{sum(item.status == 204 for item in result.results)} buildings deleted!")
+        return result
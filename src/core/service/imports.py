@@ -0,0 +1,241 @@
+"""The module contains the service for bulk data imports."""
+
+import asyncio
+import csv
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from itertools import islice
+from typing import Any, BinaryIO
+
+import xlrd
+from pydantic import BaseModel, NonNegativeInt, PositiveInt, ValidationError
+
+from src.config import settings
+from src.core.cache import activity_catalog, response_cache
+from src.core.schemas import (
+    ActivityImportRow,
+    BuildingCreate,
+    ImportEntity,
+    ImportFormat,
+    ImportReport,
+    ImportRowError,
+    OrganizationImportRow,
+)
+from src.core.uow import UnitOfWork
+from src.utils import get_logger
+from src.utils.readers import iter_rows
+
+logger = get_logger(__file__, log_level=logging.INFO)
+
+NumberedRow = tuple[int, dict[str, Any]]
+ProgressCallback = Callable[[ImportReport], Awaitable[None]]
+
+
+def _take(rows: Iterator[NumberedRow], count: int) -> list[NumberedRow]:
+    return list(islice(rows, count))
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors())
+
+
+class ImportService:
+    """A service for loading large CSV, NDJSON and XLS dumps.
+
+    Rows are processed in batches: every batch is validated, has its activity and building references
+    resolved with a few queries and is written with COPY in its own transaction. The report checkpoint is
+    the number of source rows already committed, so an interrupted import is resumed by passing it back
+    as `skip_rows`.
+    """
+
+    row_schemas: dict[ImportEntity, type[BaseModel]] = {
+        "activities": ActivityImportRow,
+        "buildings": BuildingCreate,
+        "organizations": OrganizationImportRow,
+    }
+
+    async def import_file(
+        self,
+        entity: ImportEntity,
+        file: BinaryIO,
+        file_format: ImportFormat,
+        skip_rows: NonNegativeInt = 0,
+        batch_size: PositiveInt | None = None,
+        on_progress: ProgressCallback | None = None,
+    ) -> ImportReport:
+        rows = enumerate(iter_rows(file, file_format), start=1)
+        report = ImportReport(entity=entity, checkpoint=skip_rows)
+        rows = islice(rows, skip_rows, None)
+        batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        started_at = time.perf_counter()
+
+        while True:
+            try:
+                batch = await asyncio.to_thread(_take, rows, batch_size)
+            except (ValueError, csv.Error, xlrd.XLRDError) as exc:
+                self.__add_error(report, row=report.checkpoint + 1, error=f"Unreadable data: {exc}")
+                break
+            if not batch:
+                break
+
+            await self.__import_batch(entity=entity, batch=batch, report=report)
+            report.checkpoint = batch[-1][0]
+            rate = report.processed / (time.perf_counter() - started_at)
+            logger.info(
+                f"Import of {entity}: {report.processed} rows processed, {report.imported} imported, "
+                f"{report.failed} failed, {rate:.0f} rows/s"
+            )
+            if on_progress:
+                await on_progress(report)
+
+        if entity == "activities" and report.imported and activity_catalog.is_loaded:
+            await activity_catalog.reload()
+        return report
+
+    def __validate_rows(
+        self, entity: ImportEntity, batch: list[NumberedRow], report: ImportReport
+    ) -> list[tuple[int, BaseModel]]:
+        """Parse the rows of the batch with the row schema of the entity, reporting the invalid ones."""
+        items = []
+        for row_number, row in batch:
+            try:
+                items.append((row_number, self.row_schemas[entity].model_validate(row)))
+            except ValidationError as exc:
+                self.__add_error(report, row=row_number, error=_format_validation_error(exc))
+        return items
+
+    async def __import_batch(self, entity: ImportEntity, batch: list[NumberedRow], report: ImportReport) -> None:
+        report.processed += len(batch)
+        items = self.__validate_rows(entity=entity, batch=batch, report=report)
+        if not items:
+            return None
+
+        importers = {
+            "activities": self.__import_activities,
+            "buildings": self.__import_buildings,
+            "organizations": self.__import_organizations,
+        }
+        accepted: list[int] = []
+        uow = UnitOfWork()
+        try:
+            async with uow.transaction():
+                await importers[entity](uow=uow, items=items, accepted=accepted, report=report)
+        except Exception as exc:
+            logger.exception(f"Batch of {entity} ending at row {batch[-1][0]} was rejected")
+            for row_number in accepted:
+                self.__add_error(report, row=row_number, error=f"Batch rejected by the database: {exc}")
+            return None
+        report.imported += len(accepted)
+        if accepted:
+            await response_cache.invalidate(entity)
+
+    @staticmethod
+    async def __import_buildings(
+        uow: UnitOfWork, items: list[tuple[int, BuildingCreate]], accepted: list[int], report: ImportReport
+    ) -> None:
+        building_ids = await uow.buildings.reserve_ids(count=len(items))
+        records = [
+            (building_id, building.address, building.latitude, building.longitude)
+            for building_id, (_, building) in zip(building_ids, items)
+        ]
+        accepted.extend(row_number for row_number, _ in items)
+        await uow.buildings.copy_records(columns=("id", "address", "latitude", "longitude"), records=records)
+        if settings.BUILDING_INDEX_ENABLED:
+            await uow.versions.bump_version(name="buildings")
+
+    async def __import_activities(
+        self, uow: UnitOfWork, items: list[tuple[int, ActivityImportRow]], accepted: list[int], report: ImportReport
+    ) -> None:
+        names = {activity.name for _, activity in items} | {activity.parent for _, activity in items if activity.parent}
+        known_ids = await uow.activities.get_name_to_id(names=list(names))
+        ancestor_links = await uow.activities.get_ancestor_links(activity_ids=list(known_ids.values()))
+        new_ids = iter(await uow.activities.reserve_ids(count=len(items)))
+
+        activity_records, closure_records = [], []
+        for row_number, activity in items:
+            if activity.name in known_ids:
+                self.__add_error(report, row=row_number, error=f"Activity with name: {activity.name} already exists!")
+                continue
+            parent_id, parent_links = None, []
+            if activity.parent:
+                parent_id = known_ids.get(activity.parent)
+                if parent_id is None:
+                    self.__add_error(report, row=row_number, error=f"Activity with name: {activity.parent} not found!")
+                    continue
+                parent_links = ancestor_links[parent_id]
+                if len(parent_links) >= 3:
+                    self.__add_error(report, row=row_number, error="Maximum activity depth is 3 levels")
+                    continue
+
+            activity_id = next(new_ids)
+            known_ids[activity.name] = activity_id
+            ancestor_links[activity_id] = [(activity_id, 0)] + [
+                (ancestor_id, depth + 1) for ancestor_id, depth in parent_links
+            ]
+            activity_records.append((activity_id, activity.name, parent_id))
+            closure_records.extend(
+                (ancestor_id, activity_id, depth) for ancestor_id, depth in ancestor_links[activity_id]
+            )
+            accepted.append(row_number)
+
+        if activity_records:
+            await uow.activities.copy_records(columns=("id", "name", "parent_id"), records=activity_records)
+            await uow.activities.copy_hierarchy_records(records=closure_records)
+            await uow.versions.bump_version(name="activities")
+
+    async def __import_organizations(
+        self,
+        uow: UnitOfWork,
+        items: list[tuple[int, OrganizationImportRow]],
+        accepted: list[int],
+        report: ImportReport,
+    ) -> None:
+        building_ids = {organization.building_id for _, organization in items if organization.building_id}
+        addresses = {
+            organization.building_address
+            for _, organization in items
+            if not organization.building_id and organization.building_address
+        }
+        activity_names = {name for _, organization in items for name in organization.activities}
+        existing_building_ids = await uow.buildings.get_existing_ids(ids=list(building_ids)) if building_ids else set()
+        ids_by_address = await uow.buildings.get_ids_by_addresses(addresses=list(addresses)) if addresses else {}
+        activity_ids = await uow.activities.get_name_to_id(names=list(activity_names)) if activity_names else {}
+        new_ids = iter(await uow.organizations.reserve_ids(count=len(items)))
+
+        organization_records, link_records = [], []
+        for row_number, organization in items:
+            if organization.building_id:
+                building_id = organization.building_id if organization.building_id in existing_building_ids else None
+                building_error = f"Building with ID: {organization.building_id} not found!"
+            elif organization.building_address:
+                building_id = ids_by_address.get(organization.building_address)
+                building_error = f"Building with address: {organization.building_address} not found!"
+            else:
+                building_id, building_error = None, "Building ID or address is required"
+            if building_id is None:
+                self.__add_error(report, row=row_number, error=building_error)
+                continue
+            missing_activities = [name for name in organization.activities if name not in activity_ids]
+            if missing_activities:
+                self.__add_error(report, row=row_number, error=f"Activities not found: {', '.join(missing_activities)}")
+                continue
+
+            organization_id = next(new_ids)
+            organization_records.append((organization_id, organization.name, organization.phones, building_id))
+            link_records.extend(
+                (organization_id, activity_ids[name]) for name in dict.fromkeys(organization.activities)
+            )
+            accepted.append(row_number)
+
+        if organization_records:
+            await uow.organizations.copy_records(
+                columns=("id", "name", "phones", "building_id"), records=organization_records
+            )
+            await uow.organizations.copy_activity_links(records=link_records)
+
+    @staticmethod
+    def __add_error(report: ImportReport, row: int, error: str) -> None:
+        report.failed += 1
+        if len(report.errors) < settings.IMPORT_MAX_REPORTED_ERRORS:
+            report.errors.append(ImportRowError(row=row, error=error))
@@ -1,16 +1,31 @@
 import logging
-from typing import List
+from collections.abc import AsyncIterator
+from typing import Any, List
 
 from fastapi import HTTPException
 from pydantic import PositiveInt
 
-from src.core.schemas import OrganizationCreate, OrganizationDetailed, OrganizationList, OrganizationUpdate
-from src.core.service.service import BaseService
+from src.core.cache import ROUNDED_COORDINATES, activity_catalog, cached, invalidates
+from src.core.repository import OrganizationSearch
+from src.core.schemas import (
+    BatchItemResult,
+    BatchResult,
+    NameSearchMode,
+    Organization,
+    OrganizationBatchCreate,
+    OrganizationBatchUpdate,
+    OrganizationCreate,
+    OrganizationDetailed,
+    OrganizationUpdate,
+)
+from src.core.service.service import BaseService, find_duplicate_indexes
 from src.core.uow import transaction_mode
 from src.utils import get_logger
 
 logger = get_logger(__file__, log_level=logging.INFO)
 
+NAME_SEARCH_LIMIT = 20
+
 
 class OrganizationsService(BaseService):
     base_repository: str = "organizations"
@@ -20,28 +35,54 @@ class OrganizationsService(BaseService):
         activity_ids = await self.uow.activities.get_ids_by_names(names=activities)
         return activity_ids
 
+    @transaction_mode
+    async def __get_activity_subtree_ids(self, activity_name: str) -> list[PositiveInt]:
+        if activity_catalog.is_loaded:
+            return activity_catalog.get_subtree_ids(activity_name=activity_name)
+        return await self.uow.activities.get_subtree_ids(activity_name=activity_name)
+
     @transaction_mode
     async def __check_building(self, building_id: PositiveInt) -> bool:
-        building = await self.uow.buildings.get_by_query_one_or_none(id=building_id)
+        building = await self.uow.buildings.get_by_query_one_or_none(projection=["id"], id=building_id)
         return True if building else False
 
     @transaction_mode
-    async def __get_organizations_by_name(self, organization_name: str) -> OrganizationList:
-        result = await self.uow.organizations.get_organizations_by_name(name=organization_name)
-        organizations = [organization.to_pydantic_schema() for organization in result]
-        return OrganizationList(organizations=organizations)
+    async def __get_organizations_by_name(
+        self, organization_name: str, mode: NameSearchMode = "contains", limit: PositiveInt | None = None
+    ) -> list[dict[str, Any]]:
+        if mode == "ranked":
+            result = await self.uow.organizations.search_organizations_by_name(
+                name=organization_name, limit=limit or NAME_SEARCH_LIMIT, projection=Organization
+            )
+        elif mode == "prefix":
+            result = await self.uow.organizations.get_organizations_by_name_prefix(
+                prefix=organization_name, limit=limit or NAME_SEARCH_LIMIT, projection=Organization
+            )
+        else:
+            result = await self.uow.organizations.get_organizations_by_name(
+                name=organization_name, limit=limit, projection=Organization
+            )
+        return [dict(row) for row in result]
 
     @transaction_mode
-    async def __get_organizations_by_activity_name(self, activity_name: str) -> OrganizationList:
-        result = await self.uow.organizations.get_organizations_by_activity_name(activity_name=activity_name)
-        organizations = [organization.to_pydantic_schema() for organization in result]
-        return OrganizationList(organizations=organizations)
+    async def __get_organizations_by_activity_name(self, activity_name: str) -> list[dict[str, Any]]:
+        result = await self.uow.organizations.get_organizations_by_activity_name(
+            activity_name=activity_name, projection=Organization
+        )
+        return [dict(row) for row in result]
 
     @transaction_mode
-    async def __get_organizations_by_activity_tree(self, activity_name: str) -> OrganizationList:
-        result = await self.uow.organizations.get_organizations_by_activity_tree(activity_name=activity_name)
-        organizations = [organization.to_pydantic_schema() for organization in result]
-        return OrganizationList(organizations=organizations)
+    async def __get_organizations_by_activity_tree(self, activity_name: str) -> list[dict[str, Any]]:
+        if activity_catalog.is_loaded:
+            activity_ids = activity_catalog.get_subtree_ids(activity_name=activity_name)
+            result = await self.uow.organizations.get_organizations_by_activity_ids(
+                activity_ids=activity_ids, projection=Organization
+            )
+        else:
+            result = await self.uow.organizations.get_organizations_by_activity_tree(
+                activity_name=activity_name, projection=Organization
+            )
+        return [dict(row) for row in result]
 
     @transaction_mode
     async def __add_activities_to_organization(
@@ -53,18 +94,67 @@ class OrganizationsService(BaseService):
 
     @transaction_mode
     async def __get_organizations_by_radius(
-        self, latitude: float, longitude: float, radius_km: float
-    ) -> OrganizationList:
-        result = await self.uow.buildings.get_buildings_by_radius(
-            latitude=latitude, longitude=longitude, radius_km=radius_km
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        after_id: PositiveInt | None = None,
+        limit: PositiveInt | None = None,
+    ) -> list[dict[str, Any]]:
+        result = await self.uow.organizations.get_organizations_by_radius(
+            latitude=latitude,
+            longitude=longitude,
+            radius_km=radius_km,
+            after_id=after_id,
+            limit=limit,
+            projection=Organization,
+        )
+        return [dict(row) for row in result]
+
+    @transaction_mode
+    async def __get_nearest_organizations(
+        self,
+        latitude: float,
+        longitude: float,
+        limit: PositiveInt,
+        activity_name: str | None = None,
+        max_distance_km: float | None = None,
+    ) -> list[dict[str, Any]]:
+        activity_ids = None
+        if activity_name is not None:
+            activity_ids = await self.__get_activity_subtree_ids(activity_name=activity_name)
+            if not activity_ids:
+                return []
+        result = await self.uow.organizations.get_nearest_organizations(
+            latitude=latitude,
+            longitude=longitude,
+            limit=limit,
+            activity_ids=activity_ids,
+            max_distance_km=max_distance_km,
+            projection=Organization,
+        )
+        return [dict(row) for row in result]
+
+    @transaction_mode
+    async def __get_search_results(
+        self,
+        search: OrganizationSearch,
+        activity_name: str | None = None,
+        after_id: PositiveInt | None = None,
+        limit: PositiveInt | None = None,
+        facets: bool = False,
+    ) -> dict[str, Any]:
+        if activity_name is not None:
+            search.activity_ids = await self.__get_activity_subtree_ids(activity_name=activity_name)
+            if not search.activity_ids:
+                return {"organizations": [], "facets": [] if facets else None}
+        result = await self.uow.organizations.search_organizations(
+            search=search, after_id=after_id, limit=limit, projection=Organization
         )
-        building_ids = [building.id for building in result]
-        organizations_by_radius = []
-        for building_id in building_ids:
-            organizations = await self.get_by_query_all(building_id=building_id)
-            organizations = [organization.to_pydantic_schema() for organization in organizations]
-            organizations_by_radius += organizations
-        return OrganizationList(organizations=organizations_by_radius)
+        activity_facets = None
+        if facets:
+            activity_facets = [dict(row) for row in await self.uow.organizations.get_activity_facets(search=search)]
+        return {"organizations": [dict(row) for row in result], "facets": activity_facets}
 
     @transaction_mode
     async def __get_organization_with_activities_and_address(
@@ -80,18 +170,101 @@ class OrganizationsService(BaseService):
         organization = organization.to_pydantic_schema_detailed(address=address, activities=activities)
         return organization
 
-    async def get_all_organizations(self) -> OrganizationList:
-        result = await self.get_by_query_all()
-        organizations = [organization.to_pydantic_schema() for organization in result]
-        organizations_list = OrganizationList(organizations=organizations)
-        return organizations_list
+    @transaction_mode
+    async def __create_organizations(self, organizations: list[OrganizationBatchCreate]) -> BatchResult:
+        building_ids = await self.uow.buildings.get_existing_ids(
+            ids=list({organization.building_id for organization in organizations})
+        )
+        activity_names = list({name for organization in organizations for name in organization.activities})
+        activity_ids = await self.uow.activities.get_name_to_id(names=activity_names) if activity_names else {}
+
+        results: dict[int, BatchItemResult] = {}
+        for index, organization in enumerate(organizations):
+            missing_activities = [name for name in organization.activities if name not in activity_ids]
+            if organization.building_id not in building_ids:
+                detail = f"Building with ID: {organization.building_id} not found!"
+                results[index] = BatchItemResult(index=index, status=404, detail=detail)
+            elif missing_activities:
+                detail = f"Activities not found: {', '.join(missing_activities)}"
+                results[index] = BatchItemResult(index=index, status=404, detail=detail)
+
+        valid_indexes = [index for index in range(len(organizations)) if index not in results]
+        if valid_indexes:
+            created = await self.uow.organizations.add_many_and_get_objs(
+                values=[organizations[index].model_dump(exclude={"activities"}) for index in valid_indexes]
+            )
+            links = []
+            for index, organization_obj in zip(valid_indexes, created):
+                results[index] = BatchItemResult(index=index, status=201, id=organization_obj.id)
+                links.extend(
+                    (organization_obj.id, activity_ids[name]) for name in dict.fromkeys(organizations[index].activities)
+                )
+            if links:
+                await self.uow.organizations.copy_activity_links(records=links)
+        return BatchResult(results=[results[index] for index in range(len(organizations))])
+
+    @transaction_mode
+    async def __update_organizations(self, organizations: list[OrganizationBatchUpdate]) -> BatchResult:
+        duplicates = find_duplicate_indexes([organization.id for organization in organizations])
+        building_ids = await self.uow.buildings.get_existing_ids(
+            ids=list({organization.building_id for organization in organizations})
+        )
+
+        results: dict[int, BatchItemResult] = {}
+        for index, organization in enumerate(organizations):
+            if index in duplicates:
+                detail = f"Organization with ID: {organization.id} is repeated later in the batch"
+                results[index] = BatchItemResult(index=index, status=400, id=organization.id, detail=detail)
+            elif organization.building_id not in building_ids:
+                detail = f"Building with ID: {organization.building_id} not found!"
+                results[index] = BatchItemResult(index=index, status=404, id=organization.id, detail=detail)
 
-    async def get_organization_by_id(self, organization_id: PositiveInt) -> OrganizationDetailed:
+        values = [organization.model_dump() for index, organization in enumerate(organizations) if index not in results]
+        updated_ids = await self.uow.organizations.update_many_by_id(values=values) if values else set()
+        for index, organization in enumerate(organizations):
+            if index in results:
+                continue
+            if organization.id in updated_ids:
+                results[index] = BatchItemResult(index=index, status=200, id=organization.id)
+            else:
+                detail = f"Organization with ID: {organization.id} not found!"
+                results[index] = BatchItemResult(index=index, status=404, id=organization.id, detail=detail)
+        return BatchResult(results=[results[index] for index in range(len(organizations))])
+
+    @cached("organizations")
+    async def get_all_organizations(
+        self, after_id: PositiveInt | None = None, limit: PositiveInt | None = None
+    ) -> list[dict[str, Any]]:
+        """Get the organizations as plain rows with the fields of the Organization schema."""
+        rows = await self.get_by_query_all(projection=Organization, after_id=after_id, limit=limit)
+        return [dict(row) for row in rows]
+
+    async def stream_all_organizations(self) -> AsyncIterator[Organization]:
+        async for organization in self.stream_by_query_all():
+            yield organization.to_pydantic_schema()
+
+    @transaction_mode
+    async def get_organization_version(self, organization_id: PositiveInt) -> str:
+        version = await self.uow.organizations.get_organization_version(organization_id=organization_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail=f"Organization with ID: {organization_id} not found!")
+        return version
+
+    @cached("organizations", "buildings", "activities")
+    async def get_organization_by_id(
+        self, organization_id: PositiveInt, version: str | None = None
+    ) -> OrganizationDetailed:
+        """Get the organization with its building address and activities.
+
+        The query does not use the version, it keys the cache entry, so that a stale entry is not sent under a newer
+        ETag.
+        """
         organization = await self.__get_organization_with_activities_and_address(organization_id=organization_id)
         if not organization:
             raise HTTPException(status_code=404, detail=f"Organization with ID: {organization_id} not found!")
         return organization
 
+    @invalidates("organizations")
     async def create_organization(
         self, organization: OrganizationCreate, activities: List[str]
     ) -> OrganizationDetailed:
@@ -105,6 +278,7 @@ class OrganizationsService(BaseService):
         )
         return created_organization
 
+    @invalidates("organizations")
     async def update_organization(
         self, organization_id: PositiveInt, organization: OrganizationUpdate
     ) -> OrganizationDetailed:
@@ -116,26 +290,124 @@ class OrganizationsService(BaseService):
         )
         return updated_organization
 
+    @invalidates("organizations")
     async def delete_organization(self, organization_id: PositiveInt) -> None:
-        result = await self.get_by_query_one_or_none(id=organization_id)
+        result = await self.get_by_query_one_or_none(projection=["id"], id=organization_id)
         if not result:
             raise HTTPException(status_code=404, detail=f"Organization with ID: {organization_id} not found!")
         await self.delete_by_query(id=organization_id)
         logger.info(f"Order with order_id {organization_id} deleted!")
 
-    async def get_organizations_by_building_id(self, building_id: PositiveInt) -> OrganizationList:
-        result = await self.get_by_query_all(building_id=building_id)
-        organizations = [organization.to_pydantic_schema() for organization in result]
-        return OrganizationList(organizations=organizations)
+    @invalidates("organizations")
+    async def create_organizations(self, organizations: list[OrganizationBatchCreate]) -> BatchResult:
+        return await self.__create_organizations(organizations=organizations)
+
+    @invalidates("organizations")
+    async def update_organizations(self, organizations: list[OrganizationBatchUpdate]) -> BatchResult:
+        return await self.__update_organizations(organizations=organizations)
 
-    async def get_organizations_by_activity_name(self, activity_name: str) -> OrganizationList:
+    @invalidates("organizations")
+    async def delete_organizations(self, organization_ids: list[PositiveInt]) -> BatchResult:
+        deleted_ids = await self.delete_many_by_ids(ids=organization_ids)
+        results = []
+        for index, organization_id in enumerate(organization_ids):
+            if organization_id in deleted_ids:
+                results.append(BatchItemResult(index=index, status=204, id=organization_id))
+            else:
+                detail = f"Organization with ID: {organization_id} not found!"
+                results.append(BatchItemResult(index=index, status=404, id=organization_id, detail=detail))
+        logger.info(f"{len(deleted_ids)} organizations deleted!")
+        return BatchResult(results=results)
+
+    @cached("organizations")
+    async def get_organizations_by_building_id(self, building_id: PositiveInt) -> list[dict[str, Any]]:
+        result = await self.get_by_query_all(projection=Organization, building_id=building_id)
+        return [dict(row) for row in result]
+
+    @cached("organizations", "activities")
+    async def get_organizations_by_activity_name(self, activity_name: str) -> list[dict[str, Any]]:
         return await self.__get_organizations_by_activity_name(activity_name=activity_name)
 
-    async def get_organizations_by_name(self, organization_name: str) -> OrganizationList:
-        return await self.__get_organizations_by_name(organization_name=organization_name)
+    @cached("organizations")
+    async def get_organizations_by_name(
+        self, organization_name: str, mode: NameSearchMode = "contains", limit: PositiveInt | None = None
+    ) -> list[dict[str, Any]]:
+        return await self.__get_organizations_by_name(organization_name=organization_name, mode=mode, limit=limit)
 
-    async def get_organizations_by_activity_tree(self, activity_name: str) -> OrganizationList:
+    @cached("organizations", "activities")
+    async def get_organizations_by_activity_tree(self, activity_name: str) -> list[dict[str, Any]]:
         return await self.__get_organizations_by_activity_tree(activity_name=activity_name)
 
-    async def get_organizations_by_radius(self, latitude: float, longitude: float, radius_km: float):
-        return await self.__get_organizations_by_radius(latitude=latitude, longitude=longitude, radius_km=radius_km)
+    @cached("organizations", "buildings", rounded=ROUNDED_COORDINATES)
+    async def get_organizations_by_radius(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        after_id: PositiveInt | None = None,
+        limit: PositiveInt | None = None,
+    ) -> list[dict[str, Any]]:
+        return await self.__get_organizations_by_radius(
+            latitude=latitude, longitude=longitude, radius_km=radius_km, after_id=after_id, limit=limit
+        )
+
+    @cached("organizations", "buildings", "activities", rounded=ROUNDED_COORDINATES)
+    async def get_nearest_organizations(
+        self,
+        latitude: float,
+        longitude: float,
+        limit: PositiveInt,
+        activity_name: str | None = None,
+        max_distance_km: float | None = None,
+    ) -> list[dict[str, Any]]:
+        """Get the organizations closest to the point with their addresses and distances, the closest first."""
+        return await self.__get_nearest_organizations(
+            latitude=latitude,
+            longitude=longitude,
+            limit=limit,
+            activity_name=activity_name,
+            max_distance_km=max_distance_km,
+        )
+
+    @cached("organizations", "buildings", "activities", rounded=ROUNDED_COORDINATES)
+    async def search_organizations(
+        self,
+        name: str | None = None,
+        activity_name: str | None = None,
+        building_id: PositiveInt | None = None,
+        latitude: float | None = None,
+        longitude: float | None = None,
+        radius_km: float | None = None,
+        min_latitude: float | None = None,
+        max_latitude: float | None = None,
+        min_longitude: float | None = None,
+        max_longitude: float | None = None,
+        after_id: PositiveInt | None = None,
+        limit: PositiveInt | None = None,
+        facets: bool = False,
+    ) -> dict[str, Any]:
+        """Get the organizations matching all given filters ordered by ID.
+
+        With `facets`, the matching organizations of all pages are also counted by top-level activity.
+        """
+        location = (latitude, longitude, radius_km)
+        if any(value is not None for value in location) and None in location:
+            raise HTTPException(status_code=422, detail="latitude, longitude and radius_km must be given together")
+        box = (min_latitude, max_latitude, min_longitude, max_longitude)
+        if any(value is not None for value in box) and None in box:
+            raise HTTPException(status_code=422, detail="All bounds of the bounding box must be given together")
+        if radius_km is not None and None not in box:
+            raise HTTPException(status_code=422, detail="Search either by radius or by bounding box, not both")
+        if None not in box and (min_latitude > max_latitude or min_longitude > max_longitude):
+            raise HTTPException(status_code=422, detail="The minimum bounds must not exceed the maximum bounds")
+        search = OrganizationSearch(
+            name=name,
+            building_id=building_id,
+            latitude=latitude,
+            longitude=longitude,
+            radius_km=radius_km,
+            box=None if None in box else box,
+        )
+        return await self.__get_search_results(
+            search=search, activity_name=activity_name, after_id=after_id, limit=limit, facets=facets
+        )
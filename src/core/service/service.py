@@ -1,10 +1,18 @@
 """The module contains base service."""
 
-from collections.abc import Sequence
+from collections.abc import AsyncIterator, Sequence
 from typing import Any
 from uuid import UUID
 
-from src.core.uow import UnitOfWork, transaction_mode
+from fastapi import Depends
+
+from src.core.uow import UnitOfWork, get_unit_of_work, transaction_mode
+
+
+def find_duplicate_indexes(ids: Sequence[Any]) -> set[int]:
+    """Get the indexes of the batch items whose ID is repeated later, only the last change of an object is applied."""
+    last_indexes = {obj_id: index for index, obj_id in enumerate(ids)}
+    return {index for index, obj_id in enumerate(ids) if last_indexes[obj_id] != index}
 
 
 class BaseService:
@@ -12,12 +20,13 @@ class BaseService:
 
     params:
         - base_repository: should be string like AbstractUnitOfWork class params
+        - uow: unit of work of the request; pass a new UnitOfWork when the service is used outside FastAPI
     """
 
     base_repository: str
 
-    def __init__(self) -> None:
-        self.uow: UnitOfWork = UnitOfWork()
+    def __init__(self, uow: UnitOfWork = Depends(get_unit_of_work)) -> None:
+        self.uow: UnitOfWork = uow
 
     @transaction_mode
     async def add_one(self, **kwargs: Any) -> None:
@@ -31,6 +40,10 @@ class BaseService:
     async def add_one_and_get_obj(self, **kwargs: Any) -> Any:
         return await self.uow.__dict__[self.base_repository].add_one_and_get_obj(**kwargs)
 
+    @transaction_mode
+    async def add_many_and_get_objs(self, values: Sequence[dict[str, Any]]) -> Sequence[Any]:
+        return await self.uow.__dict__[self.base_repository].add_many_and_get_objs(values=values)
+
     @transaction_mode
     async def get_by_query_one_or_none(self, **kwargs: Any) -> Any | None:
         return await self.uow.__dict__[self.base_repository].get_by_query_one_or_none(**kwargs)
@@ -39,14 +52,33 @@ class BaseService:
     async def get_by_query_all(self, **kwargs: Any) -> Sequence[Any]:
         return await self.uow.__dict__[self.base_repository].get_by_query_all(**kwargs)
 
+    @transaction_mode
+    async def get_version(self, **kwargs: Any) -> str | None:
+        return await self.uow.__dict__[self.base_repository].get_version(**kwargs)
+
+    async def stream_by_query_all(self, **kwargs: Any) -> AsyncIterator[Any]:
+        """Stream objects through a separate read-only unit of work, since the stream outlives the request one."""
+        uow = UnitOfWork()
+        async with uow.transaction(read_only=True):
+            async for obj in uow.__dict__[self.base_repository].stream_by_query_all(**kwargs):
+                yield obj
+
     @transaction_mode
     async def update_one_by_id(self, obj_id: int | str | UUID, **kwargs: Any) -> Any:
         return await self.uow.__dict__[self.base_repository].update_one_by_id(obj_id, **kwargs)
 
+    @transaction_mode
+    async def update_many_by_id(self, values: Sequence[dict[str, Any]]) -> set[int | str | UUID]:
+        return await self.uow.__dict__[self.base_repository].update_many_by_id(values=values)
+
     @transaction_mode
     async def delete_by_query(self, **kwargs: Any) -> None:
         await self.uow.__dict__[self.base_repository].delete_by_query(**kwargs)
 
+    @transaction_mode
+    async def delete_many_by_ids(self, ids: Sequence[int | str | UUID]) -> set[int | str | UUID]:
+        return await self.uow.__dict__[self.base_repository].delete_many_by_ids(ids=ids)
+
     @transaction_mode
     async def delete_all(self) -> None:
         await self.uow.__dict__[self.base_repository].delete_all()
@@ -1 +1 @@
-from .unit_of_work import UnitOfWork, transaction_mode
+from .unit_of_work import UnitOfWork, get_unit_of_work, primary_reads, transaction_mode
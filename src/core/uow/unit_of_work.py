@@ -1,19 +1,41 @@
 import functools
 from abc import ABC, abstractmethod
-from collections.abc import Awaitable, Callable
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from types import TracebackType
 from typing import Any, Never
 
-from src.core.db import async_session
-from src.core.repository import ActivitiesRepository, BuildingsRepository, OrganizationsRepository
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.db import async_session, get_read_session_factory
+from src.core.repository import (
+    ActivitiesRepository,
+    BuildingsRepository,
+    CatalogVersionsRepository,
+    OrganizationsRepository,
+)
 
 AsyncFunc = Callable[..., Awaitable[Any]]
 
+_primary_reads: ContextVar[bool] = ContextVar("primary_reads", default=False)
+
+
+@contextmanager
+def primary_reads() -> Iterator[None]:
+    """Send the read-only transactions of the block to the primary, e.g. for results that outlive the request."""
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
 
 class AbstractUnitOfWork(ABC):
     activities: ActivitiesRepository
     buildings: BuildingsRepository
     organizations: OrganizationsRepository
+    versions: CatalogVersionsRepository
 
     @abstractmethod
     def __init__(self) -> Never:
@@ -32,6 +54,10 @@ class AbstractUnitOfWork(ABC):
     ) -> Never:
         raise NotImplementedError
 
+    @abstractmethod
+    def transaction(self, read_only: bool = False) -> Never:
+        raise NotImplementedError
+
     @abstractmethod
     async def commit(self) -> Never:
         raise NotImplementedError
@@ -42,16 +68,25 @@ class AbstractUnitOfWork(ABC):
 
 
 class UnitOfWork(AbstractUnitOfWork):
-    """The class responsible for the atomicity of transactions."""
+    """The class responsible for the atomicity of transactions.
+
+    Nested blocks join the session of the outermost block, which alone commits or rolls back, so a unit
+    of work shared by the whole request gives one transaction per request. The session is opened lazily
+    by `transaction`: read-only blocks go to a replica until the first write, after which the unit of work
+    stays on the primary so the rest of the request reads its own writes. Inside `primary_reads` the
+    read-only blocks go to the primary as well.
+    """
 
     def __init__(self) -> None:
         self.session_factory = async_session
+        self.read_session_factory = get_read_session_factory
+        self.session: AsyncSession | None = None
+        self._on_replica = False
+        self._depth = 0
+        self._after_commit: list[AsyncFunc] = []
 
     async def __aenter__(self) -> None:
-        self.session = self.session_factory()
-        self.activities = ActivitiesRepository(self.session)
-        self.buildings = BuildingsRepository(self.session)
-        self.organizations = OrganizationsRepository(self.session)
+        self._depth += 1
 
     async def __aexit__(
         self,
@@ -59,11 +94,45 @@ class UnitOfWork(AbstractUnitOfWork):
         exc_val: BaseException | None,
         exc_tb: TracebackType | None,
     ) -> None:
+        self._depth -= 1
+        if self._depth:
+            return None
+        callbacks, self._after_commit = self._after_commit, []
+        if not self.session:
+            return None
+
+        try:
+            if not exc_type:
+                await self.commit()
+            else:
+                await self.rollback()
+        finally:
+            await self.session.close()
+            self.session = None
+
         if not exc_type:
-            await self.commit()
-        else:
-            await self.rollback()
-        await self.session.close()
+            for callback in callbacks:
+                await callback()
+
+    @asynccontextmanager
+    async def transaction(self, read_only: bool = False) -> AsyncIterator["UnitOfWork"]:
+        async with self:
+            read_only = read_only and not _primary_reads.get()
+            if not self.session:
+                read_session_factory = self.read_session_factory() if read_only else self.session_factory
+                self._bind(read_session_factory)
+            elif not read_only and self._on_replica:
+                await self.session.close()
+                self._bind(self.session_factory)
+            yield self
+
+    def _bind(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self.session = session_factory()
+        self._on_replica = session_factory is not self.session_factory
+        self.activities = ActivitiesRepository(self.session)
+        self.buildings = BuildingsRepository(self.session)
+        self.organizations = OrganizationsRepository(self.session)
+        self.versions = CatalogVersionsRepository(self.session)
 
     async def commit(self) -> None:
         await self.session.commit()
@@ -71,13 +140,30 @@ class UnitOfWork(AbstractUnitOfWork):
     async def rollback(self) -> None:
         await self.session.rollback()
 
+    def call_after_commit(self, callback: AsyncFunc) -> None:
+        """Schedule a callback to run once the outermost transaction is committed."""
+        if callback not in self._after_commit:
+            self._after_commit.append(callback)
+
+
+async def get_unit_of_work() -> AsyncGenerator[UnitOfWork, None]:
+    """Provide the unit of work shared by all services of a request and commit it when the endpoint returns."""
+    uow = UnitOfWork()
+    async with uow:
+        yield uow
+
 
 def transaction_mode(func: AsyncFunc) -> AsyncFunc:
-    """Decorate a function with transaction mode."""
+    """Decorate a function with transaction mode.
+
+    Inside a request the function joins the request transaction instead of opening its own.
+    Functions named `get_*` are read-only and may be served by a replica.
+    """
+    read_only = func.__name__.lstrip("_").startswith("get_")
 
     @functools.wraps(func)
     async def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
-        async with self.uow:
+        async with self.uow.transaction(read_only=read_only):
             return await func(self, *args, **kwargs)
 
     return wrapper
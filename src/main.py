@@ -1,17 +1,90 @@
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import APIRouter, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import Gauge, make_asgi_app
 
 from src.api.api_v1 import api_router
+from src.api.instrumentation import RequestMetricsMiddleware
 from src.config import settings
+from src.core.cache import activity_catalog, building_index, response_cache
 from src.core.db.initial_data import seed_data
-from src.core.db.session import async_session
+from src.core.db.session import async_session, warm_up_engines
+from src.utils import get_logger
+from src.utils.runtime import monitor_event_loop, track_gc_pauses
+
+logger = get_logger(__file__, log_level=logging.INFO)
+
+STARTUP_PHASE_TIME = Gauge("catalog_startup_phase_seconds", "Duration of the startup phases of the worker.", ["phase"])
 
 root_router = APIRouter()
 
 
+@root_router.get("/health", status_code=200, include_in_schema=False)
+async def health() -> dict[str, str]:
+    """Report that the worker has finished its startup and serves requests."""
+    return {"status": "ok"}
+
+
+async def run_phase(phase: str, awaitable: Awaitable[None]) -> None:
+    started_at = time.perf_counter()
+    await awaitable
+    elapsed = time.perf_counter() - started_at
+    STARTUP_PHASE_TIME.labels(phase=phase).set(elapsed)
+    logger.info(f"Startup phase {phase} took {elapsed * 1000:.0f} ms")
+
+
+async def seed() -> None:
+    async with async_session() as session:
+        await seed_data(session)
+
+
+async def warm_up() -> None:
+    """Open the database connections and load the in-process caches concurrently."""
+    connections = settings.DB_POOL_WARMUP_CONNECTIONS
+    if connections is None:
+        connections = settings.DB_POOL_SIZE
+    phases = [run_phase("pool", warm_up_engines(connections=connections))]
+    if settings.ACTIVITY_CATALOG_ENABLED:
+        phases.append(run_phase("activity_catalog", activity_catalog.reload()))
+    if settings.BUILDING_INDEX_ENABLED:
+        phases.append(run_phase("building_index", building_index.reload()))
+    await asyncio.gather(*phases)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    started_at = time.perf_counter()
+    track_gc_pauses()
+    background_tasks = [asyncio.create_task(monitor_event_loop(interval=settings.EVENT_LOOP_LAG_INTERVAL_SECONDS))]
+    if settings.SEED_DATA:
+        await run_phase("seed", seed())
+    await run_phase("warm_up", warm_up())
+    if settings.ACTIVITY_CATALOG_ENABLED:
+        background_tasks.append(
+            asyncio.create_task(activity_catalog.watch(interval=settings.ACTIVITY_CATALOG_REFRESH_SECONDS))
+        )
+    if settings.BUILDING_INDEX_ENABLED:
+        background_tasks.append(
+            asyncio.create_task(building_index.watch(interval=settings.BUILDING_INDEX_REFRESH_SECONDS))
+        )
+    STARTUP_PHASE_TIME.labels(phase="total").set(time.perf_counter() - started_at)
+    logger.info(f"Startup finished in {(time.perf_counter() - started_at) * 1000:.0f} ms")
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    await response_cache.close()
+
+
 def get_application() -> FastAPI:
-    app = FastAPI(title="Organizations Catalog FastAPI")
+    app = FastAPI(title="Organizations Catalog FastAPI", lifespan=lifespan)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -19,19 +92,15 @@ def get_application() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(RequestMetricsMiddleware)
     app.include_router(api_router, prefix=settings.API_V1_STR)
     app.include_router(root_router)
+    app.mount("/metrics", make_asgi_app())
     return app
 
 
 app = get_application()
 
 
-@app.on_event("startup")
-async def startup_event():
-    async with async_session() as session:
-        await seed_data(session)
-
-
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=False, log_level="info")
@@ -0,0 +1,63 @@
+"""Production launcher serving the API with a worker process per CPU.
+
+Usage:
+    python -m src.server
+"""
+
+import logging
+import os
+
+import uvicorn
+
+from src.config import settings
+from src.utils import get_logger
+
+logger = get_logger(__file__, log_level=logging.INFO)
+
+
+def get_worker_count() -> int:
+    """Get SERVER_WORKERS or the number of CPUs the process may run on, which respects the container cpuset."""
+    if settings.SERVER_WORKERS:
+        return settings.SERVER_WORKERS
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def check_cache_backend(workers: int) -> None:
+    """Refuse to start several workers with per-process caches, a write would only invalidate the one of its worker."""
+    if workers > 1 and settings.CACHE_ENABLED and settings.CACHE_BACKEND == "memory":
+        raise SystemExit(
+            f"{workers} workers cannot share the in-memory response cache: set CACHE_BACKEND=redis, "
+            "CACHE_ENABLED=false or SERVER_WORKERS=1"
+        )
+
+
+def main() -> None:
+    workers = get_worker_count()
+    check_cache_backend(workers)
+    connections = workers * (settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+    logger.info(
+        f"Starting {workers} workers on {settings.SERVER_HOST}:{settings.SERVER_PORT}, "
+        f"up to {connections} connections to every database server"
+    )
+    # The supervisor spawns the workers, each importing the application and creating its own engines,
+    # and replaces workers that exit after SERVER_MAX_REQUESTS requests.
+    uvicorn.run(
+        "src.main:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=workers,
+        loop=settings.SERVER_LOOP,
+        http=settings.SERVER_HTTP,
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEP_ALIVE_SECONDS,
+        limit_concurrency=settings.SERVER_LIMIT_CONCURRENCY,
+        limit_max_requests=settings.SERVER_MAX_REQUESTS,
+        access_log=settings.SERVER_ACCESS_LOG,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
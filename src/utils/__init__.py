@@ -1 +1,2 @@
+from .geo import EARTH_RADIUS_KM, bounding_box
 from .logging import get_logger
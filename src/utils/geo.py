@@ -0,0 +1,33 @@
+"""Provides helpers for geographic calculations."""
+
+import math
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def bounding_box(
+    latitude: float, longitude: float, radius_km: float
+) -> tuple[float, float, float | None, float | None]:
+    """
+    Get the latitude/longitude box that encloses a circle on the Earth surface.
+
+    Args:
+        latitude {float}: latitude of the center point
+        longitude {float}: longitude of the center point
+        radius_km {float}: radius of the circle in kilometers
+    Returns:
+        (min_latitude, max_latitude, min_longitude, max_longitude); longitude bounds are None
+        when the circle touches a pole or crosses the antimeridian
+    """
+    delta_latitude = radius_km / KM_PER_DEGREE
+    min_latitude, max_latitude = latitude - delta_latitude, latitude + delta_latitude
+    if min_latitude <= -90 or max_latitude >= 90:
+        return max(min_latitude, -90.0), min(max_latitude, 90.0), None, None
+
+    delta_longitude = delta_latitude / math.cos(math.radians(max(abs(min_latitude), abs(max_latitude))))
+    min_longitude, max_longitude = longitude - delta_longitude, longitude + delta_longitude
+    if min_longitude < -180 or max_longitude > 180:
+        return min_latitude, max_latitude, None, None
+
+    return min_latitude, max_latitude, min_longitude, max_longitude
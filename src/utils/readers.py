@@ -0,0 +1,77 @@
+"""Provides readers of tabular data files."""
+
+import csv
+import io
+import json
+from typing import Any, BinaryIO, Iterator, Text
+
+import xlrd
+
+
+def iter_csv_rows(binary_file: BinaryIO) -> Iterator[dict[str, Any]]:
+    """
+    Iterate over the rows of a CSV file with a header line.
+
+    Args:
+        binary_file {BinaryIO}: binary file object
+    Returns:
+        iterator of rows as dicts keyed by the header names
+    """
+    text_file = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    yield from csv.DictReader(text_file)
+
+
+def iter_ndjson_rows(binary_file: BinaryIO) -> Iterator[dict[str, Any]]:
+    """
+    Iterate over the objects of a newline-delimited JSON file, skipping blank lines.
+
+    Args:
+        binary_file {BinaryIO}: binary file object
+    Returns:
+        iterator of decoded objects
+    """
+    for line in binary_file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_xls_rows(binary_file: BinaryIO) -> Iterator[dict[str, Any]]:
+    """
+    Iterate over the rows of the first sheet of an XLS workbook with a header row.
+
+    Args:
+        binary_file {BinaryIO}: binary file object
+    Returns:
+        iterator of rows as dicts keyed by the header names
+    """
+    sheet = xlrd.open_workbook(file_contents=binary_file.read()).sheet_by_index(0)
+    header = [str(value).strip() for value in sheet.row_values(0)]
+    for row_index in range(1, sheet.nrows):
+        yield {name: _xls_cell_to_text(value) for name, value in zip(header, sheet.row_values(row_index))}
+
+
+def _xls_cell_to_text(value: Any) -> Text:
+    """Render the cell like CSV would, so 42.0 stored by Excel for IDs and phones becomes "42"."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+ROW_READERS = {
+    "csv": iter_csv_rows,
+    "ndjson": iter_ndjson_rows,
+    "xls": iter_xls_rows,
+}
+
+
+def iter_rows(binary_file: BinaryIO, file_format: Text) -> Iterator[dict[str, Any]]:
+    """
+    Iterate over the rows of a CSV, NDJSON or XLS file.
+
+    Args:
+        binary_file {BinaryIO}: binary file object
+        file_format {Text}: one of "csv", "ndjson", "xls"
+    Returns:
+        iterator of rows as dicts
+    """
+    return ROW_READERS[file_format](binary_file)
@@ -0,0 +1,72 @@
+"""Provides metrics of the worker process: event loop lag, garbage collector pauses and resident memory."""
+
+import asyncio
+import gc
+import os
+import time
+from collections.abc import Iterator
+from typing import Any
+
+from prometheus_client import REGISTRY, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+EVENT_LOOP_LAG = Histogram(
+    "catalog_event_loop_lag_seconds",
+    "Delay of the event loop in waking up a sleeping task; blocking calls show up as lag.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+GC_PAUSE = Histogram(
+    "catalog_gc_pause_seconds",
+    "Duration of garbage collections by generation; the event loop is blocked while they run.",
+    ["generation"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+_gc_started_at = 0.0
+
+
+async def monitor_event_loop(interval: float) -> None:
+    """Observe how late the event loop resumes a task sleeping for the interval, until cancelled."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started_at = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(loop.time() - started_at - interval, 0.0))
+
+
+def _observe_gc(phase: str, info: dict[str, Any]) -> None:
+    global _gc_started_at
+    if phase == "start":
+        _gc_started_at = time.perf_counter()
+    else:
+        GC_PAUSE.labels(generation=str(info["generation"])).observe(time.perf_counter() - _gc_started_at)
+
+
+def track_gc_pauses() -> None:
+    if _observe_gc not in gc.callbacks:
+        gc.callbacks.append(_observe_gc)
+
+
+class WorkerMemoryCollector(Collector):
+    """Report the resident memory of the worker process labeled by its PID.
+
+    Every worker serves its own /metrics, so the PID tells the workers apart in the scraped series.
+    """
+
+    page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        try:
+            with open("/proc/self/statm") as statm:
+                resident_pages = int(statm.read().split()[1])
+        except OSError:
+            return None
+        metric = GaugeMetricFamily(
+            "catalog_worker_resident_memory_bytes", "Resident memory of the worker process.", labels=["pid"]
+        )
+        metric.add_metric([str(os.getpid())], resident_pages * self.page_size)
+        yield metric
+
+
+REGISTRY.register(WorkerMemoryCollector())
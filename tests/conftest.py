@@ -0,0 +1,104 @@
+"""Fixtures of the tests running against PostgreSQL.
+
+The tests use the server configured by the HOST, PORT, USER and PASSWORD variables and a database of their
+own, TEST_DB_NAME (organization_catalog_test by default), which is recreated and migrated to the head
+revision once per run. The tests needing the database are skipped when the server is unreachable.
+"""
+
+import asyncio
+import os
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+from pathlib import Path
+
+# The settings and engines are created on import, so the test database has to be chosen first.
+os.environ["NAME"] = os.environ.get("TEST_DB_NAME", "organization_catalog_test")
+os.environ["DB_USE_NULL_POOL"] = "true"
+os.environ["CACHE_BACKEND"] = "memory"
+
+import asyncpg  # noqa: E402
+import pytest  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from src.config import settings  # noqa: E402
+from src.core.cache import response_cache  # noqa: E402
+from src.core.cache.backends import MemoryCacheBackend  # noqa: E402
+from src.core.db import async_session  # noqa: E402
+from src.core.db.instrumentation import QueryStats, count_queries  # noqa: E402
+from src.main import app  # noqa: E402
+
+ROOT = Path(__file__).parent.parent
+TABLES = ["organization_activity", "organizations", "buildings", "activity_closure", "activities"]
+
+
+def get_alembic_config() -> Config:
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    config.set_main_option("sqlalchemy.url", settings.DB_URL)
+    return config
+
+
+async def recreate_database() -> None:
+    connection = await asyncpg.connect(
+        host=settings.HOST,
+        port=settings.PORT,
+        user=settings.USER,
+        password=settings.PASSWORD,
+        database="postgres",
+        timeout=5,
+    )
+    try:
+        await connection.execute(f'DROP DATABASE IF EXISTS "{settings.NAME}" WITH (FORCE)')
+        await connection.execute(f'CREATE DATABASE "{settings.NAME}"')
+    finally:
+        await connection.close()
+
+
+@pytest.fixture(scope="session")
+def alembic_config() -> Config:
+    """Create the test database and migrate it to the head revision."""
+    try:
+        asyncio.run(recreate_database())
+    except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as exc:
+        pytest.skip(f"PostgreSQL is unavailable: {exc}")
+    config = get_alembic_config()
+    command.upgrade(config, "head")
+    return config
+
+
+@pytest.fixture
+async def db(alembic_config: Config) -> AsyncIterator[None]:
+    """Provide an empty migrated database, emptied again after the test."""
+    yield
+    async with async_session() as session:
+        await session.execute(text(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE"))
+        await session.commit()
+
+
+@pytest.fixture(autouse=True)
+def empty_response_cache() -> None:
+    response_cache.backend = MemoryCacheBackend(max_entries=settings.CACHE_MAX_ENTRIES)
+
+
+@pytest.fixture
+async def client(db: None) -> AsyncIterator[AsyncClient]:
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test", headers={"api-key": settings.API_KEY}
+    ) as client:
+        yield client
+
+
+@pytest.fixture
+def assert_queries() -> Callable[[int], AbstractContextManager[QueryStats]]:
+    """Assert the number of queries issued inside the block, including the ones of the requests it sends."""
+
+    @contextmanager
+    def assert_queries(expected: int) -> Iterator[QueryStats]:
+        with count_queries() as stats:
+            yield stats
+        assert stats.queries == expected, f"{stats.queries} queries were issued, expected {expected}"
+
+    return assert_queries
@@ -0,0 +1,73 @@
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from src.core.db import async_session
+from tests.utils import create_activity, create_building, create_organization
+
+
+async def get_ancestors(activity_id: int) -> dict[int, int]:
+    """Get the depth of every ancestor of the activity, the activity itself included, from the closure table."""
+    async with async_session() as session:
+        result = await session.execute(
+            text("SELECT ancestor_id, depth FROM activity_closure WHERE descendant_id = :activity_id"),
+            {"activity_id": activity_id},
+        )
+        return dict(result.all())
+
+
+async def move(client: AsyncClient, activity_id: int, name: str, parent_id: int | None) -> int:
+    response = await client.put(f"/api_v1/activities/{activity_id}", json={"name": name, "parent_id": parent_id})
+    return response.status_code
+
+
+async def test_closure_follows_created_and_moved_activities(client: AsyncClient) -> None:
+    food = await create_activity(client, name="Еда")
+    meat = await create_activity(client, name="Мясная продукция", parent_id=food)
+    sausages = await create_activity(client, name="Колбасы", parent_id=meat)
+    shops = await create_activity(client, name="Магазины")
+    assert await get_ancestors(sausages) == {sausages: 0, meat: 1, food: 2}
+
+    assert await move(client, meat, name="Мясная продукция", parent_id=shops) == 200
+    assert await get_ancestors(meat) == {meat: 0, shops: 1}
+    assert await get_ancestors(sausages) == {sausages: 0, meat: 1, shops: 2}
+    assert await get_ancestors(food) == {food: 0}
+
+    assert await move(client, meat, name="Мясная продукция", parent_id=None) == 200
+    assert await get_ancestors(sausages) == {sausages: 0, meat: 1}
+
+
+async def test_move_is_rejected_past_the_maximum_depth(client: AsyncClient) -> None:
+    food = await create_activity(client, name="Еда")
+    meat = await create_activity(client, name="Мясная продукция", parent_id=food)
+    cars = await create_activity(client, name="Автомобили")
+    trucks = await create_activity(client, name="Грузовые", parent_id=cars)
+    sausages = await create_activity(client, name="Колбасы", parent_id=meat)
+
+    # Food with its two levels would end up on the fourth level under trucks.
+    assert await move(client, food, name="Еда", parent_id=trucks) == 400
+    assert await move(client, food, name="Еда", parent_id=sausages) == 400
+    assert await get_ancestors(sausages) == {sausages: 0, meat: 1, food: 2}
+
+    response = await client.post("/api_v1/activities", json={"name": "Сырокопчёные", "parent_id": sausages})
+    assert response.status_code == 400
+    assert await move(client, sausages, name="Колбасы", parent_id=trucks) == 200
+    assert await get_ancestors(sausages) == {sausages: 0, trucks: 1, cars: 2}
+
+
+async def test_organizations_by_activity_tree_follow_a_move(client: AsyncClient) -> None:
+    food = await create_activity(client, name="Еда")
+    meat = await create_activity(client, name="Мясная продукция", parent_id=food)
+    shops = await create_activity(client, name="Магазины")
+    building_id = await create_building(client, address="Тверская, 1", latitude=55.7558, longitude=37.6173)
+    organization_id = await create_organization(
+        client, name="ООО Мясокомбинат", building_id=building_id, activities=["Мясная продукция"]
+    )
+
+    async def get_tree_ids(activity_name: str) -> list[int]:
+        response = await client.get("/api_v1/organizations/by_activity_tree", params={"activity_name": activity_name})
+        return [organization["id"] for organization in response.json()["organizations"]]
+
+    assert await get_tree_ids("Еда") == [organization_id]
+    assert await move(client, meat, name="Мясная продукция", parent_id=shops) == 200
+    assert await get_tree_ids("Еда") == []
+    assert await get_tree_ids("Магазины") == [organization_id]
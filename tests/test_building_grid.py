@@ -0,0 +1,95 @@
+import math
+import random
+
+import pytest
+
+from src.core.cache.buildings import BuildingGrid, BuildingLocation
+from src.utils import EARTH_RADIUS_KM
+
+pytest.importorskip("numpy")
+
+# Points near Moscow, the antimeridian and the North Pole, where the bounding box wraps or covers all longitudes.
+CENTERS = [(55.7558, 37.6173), (-16.5, 179.95), (-16.5, -179.95), (89.95, 10.0), (-89.9, -120.0)]
+
+
+def distance_km(latitude: float, longitude: float, other_latitude: float, other_longitude: float) -> float:
+    haversine = (
+        math.sin(math.radians(other_latitude - latitude) / 2) ** 2
+        + math.cos(math.radians(latitude))
+        * math.cos(math.radians(other_latitude))
+        * math.sin(math.radians(other_longitude - longitude) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(haversine, 1.0)))
+
+
+def brute_force_by_radius(
+    locations: dict[int, BuildingLocation], latitude: float, longitude: float, radius_km: float, limit: int | None
+) -> list[int]:
+    distances = {
+        building_id: distance_km(latitude, longitude, building_latitude, building_longitude)
+        for building_id, (_, building_latitude, building_longitude) in locations.items()
+    }
+    found = sorted((distance, building_id) for building_id, distance in distances.items() if distance <= radius_km)
+    return [building_id for _, building_id in found[:limit]]
+
+
+def random_location(randomizer: random.Random, building_id: int) -> BuildingLocation:
+    if randomizer.random() < 0.2:
+        return f"Улица, {building_id}", randomizer.uniform(-90, 90), randomizer.uniform(-180, 180)
+    latitude, longitude = randomizer.choice(CENTERS)
+    latitude = min(max(latitude + randomizer.uniform(-0.5, 0.5), -90), 90)
+    longitude = (longitude + randomizer.uniform(-0.5, 0.5) + 180) % 360 - 180
+    return f"Улица, {building_id}", latitude, longitude
+
+
+@pytest.fixture
+def locations() -> dict[int, BuildingLocation]:
+    randomizer = random.Random(42)
+    return {building_id: random_location(randomizer, building_id) for building_id in range(1, 2001)}
+
+
+def assert_matches_brute_force(grid: BuildingGrid, locations: dict[int, BuildingLocation]) -> None:
+    for latitude, longitude in CENTERS:
+        for radius_km in (0.5, 5, 30, 200):
+            for limit in (None, 1, 10):
+                found = grid.get_by_radius(latitude=latitude, longitude=longitude, radius_km=radius_km, limit=limit)
+                expected = brute_force_by_radius(locations, latitude, longitude, radius_km, limit)
+                assert [building["id"] for building in found] == expected, (latitude, longitude, radius_km, limit)
+                for building in found:
+                    assert (building["address"], building["latitude"], building["longitude"]) == locations[
+                        building["id"]
+                    ]
+
+
+@pytest.mark.parametrize("cell_degrees", [0.01, 0.1, 1.0, 7.0])
+def test_grid_matches_brute_force(locations: dict[int, BuildingLocation], cell_degrees: float) -> None:
+    grid = BuildingGrid.build(
+        version=1, cell_degrees=cell_degrees, locations=[(key, *location) for key, location in locations.items()]
+    )
+    assert_matches_brute_force(grid, locations)
+
+
+def test_grid_with_changes_matches_brute_force(locations: dict[int, BuildingLocation]) -> None:
+    grid = BuildingGrid.build(
+        version=1, cell_degrees=0.1, locations=[(key, *location) for key, location in locations.items()]
+    )
+    randomizer = random.Random(7)
+    for version in range(2, 5):
+        changes: dict[int, BuildingLocation | None] = {}
+        for building_id in randomizer.sample(sorted(locations), 50):
+            changes[building_id] = None if randomizer.random() < 0.5 else random_location(randomizer, building_id)
+        for building_id in range(len(locations) + 1000 * version, len(locations) + 1000 * version + 20):
+            changes[building_id] = random_location(randomizer, building_id)
+
+        grid = grid.with_changes(version=version, changes=changes)
+        for building_id, location in changes.items():
+            if location is None:
+                locations.pop(building_id, None)
+            else:
+                locations[building_id] = location
+        assert_matches_brute_force(grid, locations)
+
+
+def test_empty_grid() -> None:
+    grid = BuildingGrid.build(version=0, cell_degrees=0.1, locations=[])
+    assert grid.get_by_radius(latitude=55.7558, longitude=37.6173, radius_km=10) == []
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from src.core.cache import activity_catalog
+from tests.utils import AssertQueries, create_activity, create_building, create_organization
+
+
+@pytest.fixture
+async def organization(client: AsyncClient) -> dict[str, int]:
+    activity_id = await create_activity(client, name="Еда")
+    building_id = await create_building(client, address="Тверская, 1", latitude=55.7558, longitude=37.6173)
+    organization_id = await create_organization(client, name="ООО Ромашка", building_id=building_id, activities=["Еда"])
+    return {"id": organization_id, "building_id": building_id, "activity_id": activity_id}
+
+
+@pytest.fixture
+async def loaded_activity_catalog(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Load the activity catalog, and unload it after the test."""
+    monkeypatch.setattr(activity_catalog, "_snapshot", None)
+    await activity_catalog.reload()
+
+
+async def test_organization_is_served_from_the_cache(
+    client: AsyncClient, organization: dict[str, int], assert_queries: AssertQueries
+) -> None:
+    path = f"/api_v1/organizations/{organization['id']}"
+    response = await client.get(path)
+    # Only the version query the ETag is built from is issued.
+    with assert_queries(1):
+        assert (await client.get(path)).json() == response.json()
+
+
+async def test_organization_update_invalidates_the_cache(
+    client: AsyncClient, organization: dict[str, int], assert_queries: AssertQueries
+) -> None:
+    path = f"/api_v1/organizations/{organization['id']}"
+    await client.get(path)
+
+    update = {"name": "ООО Лютик", "phones": "8-800-555-35-35", "building_id": organization["building_id"]}
+    assert (await client.put(path, json=update)).status_code == 201
+    assert (await client.get(path)).json()["name"] == "ООО Лютик"
+    with assert_queries(1):
+        assert (await client.get(path)).json()["name"] == "ООО Лютик"
+
+
+async def test_building_update_invalidates_the_cached_organization(
+    client: AsyncClient, organization: dict[str, int]
+) -> None:
+    path = f"/api_v1/organizations/{organization['id']}"
+    assert (await client.get(path)).json()["address"] == "Тверская, 1"
+
+    building = {"address": "Тверская, 2", "latitude": 55.7558, "longitude": 37.6173}
+    assert (await client.put(f"/api_v1/buildings/{organization['building_id']}", json=building)).status_code == 200
+    assert (await client.get(path)).json()["address"] == "Тверская, 2"
+
+
+async def test_organization_delete_invalidates_the_cache(client: AsyncClient, organization: dict[str, int]) -> None:
+    path = f"/api_v1/organizations/{organization['id']}"
+    await client.get(path)
+
+    assert (await client.delete(path)).status_code == 204
+    assert (await client.get(path)).status_code == 404
+
+
+async def test_activity_rename_during_a_cached_tree_read(
+    client: AsyncClient,
+    organization: dict[str, int],
+    loaded_activity_catalog: None,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def get_tree_ids(activity_name: str) -> list[int]:
+        response = await client.get("/api_v1/organizations/by_activity_tree", params={"activity_name": activity_name})
+        return [organization["id"] for organization in response.json()["organizations"]]
+
+    assert await get_tree_ids("Еда") == [organization["id"]]
+
+    # The tree is read after the rename is committed and before the catalog is reloaded.
+    reload, reload_started, read_done = activity_catalog.reload, asyncio.Event(), asyncio.Event()
+
+    async def delayed_reload() -> None:
+        reload_started.set()
+        await read_done.wait()
+        await reload()
+
+    async def read_during_reload() -> None:
+        await reload_started.wait()
+        await get_tree_ids("Продукты")
+        read_done.set()
+
+    monkeypatch.setattr(activity_catalog, "reload", delayed_reload)
+    rename = {"name": "Продукты", "parent_id": None}
+    response, _ = await asyncio.gather(
+        client.put(f"/api_v1/activities/{organization['activity_id']}", json=rename), read_during_reload()
+    )
+    assert response.status_code == 200
+
+    assert await get_tree_ids("Продукты") == [organization["id"]]
+    assert await get_tree_ids("Еда") == []
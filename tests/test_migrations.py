@@ -0,0 +1,139 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+import pytest
+from sqlalchemy import ForeignKey, event, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from alembic import command
+from alembic.config import Config
+from src.core.db import async_session
+from src.core.db.session import async_engine
+from src.core.models import BaseModel
+from src.core.repository.activities import ActivitiesRepository
+from src.core.repository.buildings import BuildingsRepository
+from src.core.repository.organizations import OrganizationsRepository
+from src.core.repository.repository import SqlAlchemyRepository
+
+# A catalog big enough, and analyzed, for the planner to prefer the indexes wherever they apply.
+CATALOG = """
+INSERT INTO buildings (id, address, latitude, longitude)
+SELECT i, 'Улица ' || i, 55 + i % 100 * 0.01, 37 + i / 100 * 0.01 FROM generate_series(1, 10000) AS i;
+INSERT INTO activities (id, name, parent_id)
+SELECT i, 'Вид ' || i, CASE WHEN i > 100 THEN i % 100 + 1 END FROM generate_series(1, 1000) AS i;
+INSERT INTO activity_closure (ancestor_id, descendant_id, depth)
+SELECT id, id, 0 FROM activities UNION ALL SELECT parent_id, id, 1 FROM activities WHERE parent_id IS NOT NULL;
+INSERT INTO organizations (id, name, phones, building_id)
+SELECT i, 'Организация ' || i, '8-800-555-35-35', (i - 1) % 9000 + 1 FROM generate_series(1, 10000) AS i;
+INSERT INTO organization_activity (organization_id, activity_id)
+SELECT i, i % 1000 + 1 FROM generate_series(1, 10000) AS i;
+ANALYZE
+"""
+
+REPOSITORY_CALLS = [
+    (ActivitiesRepository, "get_ids_by_names", {"names": ["Вид 1"]}),
+    (ActivitiesRepository, "get_subtree_ids", {"activity_name": "Вид 1"}),
+    (ActivitiesRepository, "get_ids_with_subactivities", {"activity_ids": [1]}),
+    (ActivitiesRepository, "delete_many_by_ids", {"ids": [1000]}),
+    (OrganizationsRepository, "get_organizations_by_activity_tree", {"activity_name": "Вид 1"}),
+    (OrganizationsRepository, "get_organizations_by_activity_ids", {"activity_ids": [1, 101]}),
+    (OrganizationsRepository, "get_by_query_all", {"building_id": 1}),
+    (OrganizationsRepository, "get_used_building_ids", {"building_ids": [1]}),
+    (OrganizationsRepository, "get_organizations_by_radius", {"latitude": 55.5, "longitude": 37.5, "radius_km": 1}),
+    (OrganizationsRepository, "delete_many_by_ids", {"ids": [1]}),
+    (BuildingsRepository, "get_buildings_by_radius", {"latitude": 55.5, "longitude": 37.5, "radius_km": 1}),
+    (BuildingsRepository, "delete_many_by_ids", {"ids": [10000]}),
+]
+
+FOREIGN_KEYS = [foreign_key for table in BaseModel.metadata.sorted_tables for foreign_key in table.foreign_keys]
+
+
+@pytest.fixture
+async def catalog(db: None) -> None:
+    async with async_session() as session:
+        for statement in CATALOG.split(";"):
+            await session.execute(text(statement))
+        await session.commit()
+
+
+@contextmanager
+def capture_statements() -> Iterator[list[tuple[str, Any]]]:
+    """Collect the SQL and the parameters of the statements executed inside the block."""
+    statements = []
+
+    def before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, *args: Any) -> None:
+        statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def get_plans(call: Callable[[AsyncSession], Awaitable[Any]]) -> list[tuple[str, str]]:
+    """Get the EXPLAIN output of every statement the call executes, with the parameters it bound."""
+    async with async_session() as session:
+        with capture_statements() as statements:
+            await call(session)
+        connection = await session.connection()
+        plans = []
+        for statement, parameters in statements:
+            result = await connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+            plans.append((statement, "\n".join(result.scalars())))
+        await session.rollback()
+    return plans
+
+
+@pytest.mark.parametrize(
+    ("repository", "method", "kwargs"),
+    REPOSITORY_CALLS,
+    ids=[f"{call[0].__name__}.{call[1]}" for call in REPOSITORY_CALLS],
+)
+async def test_repository_queries_do_not_scan_tables(
+    catalog: None, repository: type[SqlAlchemyRepository], method: str, kwargs: dict[str, Any]
+) -> None:
+    plans = await get_plans(lambda session: getattr(repository(session), method)(**kwargs))
+    assert plans
+    for statement, plan in plans:
+        assert "Seq Scan" not in plan, f"{statement}\n{plan}"
+
+
+@pytest.mark.parametrize("foreign_key", FOREIGN_KEYS, ids=lambda foreign_key: str(foreign_key.parent))
+async def test_cascading_deletes_do_not_scan_tables(catalog: None, foreign_key: ForeignKey) -> None:
+    # Deleting a referenced row looks up the referencing rows to delete them or to reject the delete.
+    referencing = foreign_key.parent
+    [(_, plan)] = await get_plans(lambda session: session.execute(select(referencing.table).where(referencing == 1)))
+    assert "Seq Scan" not in plan, f"{referencing}\n{plan}"
+
+
+async def test_activity_names_are_unique(db: None) -> None:
+    async with async_session() as session:
+        await session.execute(text("INSERT INTO activities (name) VALUES ('Еда')"))
+        with pytest.raises(IntegrityError):
+            await session.execute(text("INSERT INTO activities (name) VALUES ('Еда')"))
+
+
+async def test_duplicate_activity_names_are_renamed_by_migration(db: None, alembic_config: Config) -> None:
+    # The migrations run their own event loop, so they are run outside of the one of the test.
+    await asyncio.to_thread(command.downgrade, alembic_config, "5e8c3a7f9b21")
+    try:
+        async with async_session() as session:
+            await session.execute(
+                text(
+                    "INSERT INTO activities (id, name, parent_id) "
+                    "VALUES (1, 'Еда', NULL), (2, 'Еда', NULL), (3, 'Еда', 1), (4, 'Автомобили', NULL), "
+                    "(5, 'Еда (2)', NULL)"
+                )
+            )
+            await session.commit()
+    finally:
+        await asyncio.to_thread(command.upgrade, alembic_config, "head")
+
+    async with async_session() as session:
+        result = await session.execute(text("SELECT id, name FROM activities ORDER BY id"))
+        # The name the second activity would get is taken by the fifth one.
+        assert result.all() == [(1, "Еда"), (2, "Еда (2-2)"), (3, "Еда (3)"), (4, "Автомобили"), (5, "Еда (2)")]
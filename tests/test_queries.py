@@ -0,0 +1,41 @@
+import pytest
+from httpx import AsyncClient
+
+from tests.utils import AssertQueries, create_activity, create_building, create_organization
+
+CENTER = {"latitude": 55.7558, "longitude": 37.6173}
+
+
+@pytest.fixture
+async def organizations(client: AsyncClient) -> list[int]:
+    await create_activity(client, name="Еда")
+    ids = []
+    for number, (latitude_offset, longitude_offset) in enumerate([(0.0, 0.0), (0.001, 0.002), (0.3, 0.3)]):
+        building_id = await create_building(
+            client,
+            address=f"Тверская, {number + 1}",
+            latitude=CENTER["latitude"] + latitude_offset,
+            longitude=CENTER["longitude"] + longitude_offset,
+        )
+        ids.append(
+            await create_organization(client, name=f"ООО Ромашка {number}", building_id=building_id, activities=["Еда"])
+        )
+    return ids
+
+
+@pytest.mark.parametrize(
+    ("path", "key"),
+    [("/api_v1/organizations/by_radius", "organizations"), ("/api_v1/buildings/buildings_by_radius", "buildings")],
+)
+async def test_radius_search_is_a_single_query(
+    client: AsyncClient, organizations: list[int], assert_queries: AssertQueries, path: str, key: str
+) -> None:
+    params = CENTER | {"radius_km": 1}
+    with assert_queries(1):
+        response = await client.get(path, params=params)
+    assert response.status_code == 200
+    assert len(response.json()[key]) == 2
+
+    # The same search is served by the response cache.
+    with assert_queries(0):
+        assert (await client.get(path, params=params)).json() == response.json()
@@ -0,0 +1,96 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from src.core.db import async_session
+from tests.utils import AssertQueries, create_activity, create_building, create_organization
+
+
+@pytest.fixture
+async def organization_id(client: AsyncClient) -> int:
+    await create_activity(client, name="Еда")
+    building_id = await create_building(client, address="Тверская, 1", latitude=55.7558, longitude=37.6173)
+    return await create_organization(client, name="ООО Ромашка", building_id=building_id, activities=["Еда"])
+
+
+async def test_etag_is_stable_while_the_organization_is_unchanged(client: AsyncClient, organization_id: int) -> None:
+    response = await client.get(f"/api_v1/organizations/{organization_id}")
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith('W/"')
+    assert response.headers["vary"] == "api-key"
+    assert "max-age" in response.headers["cache-control"]
+    assert (await client.get(f"/api_v1/organizations/{organization_id}")).headers["etag"] == response.headers["etag"]
+
+
+@pytest.mark.parametrize("path", ["/api_v1/activities", "/api_v1/buildings", "/api_v1/organizations/{id}"])
+async def test_not_modified_costs_only_the_version_query(
+    client: AsyncClient, organization_id: int, assert_queries: AssertQueries, path: str
+) -> None:
+    path = path.format(id=organization_id)
+    etag = (await client.get(path)).headers["etag"]
+
+    with assert_queries(1):
+        response = await client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+async def test_matching_etag_is_not_modified(client: AsyncClient, organization_id: int) -> None:
+    path = f"/api_v1/organizations/{organization_id}"
+    etag = (await client.get(path)).headers["etag"]
+
+    response = await client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    # Strong comparison of the tag in a list still matches the weak ETag.
+    response = await client.get(path, headers={"If-None-Match": f'"other", {etag.removeprefix("W/")}'})
+    assert response.status_code == 304
+
+
+async def test_etag_changes_with_the_organization(client: AsyncClient, organization_id: int) -> None:
+    path = f"/api_v1/organizations/{organization_id}"
+    response = await client.get(path)
+    etag = response.headers["etag"]
+
+    organization = {"name": "ООО Лютик", "phones": "8-800-555-35-35", "building_id": response.json()["building_id"]}
+    assert (await client.put(path, json=organization)).status_code == 201
+
+    response = await client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["name"] == "ООО Лютик"
+    assert response.headers["etag"] != etag
+
+
+async def test_any_etag_matches_only_an_existing_resource(client: AsyncClient, organization_id: int) -> None:
+    response = await client.get(f"/api_v1/organizations/{organization_id}", headers={"If-None-Match": "*"})
+    assert response.status_code == 304
+
+    response = await client.get(f"/api_v1/organizations/{organization_id + 1}", headers={"If-None-Match": "*"})
+    assert response.status_code == 404
+
+
+async def test_list_etag_changes_after_a_write(client: AsyncClient) -> None:
+    await create_activity(client, name="Еда")
+    etag = (await client.get("/api_v1/activities")).headers["etag"]
+    assert (await client.get("/api_v1/activities", headers={"If-None-Match": etag})).status_code == 304
+
+    await create_activity(client, name="Автомобили")
+    response = await client.get("/api_v1/activities", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()["activities"]) == 2
+
+
+async def test_body_is_never_older_than_the_etag(client: AsyncClient, organization_id: int) -> None:
+    path = f"/api_v1/organizations/{organization_id}"
+    etag = (await client.get(path)).headers["etag"]
+
+    # A write that bypasses the services leaves the cached body in place, the new version must not be served with it.
+    async with async_session() as session:
+        await session.execute(text("UPDATE buildings SET address = 'Арбат, 2', updated_at = now()"))
+        await session.commit()
+
+    response = await client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["address"] == "Арбат, 2"
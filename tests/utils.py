@@ -0,0 +1,30 @@
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+from typing import Any
+
+from httpx import AsyncClient
+
+from src.core.db.instrumentation import QueryStats
+
+AssertQueries = Callable[[int], AbstractContextManager[QueryStats]]
+
+
+async def create_activity(client: AsyncClient, name: str, parent_id: int | None = None) -> int:
+    response = await client.post("/api_v1/activities", json={"name": name, "parent_id": parent_id})
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+async def create_building(client: AsyncClient, address: str, latitude: float, longitude: float) -> int:
+    response = await client.post(
+        "/api_v1/buildings", json={"address": address, "latitude": latitude, "longitude": longitude}
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+async def create_organization(client: AsyncClient, name: str, building_id: int, activities: list[str]) -> int:
+    organization: dict[str, Any] = {"name": name, "phones": "8-800-555-35-35", "building_id": building_id}
+    response = await client.post("/api_v1/organizations", json={"organization": organization, "activities": activities})
+    assert response.status_code == 201, response.text
+    return response.json()["id"]